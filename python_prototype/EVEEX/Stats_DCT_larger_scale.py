@@ -18,7 +18,7 @@ from time import time, sleep
 from logger import LogLevel, Logger
 from encoder import Encoder
 from network_transmission import Server, Client
-from bitstream import BitstreamSender
+from bitstream import BitstreamSender, BitstreamGenerator, TAIL_MSG
 from decoder import Decoder
 
 
@@ -102,7 +102,7 @@ def decode_frame_entierement():
         
         taille_donnees_compressees_huffman = bit_sender.th_WriteInBitstreamBuffer.taille_donnees_compressees_huffman
         taille_dico_encode_huffman = len(bit_sender.th_WriteInBitstreamBuffer.dict_huffman_encode)
-        taille_bitstream_total = len(received_data) # = len(bit_sender.th_WriteInBitstreamBuffer.bit_generator.bitstream)
+        taille_bitstream_total = 8 * len(received_data) # = 8 * len(bit_sender.th_WriteInBitstreamBuffer.bit_generator.bitstream)
         
         # on considère que le header et le tail font partie des métadonnees du bitstream
         taille_metadonnees = taille_bitstream_total - taille_donnees_compressees_huffman - taille_dico_encode_huffman
@@ -132,15 +132,24 @@ def decode_frame_entierement():
 
 def on_received_data(data):
     global received_data
+    global debut_paquet
     
     received_data += data
     
-    binary_MSG_TYPE = data[16 : 18]
-    
-    # "11" est en fait la valeur de TAIL_MSG (= 3) en binaire
-    if binary_MSG_TYPE == "11":
-        decode_frame_entierement()
-        received_data = ""
+    # les données reçues peuvent commencer ou s'arrêter au milieu d'un paquet
+    # (cf. network_transmission.py) : on parcourt les paquets complets reçus
+    while debut_paquet < len(received_data):
+        taille_paquet = BitstreamGenerator.taille_paquet(received_data, debut_paquet)
+        if (taille_paquet is None) or (debut_paquet + taille_paquet > len(received_data)):
+            break
+        
+        if BitstreamGenerator.type_paquet(received_data, debut_paquet) == TAIL_MSG:
+            decode_frame_entierement()
+            received_data = bytearray()
+            debut_paquet = 0
+            break
+        
+        debut_paquet += taille_paquet
 
 
 def execute_main(total_nb_of_images):
@@ -199,7 +208,10 @@ def execute_main(total_nb_of_images):
     cli = Client(HOST, PORT, bufsize, affiche_messages=False)
     
     global received_data
-    received_data = ""
+    received_data = bytearray()
+    
+    global debut_paquet
+    debut_paquet = 0 # position du prochain paquet de received_data
     
     serv.listen_for_packets(callback=on_received_data)
     cli.connect_to_server()
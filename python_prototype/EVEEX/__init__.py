@@ -1,10 +1,28 @@
 from . import logger
 from . import network_transmission
+from . import bit_io
+from . import exp_golomb
+from . import codage_entropique
 from . import huffman
+from . import tables_huffman
+from . import categories
+from . import codeur_arithmetique
+from . import codeur_exp_golomb
 from . import iDTT
+from . import color_conversion
+from . import zigzag
+from . import rle
+from . import chroma
+from . import quantification
 from . import bitstream
+from . import container
 from . import decoder
+from . import decodeur_incremental
 from . import encoder
+from . import parallel_encoder
+from . import parallel_decoder
+from . import pipeline
+from . import operateurs
 from . import image_generator
 from . import image_visualizer
 from . import Stats_DCT
@@ -12,11 +30,29 @@ from . import Stats_DCT
 __all__ = [
     'logger',
     'network_transmission',
+    'bit_io',
+    'exp_golomb',
+    'codage_entropique',
     'huffman',
+    'tables_huffman',
+    'categories',
+    'codeur_arithmetique',
+    'codeur_exp_golomb',
     'iDTT',
+    'color_conversion',
+    'zigzag',
+    'rle',
+    'chroma',
+    'quantification',
     'bitstream',
+    'container',
     'decoder',
+    'decodeur_incremental',
     'encoder',
+    'parallel_encoder',
+    'parallel_decoder',
+    'pipeline',
+    'operateurs',
     'image_generator',
     'image_visualizer',
     'Stats_DCT'
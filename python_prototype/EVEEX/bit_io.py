@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+
+"""
+Écriture (et lecture) de bits dans des octets (compacts), sans passer par des
+chaînes de caractères "0" et "1".
+
+Les codes de taille variable (typiquement les codes de Huffman d'une frame
+entière) sont écrits par lots : chaque code est décomposé en bits avec Numpy,
+puis tous les bits sont regroupés en octets avec np.packbits (bit de poids
+fort en premier).
+"""
+
+import numpy as np
+
+##############################################################################
+
+
+# longueur maximale (en bits) des codes écrits par emballe_codes : un code de
+# 32 bits tient toujours sur 2 mots consécutifs de 32 bits
+LONGUEUR_MAX_EMBALLAGE = 32
+
+
+def emballe_codes(codes, longueurs):
+    """
+    Met bout à bout des codes de taille variable, et les regroupe en octets.
+
+    Chaque code est d'abord aligné (par un décalage) dans une fenêtre de 64
+    bits, formée des 2 mots de 32 bits qu'il peut occuper. Les bits des
+    différents codes étant disjoints, chaque mot final est alors la somme des
+    contributions des fenêtres qui le recouvrent, que l'on calcule avec
+    np.bincount (en une seule passe pour les mots de poids fort des fenêtres,
+    et une autre pour ceux de poids faible).
+
+    Args:
+        codes: tableau d'entiers (positifs) : valeurs des codes
+        longueurs: tableau d'entiers : nombre de bits de chaque code (au plus
+                   LONGUEUR_MAX_EMBALLAGE)
+
+    Returns:
+        (octets, nb_bits): tableau d'octets (uint8), dont le dernier est
+                           éventuellement complété par des zéros, et nombre
+                           total de bits écrits
+    """
+    codes = np.asarray(codes, dtype=np.uint64)
+    longueurs = np.asarray(longueurs, dtype=np.int64)
+
+    if codes.size == 0:
+        return(np.zeros(0, dtype=np.uint8), 0)
+
+    if longueurs.max() > LONGUEUR_MAX_EMBALLAGE:
+        raise ValueError(f"Les codes doivent faire au plus {LONGUEUR_MAX_EMBALLAGE} bits")
+
+    fins = np.cumsum(longueurs)
+    debuts = fins - longueurs
+    nb_bits = int(fins[-1])
+    nb_mots = -(-nb_bits // 32)
+
+    indices_mots = debuts >> 5
+    fenetres = codes << (64 - (debuts & 31) - longueurs).astype(np.uint64)
+
+    # les sommes (< 2**32) sont exactes en float64
+    mots = np.bincount(indices_mots, weights=(fenetres >> np.uint64(32)).astype(np.float64), minlength=nb_mots + 1)
+    mots += np.bincount(indices_mots + 1, weights=(fenetres & np.uint64(0xFFFFFFFF)).astype(np.float64), minlength=nb_mots + 1)
+
+    # mots de 32 bits --> octets (poids fort en premier)
+    octets = mots[ : nb_mots].astype(np.uint32).astype(">u4").view(np.uint8)
+
+    return(octets[ : -(-nb_bits // 8)], nb_bits)
+
+
+def chaine_de_bits(octets, debut=0, fin=None):
+    """
+    Convertit les bits n°debut (inclus) à n°fin (exclu) d'un buffer d'octets
+    (bytes, bytearray, memoryview ou tableau Numpy de uint8, lu sans copie)
+    en chaîne de caractères "0" et "1".
+    """
+    bits = np.unpackbits(np.frombuffer(octets, dtype=np.uint8))[debut : fin]
+    return((bits + ord("0")).tobytes().decode("ascii"))
+
+
+def octets_de_chaine(chaine):
+    """
+    Opération inverse de chaine_de_bits : regroupe une chaîne de caractères
+    "0" et "1" en octets (bit de poids fort en premier), le dernier octet étant
+    éventuellement complété par des zéros.
+    """
+    bits = np.frombuffer(chaine.encode("ascii"), dtype=np.uint8) - ord("0")
+    return(np.packbits(bits).tobytes())
+
+
+def extrait_bits(octets, debut, fin):
+    """
+    Copie les bits n°debut (inclus) à n°fin (exclu) d'un buffer d'octets dans
+    de nouveaux octets, en les alignant sur le début du 1er octet (le dernier
+    octet étant éventuellement complété par des zéros). C'est l'équivalent de
+    octets_de_chaine(chaine_de_bits(octets, debut, fin)), sans passer par une
+    chaîne de caractères.
+    """
+    nb_bits = fin - debut
+    nb_octets = (nb_bits + 7) >> 3
+    indice_debut = debut >> 3
+    decalage = debut & 7
+
+    if decalage == 0:
+        segment = bytearray(octets[indice_debut : indice_debut + nb_octets])
+
+    else:
+        # on supprime les bits qui précèdent le bit n°debut dans son octet, puis
+        # on décale les bits restants vers le début de la fenêtre
+        indice_fin = (fin + 7) >> 3
+        nb_bits_fenetre = 8 * (indice_fin - indice_debut)
+        fenetre = int.from_bytes(octets[indice_debut : indice_fin], "big") & ((1 << (nb_bits_fenetre - decalage)) - 1)
+        segment = bytearray((fenetre << decalage).to_bytes(nb_bits_fenetre // 8, "big")[ : nb_octets])
+
+    # les bits qui suivent le bit n°(fin - 1) dans son octet sont mis à zéro
+    if nb_bits & 7:
+        segment[-1] &= (0xFF << (8 - (nb_bits & 7))) & 0xFF
+
+    return(bytes(segment))
+
+
+def lit_bits(valeur, taille, debut, nb_bits):
+    """
+    Lit les bits n°debut (inclus) à n°(debut + nb_bits) (exclu) d'un entier
+    'valeur' de 'taille' bits, le bit n°0 étant celui de poids fort (comme
+    BitReader.lit, mais sans passer par des octets).
+    """
+    return((valeur >> (taille - debut - nb_bits)) & ((1 << nb_bits) - 1))
+
+
+def encode_varint(entier):
+    """
+    Encode un entier positif en varint (LEB128 non signé) : 7 bits par octet,
+    en commençant par les bits de poids faible, le bit de poids fort de chaque
+    octet indiquant qu'un autre octet suit. Un entier < 128 tient donc sur un
+    seul octet.
+    """
+    if entier < 0:
+        raise ValueError(f"Un varint ne peut pas être négatif : {entier}")
+
+    octets = bytearray()
+
+    while entier >= 0x80:
+        octets.append((entier & 0x7F) | 0x80)
+        entier >>= 7
+
+    octets.append(entier)
+
+    return(bytes(octets))
+
+
+def taille_varint(entier):
+    """
+    Renvoie la taille (en octets) du varint d'un entier positif, sans
+    l'encoder (cf. encode_varint).
+    """
+    return(max(1, (entier.bit_length() + 6) // 7))
+
+
+def lit_varint(octets, debut=0):
+    """
+    Opération inverse de encode_varint : lit le varint commençant à l'octet
+    n°debut.
+
+    Returns:
+        (entier, fin): valeur lue, et indice de l'octet qui suit le varint
+    """
+    entier = 0
+    decalage = 0
+    position = debut
+
+    while True:
+        if position >= len(octets):
+            raise ValueError(f"Varint incomplet (commençant à l'octet n°{debut})")
+
+        octet = octets[position]
+        entier |= (octet & 0x7F) << decalage
+        decalage += 7
+        position += 1
+
+        if octet < 0x80:
+            return(entier, position)
+
+
+def concatene_segments(segments):
+    """
+    Met bout à bout des segments de bits, chacun commençant au début de son
+    1er octet (typiquement les données utiles des paquets d'un même macrobloc,
+    cf. bitstream.py).
+    Un segment seul est renvoyé tel quel, sans copie.
+
+    Args:
+        segments: liste de tuples (octets, nb_bits)
+
+    Returns:
+        (octets, nb_bits): les bits mis bout à bout, et leur nombre
+    """
+    if len(segments) == 1:
+        return(segments[0])
+
+    bits = [np.unpackbits(np.frombuffer(octets, dtype=np.uint8))[ : nb_bits] for (octets, nb_bits) in segments]
+    bits = np.concatenate(bits) if len(bits) > 0 else np.zeros(0, dtype=np.uint8)
+
+    return(np.packbits(bits).tobytes(), int(bits.size))
+
+
+##############################################################################
+
+
+class BitWriter:
+    """
+    Classe permettant d'écrire des bits à la suite les uns des autres, puis de
+    les récupérer sous forme d'octets. Les codes sont stockés par lots, et ne
+    sont regroupés en octets qu'une seule fois (dans la méthode 'octets').
+    """
+
+    def __init__(self):
+        self.lots_codes = []
+        self.lots_longueurs = []
+        self.nb_bits = 0
+
+
+    def ecrit(self, valeur, nb_bits):
+        """
+        Écrit l'entier positif 'valeur' sur nb_bits bits.
+        """
+        if valeur < 0 or valeur >= 2**nb_bits:
+            raise ValueError(f"La valeur {valeur} ne peut pas être écrite sur {nb_bits} bits")
+
+        # les valeurs trop longues sont découpées en morceaux de
+        # LONGUEUR_MAX_EMBALLAGE bits (au plus)
+        codes = []
+        longueurs = []
+        while nb_bits > 0:
+            longueur = min(nb_bits, LONGUEUR_MAX_EMBALLAGE)
+            nb_bits -= longueur
+            codes.append((valeur >> nb_bits) & (2**longueur - 1))
+            longueurs.append(longueur)
+
+        self.ecrit_codes(codes, longueurs)
+
+
+    def ecrit_codes(self, codes, longueurs):
+        """
+        Écrit (par lots) une suite de codes de taille variable.
+
+        Args:
+            codes, longueurs: cf. emballe_codes
+        """
+        longueurs = np.asarray(longueurs, dtype=np.int64)
+
+        self.lots_codes.append(np.asarray(codes, dtype=np.int64))
+        self.lots_longueurs.append(longueurs)
+        self.nb_bits += int(longueurs.sum())
+
+
+    def octets(self):
+        """
+        Renvoie les bits écrits, regroupés en octets. Le dernier octet est
+        éventuellement complété par des zéros.
+        """
+        if len(self.lots_codes) == 0:
+            return(bytearray())
+
+        octets, _ = emballe_codes(np.concatenate(self.lots_codes), np.concatenate(self.lots_longueurs))
+        return(bytearray(octets.tobytes()))
+
+
+#----------------------------------------------------------------------------#
+
+
+class BitReader:
+    """
+    Classe permettant de lire des bits à la suite les uns des autres dans un
+    buffer d'octets (bytes, bytearray ou memoryview), à partir du bit n°debut.
+    """
+
+    def __init__(self, octets, debut=0):
+        self.octets = octets
+        self.position = debut
+
+
+    def lit(self, nb_bits):
+        """
+        Lit un entier positif écrit sur nb_bits bits (cf. BitWriter.ecrit).
+        """
+        if self.position + nb_bits > 8 * len(self.octets):
+            raise ValueError(f"Impossible de lire {nb_bits} bits : fin du buffer atteinte")
+
+        indice_debut = self.position >> 3
+        indice_fin = (self.position + nb_bits + 7) >> 3
+        fenetre = int.from_bytes(self.octets[indice_debut : indice_fin], "big")
+
+        # nombre de bits de la fenêtre situés après les bits lus
+        decalage = 8 * (indice_fin - indice_debut) - (self.position & 7) - nb_bits
+        self.position += nb_bits
+
+        return((fenetre >> decalage) & ((1 << nb_bits) - 1))
+
+
+    def aligne(self):
+        """
+        Passe directement au début de l'octet suivant (si l'on n'est pas déjà
+        au début d'un octet).
+        """
+        self.position = (self.position + 7) & ~7
@@ -1,11 +1,22 @@
 # -*- coding: utf-8 -*-
 
 import threading
+import bisect
 from random import randint
 from time import time, sleep
 
 from network_transmission import Server, Client
-from huffman import Huffman
+from huffman import Huffman, DecodeurHuffman
+from bit_io import BitWriter, BitReader, chaine_de_bits, octets_de_chaine, extrait_bits, concatene_segments, encode_varint, taille_varint, lit_varint
+import chroma
+import quantification
+import rle
+import tables_huffman
+import categories
+import codage_entropique
+from codeur_arithmetique import CodeurArithmetique, DecodeurArithmetique
+from codeur_exp_golomb import CodeurExpGolomb, DecodeurExpGolomb
+import codeur_exp_golomb
 
 ###############################################################################
 
@@ -23,6 +34,84 @@ BODY_MSG = 2
 global TAIL_MSG
 TAIL_MSG = 3
 
+# paquets (facultatifs) de l'index du body, qui suivent ceux du dict : le type
+# d'un paquet est donné par les bits n°0, 1 et 3 de son 1er octet (cf. type_paquet)
+global INDEX_MSG
+INDEX_MSG = 0x08
+
+global MASQUE_TYPE_PAQUET
+MASQUE_TYPE_PAQUET = 0x0B
+
+# Le bitstream est binaire : chaque paquet est une suite d'octets, dont le 1er
+# est égal à MARQUEUR_PAQUET + type_msg (+ DRAPEAU_DERNIER_PAQUET, cf. ci-dessous).
+# Ce 1er octet est donc toujours >= 0x80, ce qui permet de distinguer les paquets
+# des messages de contrôle (en ASCII) envoyés par le réseau (cf. network_transmission.py)
+global MARQUEUR_PAQUET
+MARQUEUR_PAQUET = 0xB0
+
+# bit du 1er octet d'un paquet du dict (resp. du body) indiquant qu'il s'agit
+# du dernier paquet du dict (resp. que le dernier macrobloc du paquet ne se
+# poursuit pas dans le paquet suivant) : le récepteur peut alors décoder le
+# dict (resp. ce macrobloc) sans attendre le paquet suivant
+global DRAPEAU_DERNIER_PAQUET
+DRAPEAU_DERNIER_PAQUET = 0x04
+
+# taille du header, en octets (9 = 1 + (16 + 12 + 12 + 6 + 2 + 7 + 2 + 4 + 1 + 2) / 8)
+# frame_id n'est écrit que dans le header : les autres paquets d'une frame
+# sont ceux qui suivent son header
+global TAILLE_HEADER
+TAILLE_HEADER = 9
+
+# Les métadonnées des paquets du dict et du body sont des varints (cf.
+# bit_io.encode_varint), écrits juste après le 1er octet :
+#     - dict : taille des données utiles (en bits)
+#     - body : un paquet du body contient les données (segments) de plusieurs
+#              macroblocs consécutifs, jusqu'à remplir bufsize octets. Ses
+#              métadonnées sont l'écart entre le numéro de son 1er macrobloc
+#              et celui du dernier macrobloc du paquet du body précédent (0 si
+#              le paquet commence par la suite de ce macrobloc, ou pour le 1er
+#              paquet du body), le nombre de segments, puis la table des
+#              tailles (en bits) des segments. Chaque segment commence au début
+#              d'un octet, ce qui permet au récepteur de les séparer sans copie.
+#     - index : comme le dict, taille des données utiles (en bits)
+# Les paquets du dict (resp. les segments d'un macrobloc) sont dans l'ordre :
+# leur index est implicite.
+
+# L'index du body (facultatif) donne, pour chaque paquet du body, sa taille
+# (en octets) et l'écart entre le numéro de son 1er macrobloc et celui du 1er
+# macrobloc du paquet précédent (2 varints par paquet). Avec la table des
+# tailles des segments de chaque paquet, il permet d'accéder directement à
+# n'importe quel macrobloc, sans parcourir les paquets qui le précèdent, et
+# donc de décoder le body par morceaux, en parallèle (cf. parallel_decoder.py).
+
+# nombre maximal d'octets du varint de la taille des données utiles d'un paquet
+# (ou d'un segment), et du nombre de segments d'un paquet (3 octets, soit 21
+# bits, ce qui impose bufsize <= TAILLE_MAX_PAQUET)
+global NB_OCTETS_MAX_TAILLE_DONNEES
+NB_OCTETS_MAX_TAILLE_DONNEES = 3
+
+global TAILLE_MAX_PAQUET
+TAILLE_MAX_PAQUET = 2**21 // 8
+
+# nombre maximal d'octets du varint de l'écart entre les numéros de macroblocs
+# (4 octets, soit 28 bits : une frame 4095x4095 a moins de 2**28 macroblocs)
+global NB_OCTETS_MAX_ECART_MACROBLOC
+NB_OCTETS_MAX_ECART_MACROBLOC = 4
+
+# taille maximale des métadonnées des paquets du dict, en octets (4 = 1 + 3)
+global TAILLE_MAX_METADONNEES_DICT
+TAILLE_MAX_METADONNEES_DICT = 1 + NB_OCTETS_MAX_TAILLE_DONNEES
+
+# taille maximale des métadonnées d'un paquet du body ne contenant qu'un seul
+# segment, en octets (9 = 1 + 4 + 1 + 3) : bufsize >= 10 assure donc que tout
+# paquet du body peut contenir des données utiles
+global TAILLE_MAX_METADONNEES_BODY
+TAILLE_MAX_METADONNEES_BODY = 1 + NB_OCTETS_MAX_ECART_MACROBLOC + 1 + NB_OCTETS_MAX_TAILLE_DONNEES
+
+# taille du tail, en octets (1er octet seulement)
+global TAILLE_TAIL
+TAILLE_TAIL = 1
+
 ###############################################################################
 
 
@@ -32,14 +121,20 @@ class BitstreamGenerator:
     en entrée (après RLE). Chaque instance de cette classe servira à créer le 
     bitstream d'une seule image (pour le moment).
     
-    Concrètement, le bitstream d'une frame est constitué de 4 éléments :
+    Concrètement, le bitstream d'une frame est une suite de paquets binaires
+    (bytes), constitués de 4 éléments :
         - header: en-tête
-        - dict: relatif au dictionnaire de Huffman de la frame encodée (construit itérativement)
+        - dict: relatif au dictionnaire de Huffman de la frame encodée (construit itérativement),
+                absent si la frame utilise une table de Huffman statique (cf. tables_huffman.py)
+                ou le codeur arithmétique (cf. codage_entropique.py)
         - body: relatif à la frame encodée (construit itérativement)
         - tail: fin du bitstream
     """
     
-    def __init__(self, frame_id, img_size, macroblock_size):
+    def __init__(self, frame_id, img_size, macroblock_size, sous_echantillonnage=chroma.CHROMA_444,
+                 qualite=quantification.QUALITE_SEUIL, type_matrice=quantification.MATRICE_JPEG,
+                 id_table=tables_huffman.TABLE_DYNAMIQUE, symbolisation=categories.SYMBOLISATION_RUN_LEVEL,
+                 id_codeur=codage_entropique.CODEUR_HUFFMAN):
         self.frame_id = frame_id
         
         # img_size = (w, h), où w (= width = largeur) et h (= height = hauteur) 
@@ -50,35 +145,44 @@ class BitstreamGenerator:
         
         self.macroblock_size = macroblock_size
         
-        # initialisation des index des paquets envoyés (pour le dict et le body)
-        self.index_paquet_dict = 0
-        self.index_paquet_macrobloc = 0
+        # mode de sous-échantillonnage de la chrominance (cf. chroma.py)
+        self.sous_echantillonnage = sous_echantillonnage
+        
+        # facteur de qualité (0 si quantification par seuillage) et type de 
+        # matrice de quantification (cf. quantification.py)
+        self.qualite = qualite
+        self.type_matrice = type_matrice
+        
+        # identifiant de la table de Huffman statique utilisée, ou TABLE_DYNAMIQUE
+        # si la frame a son propre dictionnaire (cf. tables_huffman.py)
+        self.id_table = id_table
+        
+        # symboles codés par Huffman : paires (run, level), ou bien paires
+        # (run, categorie) suivies de l'amplitude des levels (cf. categories.py)
+        self.symbolisation = symbolisation
+        
+        # codeur entropique utilisé (cf. codage_entropique.py)
+        self.id_codeur = id_codeur
+        
+        # numéro du dernier macrobloc du dernier paquet du body construit (les
+        # numéros sont écrits sous forme d'écarts, cf. construct_body)
+        self.num_macrobloc_precedent = 0
         
+        # tailles (en octets) du dict et du body
         self.len_dict_bitstream = 0
         self.len_body_bitstream = 0
         
-        self.bitstream = ""
+        self.bitstream = bytearray()
     
     
     @staticmethod
-    def int2bin(entier, nb_bits):
+    def premier_octet(type_msg, dernier_paquet=False):
         """
         Fonction auxiliaire.
-        Retourne une chaîne de caractères correspondant à la représentation 
-        binaire d'un entier positif ou nul (entier), codé sur un nombre de bits
-        prédéfini (nb_bits). 
-        On suppose ici que entier <= 2**nb_bits - 1 (ie on suppose que cet entier
-        est codable sur le nombre de bits défini).
+        Renvoie le 1er octet d'un paquet du bitstream : MARQUEUR_PAQUET + type_msg
+        (+ DRAPEAU_DERNIER_PAQUET si dernier_paquet).
         """
-        if entier == 0:
-            return("0".zfill(nb_bits))
-        
-        chaine_binaire = ""
-        while entier != 0:
-            entier, reste = divmod(entier, 2)
-            chaine_binaire = "01"[reste] + chaine_binaire
-        
-        return(chaine_binaire.zfill(nb_bits))
+        return(MARQUEUR_PAQUET + DRAPEAU_DERNIER_PAQUET * dernier_paquet + type_msg)
     
     
     def construct_header(self):
@@ -86,88 +190,560 @@ class BitstreamGenerator:
         Construit le bitstream d'en-tête d'une frame à partir des informations 
         entrées lors de l'instanciation de la classe.
         Returns:
-            bitstream (string): le bitstream représentant le header de la frame
+            bitstream (bytes): le bitstream représentant le header de la frame
         """
         
-        # header = frame_id + type_msg + largeur de l'image + hauteur de l'image
-        # + taille des macroblocs
-        header = self.int2bin(self.frame_id, 16) + self.int2bin(HEADER_MSG, 2) + \
-                 self.int2bin(self.img_width, 12) + self.int2bin(self.img_height, 12) + \
-                 self.int2bin(self.macroblock_size, 6)
+        # header = (marqueur + type_msg) + frame_id + largeur de l'image + hauteur de l'image
+        # + taille des macroblocs + mode de sous-échantillonnage de la chrominance
+        # + facteur de qualité + type de matrice de quantification
+        # + identifiant de la table de Huffman + symbolisation des paires (run, level)
+        # + identifiant du codeur entropique
+        writer = BitWriter()
+        writer.ecrit(BitstreamGenerator.premier_octet(HEADER_MSG), 8)
+        writer.ecrit(self.frame_id, 16)
+        writer.ecrit(self.img_width, 12)
+        writer.ecrit(self.img_height, 12)
+        writer.ecrit(self.macroblock_size, 6)
+        writer.ecrit(self.sous_echantillonnage, 2)
+        writer.ecrit(self.qualite, 7)
+        writer.ecrit(self.type_matrice, 2)
+        writer.ecrit(self.id_table, tables_huffman.NB_BITS_ID_TABLE)
+        writer.ecrit(self.symbolisation, 1)
+        writer.ecrit(self.id_codeur, codage_entropique.NB_BITS_ID_CODEUR)
+        
+        header = bytes(writer.octets())
         
         self.bitstream += header
         
         return(header)
     
     
-    def construct_dict(self, dict_huffman_packet):
+    @staticmethod
+    def type_paquet(bitstream, debut=0):
+        """
+        Renvoie le type (HEADER_MSG, DICT_MSG, INDEX_MSG, BODY_MSG ou TAIL_MSG)
+        du paquet commençant à l'octet n°debut du bitstream.
+        """
+        octet = bitstream[debut]
+        
+        if octet & 0xF0 != MARQUEUR_PAQUET:
+            raise ValueError(f"L'octet n°{debut} du bitstream n'est pas le début d'un paquet")
+        
+        return(octet & MASQUE_TYPE_PAQUET)
+    
+    
+    @staticmethod
+    def est_dernier_paquet(bitstream, debut=0):
+        """
+        Indique si le paquet commençant à l'octet n°debut du bitstream est le
+        dernier paquet du dict, ou le dernier paquet de son macrobloc.
+        """
+        return(bitstream[debut] & DRAPEAU_DERNIER_PAQUET != 0)
+    
+    
+    @staticmethod
+    def lit_metadonnees(bitstream, debut=0):
+        """
+        Fonction auxiliaire.
+        Lit les métadonnées du paquet commençant à l'octet n°debut du bitstream.
+        Returns:
+            (type_msg, ecart_macrobloc, debut_donnees, tailles_segments): cf.
+            lit_paquet, avec debut_donnees l'indice du 1er octet du 1er segment
+        """
+        type_msg = BitstreamGenerator.type_paquet(bitstream, debut)
+        
+        if type_msg == HEADER_MSG:
+            return(type_msg, None, debut + TAILLE_HEADER, [])
+        
+        if type_msg == TAIL_MSG:
+            return(type_msg, None, debut + TAILLE_TAIL, [])
+        
+        if type_msg == DICT_MSG or type_msg == INDEX_MSG:
+            (taille_donnees, debut_donnees) = lit_varint(bitstream, debut + 1)
+            return(type_msg, None, debut_donnees, [taille_donnees])
+        
+        (ecart_macrobloc, position) = lit_varint(bitstream, debut + 1)
+        (nb_segments, position) = lit_varint(bitstream, position)
+        
+        tailles_segments = []
+        for _ in range(nb_segments):
+            (taille_segment, position) = lit_varint(bitstream, position)
+            tailles_segments.append(taille_segment)
+        
+        return(type_msg, ecart_macrobloc, position, tailles_segments)
+    
+    
+    @staticmethod
+    def lit_paquet(bitstream, debut=0):
+        """
+        Lit les métadonnées du paquet commençant à l'octet n°debut du bitstream,
+        sans copier ses données utiles.
+        Args:
+            bitstream (bytes, bytearray ou memoryview): suite de paquets
+            debut: indice du 1er octet du paquet
+        Returns:
+            (type_msg, ecart_macrobloc, segments, fin): type du paquet, écart
+            entre le numéro de son 1er macrobloc et celui du dernier macrobloc
+            du paquet du body précédent (pour un paquet du body, None sinon),
+            liste des tuples (debut_segment, taille_segment) donnant l'indice
+            du 1er octet et la taille (en bits) de chaque segment de données
+            utiles (un seul pour le dict et l'index, un par macrobloc pour le
+            body, aucun pour le header et le tail), et indice de l'octet qui
+            suit le paquet
+        """
+        (type_msg, ecart_macrobloc, debut_segment, tailles_segments) = BitstreamGenerator.lit_metadonnees(bitstream, debut)
+        
+        # chaque segment (de taille_segment bits) est complété par des zéros
+        # jusqu'à la fin de son dernier octet
+        segments = []
+        for taille_segment in tailles_segments:
+            segments.append((debut_segment, taille_segment))
+            debut_segment += (taille_segment + 7) // 8
+        
+        fin = debut_segment
+        
+        if fin > len(bitstream):
+            raise ValueError(f"Le paquet commençant à l'octet n°{debut} du bitstream est incomplet")
+        
+        return(type_msg, ecart_macrobloc, segments, fin)
+    
+    
+    @staticmethod
+    def parcourt_paquets(bitstream, debut=0, fin=None, num_dernier_macrobloc=0):
+        """
+        Générateur parcourant les paquets d'une frame, à partir de l'octet
+        n°debut du bitstream (qui doit être le header ou le 1er paquet qui le
+        suit) et jusqu'à son tail (inclus), ou bien jusqu'à l'octet n°fin
+        (exclu) si fin n'est pas None. Un paquet du body donne un élément
+        par segment (i.e. par macrobloc), et les autres paquets un seul élément.
+        Les données utiles sont des vues (memoryview) sur le bitstream : aucun
+        octet n'est copié.
+        Args:
+            num_dernier_macrobloc: numéro du dernier macrobloc du paquet du body
+                                   qui précède l'octet n°debut (pour un parcours
+                                   commençant au milieu du body)
+        Yields:
+            (type_msg, num_macrobloc, donnees, taille_donnees): type du paquet,
+            numéro du macrobloc (reconstitué à partir des écarts) pour un
+            segment du body (None sinon), vue sur les données utiles du segment
+            (vide pour le header et le tail), et leur taille en bits
+        """
+        vue = memoryview(bitstream)
+        type_msg = None
+        
+        if fin is None:
+            fin_parcours = len(vue)
+        else:
+            fin_parcours = fin
+        
+        while type_msg != TAIL_MSG and debut < fin_parcours:
+            (type_msg, ecart_macrobloc, segments, fin_paquet) = BitstreamGenerator.lit_paquet(vue, debut)
+            
+            if type_msg == BODY_MSG:
+                num_premier_macrobloc = num_dernier_macrobloc + ecart_macrobloc
+                
+                for (k, (debut_segment, taille_segment)) in enumerate(segments):
+                    yield(type_msg, num_premier_macrobloc + k, vue[debut_segment : debut_segment + (taille_segment + 7) // 8], taille_segment)
+                
+                num_dernier_macrobloc = num_premier_macrobloc + len(segments) - 1
+            
+            elif type_msg == DICT_MSG or type_msg == INDEX_MSG:
+                (debut_segment, taille_segment) = segments[0]
+                yield(type_msg, None, vue[debut_segment : fin_paquet], taille_segment)
+            
+            else:
+                yield(type_msg, None, vue[fin_paquet : fin_paquet], 0)
+            
+            debut = fin_paquet
+    
+    
+    @staticmethod
+    def parcourt_macroblocs(paquets, total_num_of_macroblocks, num_premier_macrobloc=0):
+        """
+        Générateur regroupant les segments du body par macrobloc (les segments
+        d'un macrobloc sont consécutifs, et un macrobloc peut n'avoir aucun
+        segment s'il est encodé sur 0 bit).
+        Les données d'un macrobloc tenant dans un seul segment (cas usuel) sont
+        renvoyées sans copie ; celles des autres macroblocs sont mises bout à
+        bout dans un nouveau buffer.
+        Args:
+            paquets: itérateur de parcourt_paquets, placé sur le 1er paquet du body
+                     (ou sur le paquet contenant le début du macrobloc
+                     n°num_premier_macrobloc, les segments des macroblocs
+                     précédents étant ignorés)
+            total_num_of_macroblocks: nombre de macroblocs de la frame (ou
+                                      numéro du macrobloc suivant le dernier
+                                      macrobloc à parcourir)
+            num_premier_macrobloc: numéro du 1er macrobloc à parcourir
+        Yields:
+            (num_macrobloc, octets, nb_bits): données utiles de chaque macrobloc,
+            dans l'ordre (ce sont les nb_bits premiers bits de 'octets')
+        """
+        # la fin des paquets (cf. l'argument 'fin' de parcourt_paquets) est
+        # traitée comme un tail
+        fin_paquets = (TAIL_MSG, None, None, 0)
+        
+        (type_msg, num_macrobloc_actuel, donnees, taille_donnees) = next(paquets, fin_paquets)
+        
+        while (type_msg == BODY_MSG) and (num_macrobloc_actuel < num_premier_macrobloc):
+            (type_msg, num_macrobloc_actuel, donnees, taille_donnees) = next(paquets, fin_paquets)
+        
+        for num_macrobloc in range(num_premier_macrobloc, total_num_of_macroblocks):
+            segments = []
+            
+            while (type_msg == BODY_MSG) and (num_macrobloc_actuel == num_macrobloc):
+                segments.append((donnees, taille_donnees))
+                (type_msg, num_macrobloc_actuel, donnees, taille_donnees) = next(paquets, fin_paquets)
+            
+            yield((num_macrobloc, ) + concatene_segments(segments))
+    
+    
+    @staticmethod
+    def taille_paquet(bitstream, debut=0):
+        """
+        Renvoie la taille (en octets) du paquet commençant à l'octet n°debut
+        du bitstream, en ne lisant que ses métadonnées, ou None si le bitstream
+        s'arrête avant la fin de ses métadonnées (paquet reçu en partie).
+        """
+        # le 1er octet est lu en dehors du try : un octet qui n'est pas le
+        # début d'un paquet est une erreur, et non un paquet incomplet
+        BitstreamGenerator.type_paquet(bitstream, debut)
+        
+        try:
+            (_, _, debut_donnees, tailles_segments) = BitstreamGenerator.lit_metadonnees(bitstream, debut)
+        except ValueError:
+            # varint incomplet (cf. bit_io.lit_varint)
+            return(None)
+        
+        return(debut_donnees - debut + sum((taille_segment + 7) // 8 for taille_segment in tailles_segments))
+    
+    
+    @staticmethod
+    def decode_header(bitstream):
+        """
+        Opération inverse de construct_header.
+        Args:
+            bitstream (bytes): bitstream (complet ou non) commençant par le header d'une frame
+        Returns:
+            (frame_id, img_size, macroblock_size, sous_echantillonnage, qualite, type_matrice, id_table, symbolisation, id_codeur):
+            infos contenues dans le header, avec img_size = (img_width, img_height)
+        """
+        if BitstreamGenerator.type_paquet(bitstream) != HEADER_MSG:
+            raise ValueError("Le bitstream ne commence pas par un header")
+        
+        reader = BitReader(bitstream, 8)
+        
+        frame_id = reader.lit(16)
+        img_width = reader.lit(12)
+        img_height = reader.lit(12)
+        macroblock_size = reader.lit(6)
+        sous_echantillonnage = reader.lit(2)
+        qualite = reader.lit(7)
+        type_matrice = reader.lit(2)
+        id_table = reader.lit(tables_huffman.NB_BITS_ID_TABLE)
+        symbolisation = reader.lit(1)
+        id_codeur = reader.lit(codage_entropique.NB_BITS_ID_CODEUR)
+        
+        return(frame_id, (img_width, img_height), macroblock_size, sous_echantillonnage, qualite, type_matrice,
+               id_table, symbolisation, id_codeur)
+    
+    
+    @staticmethod
+    def code_de_huffman(tableaux_RLE, id_table=tables_huffman.TABLE_DYNAMIQUE, symbolisation=categories.SYMBOLISATION_RUN_LEVEL):
+        """
+        Détermine le code de Huffman avec lequel sera encodée une frame : la table
+        statique id_table si elle est assez efficace pour cette frame, sinon un
+        dictionnaire propre à la frame (cf. tables_huffman.py).
+        Les tables statiques codant des paires (run, level), une frame dont les
+        symboles sont des paires (run, categorie) a toujours son propre dictionnaire
+        (qui est de toute façon très petit, cf. categories.py).
+        Args:
+            tableaux_RLE: frame RLE sous forme de tableaux (runs, levels, debuts)
+            id_table: identifiant de la table statique souhaitée, ou TABLE_DYNAMIQUE
+            symbolisation: SYMBOLISATION_RUN_LEVEL ou SYMBOLISATION_CATEGORIES
+        Returns:
+            (huff, dict_huffman_encode, id_table): code de Huffman, dictionnaire
+            à transmettre (vide si l'on utilise une table statique), et identifiant
+            de la table effectivement utilisée (à écrire dans le header)
+        """
+        (runs, levels, _) = tableaux_RLE
+        
+        if symbolisation == categories.SYMBOLISATION_CATEGORIES:
+            huff = categories.HuffmanCategories.depuis_tableaux(runs, levels)
+            return(huff, huff.dictToBin(), tables_huffman.TABLE_DYNAMIQUE)
+        
+        id_table = tables_huffman.choisit_table(id_table, runs, levels)
+        
+        if id_table != tables_huffman.TABLE_DYNAMIQUE:
+            return(tables_huffman.charge_table(id_table), "", id_table)
+        
+        huff = Huffman.depuis_tableaux(runs, levels)
+        return(huff, huff.dictToBin(), id_table)
+    
+    
+    @staticmethod
+    def codeur_entropique(tableaux_RLE, id_codeur=codage_entropique.CODEUR_HUFFMAN, id_table=tables_huffman.TABLE_DYNAMIQUE,
+                          symbolisation=categories.SYMBOLISATION_RUN_LEVEL):
+        """
+        Crée le codeur entropique avec lequel sera encodée une frame (cf.
+        codage_entropique.py).
+        Si l'on demande un code de Huffman avec un dictionnaire propre à la frame,
+        mais que celui-ci coûte plus cher que ce qu'il fait gagner sur le body
+        (typiquement pour les petites frames), on utilise à la place les codes
+        de Golomb exponentiels, qui n'ont pas besoin de dictionnaire.
+        Args:
+            tableaux_RLE: frame RLE sous forme de tableaux (runs, levels, debuts)
+            id_codeur: CODEUR_HUFFMAN, CODEUR_ARITHMETIQUE ou CODEUR_EXP_GOLOMB
+            id_table, symbolisation: paramètres du code de Huffman (cf. code_de_huffman),
+                                     ignorés par les autres codeurs
+        Returns:
+            (codeur, donnees_dict, id_codeur, id_table): codeur entropique de la
+            frame, données à transmettre dans les paquets du dict (éventuellement
+            vides), et identifiants du codeur et de la table de Huffman effectivement
+            utilisés (à écrire dans le header)
+        """
+        if id_codeur == codage_entropique.CODEUR_ARITHMETIQUE:
+            codeur = CodeurArithmetique()
+            return(codeur, codeur.dictToBin(), id_codeur, tables_huffman.TABLE_DYNAMIQUE)
+        
+        if id_codeur == codage_entropique.CODEUR_EXP_GOLOMB:
+            codeur = CodeurExpGolomb()
+            return(codeur, codeur.dictToBin(), id_codeur, tables_huffman.TABLE_DYNAMIQUE)
+        
+        huff, dict_huffman_encode, id_table = BitstreamGenerator.code_de_huffman(tableaux_RLE, id_table, symbolisation)
+        
+        if id_table == tables_huffman.TABLE_DYNAMIQUE:
+            # comparaison des tailles (dict + body) des 2 codes
+            (runs, levels, _) = tableaux_RLE
+            taille_huffman = len(dict_huffman_encode) + huff.nb_bits_body(runs, levels)
+            taille_exp_golomb = int(codeur_exp_golomb.longueurs_codes(runs, levels).sum())
+            
+            if taille_exp_golomb <= taille_huffman:
+                return(CodeurExpGolomb(), "", codage_entropique.CODEUR_EXP_GOLOMB, id_table)
+        
+        return(huff, dict_huffman_encode, codage_entropique.CODEUR_HUFFMAN, id_table)
+    
+    
+    @staticmethod
+    def decodeur_entropique(id_codeur, id_table, symbolisation, donnees_dict):
+        """
+        Crée le décodeur entropique d'une frame, à partir des infos de son header
+        et des données utiles de son dict.
+        Returns:
+            decodeur: instance de DecodeurEntropique (cf. codage_entropique.py)
+        """
+        if id_codeur == codage_entropique.CODEUR_ARITHMETIQUE:
+            return(DecodeurArithmetique())
+        
+        if id_codeur == codage_entropique.CODEUR_EXP_GOLOMB:
+            return(DecodeurExpGolomb())
+        
+        if id_table != tables_huffman.TABLE_DYNAMIQUE:
+            return(tables_huffman.charge_decodeur(id_table))
+        
+        # les tables de décodage sont construites une seule fois par frame
+        dict_huffman_decode = Huffman.binToDict(donnees_dict)
+        
+        if symbolisation == categories.SYMBOLISATION_CATEGORIES:
+            return(categories.DecodeurCategories(dict_huffman_decode))
+        
+        return(DecodeurHuffman(dict_huffman_decode))
+    
+    
+    def construct_dict(self, dict_huffman_packet, dernier_paquet=True):
         """
         Construit le bitstream représentant le dictionnaire de huffman associé
         à la frame (après RLE), converti en binaire.
         
         Remarque importante : à part pour le tout dernier paquet provenant des données
         utiles du dictionnaire de huffman encodé, on aura toujours la relation 
-        suivante : len(dict_huffman_packet) = bufsize - 50 = taille_paquet_elementaire_dict,
-        et donc len(nouv_contenu_dict) = taille_paquet_elementaire_dict + 50 = bufsize.
-        Pour le tout dernier paquet, on aura juste len(dict_huffman_packet) <= bufsize - 50
+        suivante : len(dict_huffman_packet) = 8 * (bufsize - 4) = taille_paquet_elementaire_dict,
+        et donc len(nouv_contenu_dict) <= 4 + taille_paquet_elementaire_dict / 8 = bufsize
+        (en octets), car les métadonnées font au plus TAILLE_MAX_METADONNEES_DICT = 4 octets.
+        Pour le tout dernier paquet, on aura juste len(dict_huffman_packet) <= 8 * (bufsize - 4)
         et len(nouv_contenu_dict) <= bufsize.
-        La raison pour laquelle on inclut quand même la taille des paquets est précisément
-        ce dernier paquet, qui n'est pas nécessairement de la même taille que tous 
-        les autres.
+        La raison pour laquelle on inclut quand même la taille des paquets (en
+        bits) est précisément ce dernier paquet, qui n'est pas nécessairement de
+        la même taille que tous les autres, et dont le dernier octet est complété
+        par des zéros.
         
-        --> Cette remarque est aussi valable pour la méthode construct_body (en 
-            remplaçant '50' par '66').
+        --> Les paquets du body, eux, regroupent plusieurs macroblocs (cf.
+            construct_body_paquets).
         
         Args:
             dict_huffman_packet: paquet d'un dictionnaire de huffman encodé en binaire
+                                 (chaîne de "0" et de "1")
+            dernier_paquet: True s'il s'agit du dernier paquet du dict
         Returns:
-            bitstream (string): le bitstream représentant une partie du dictionnaire 
-                                de huffman
+            bitstream (bytes): le bitstream représentant une partie du dictionnaire 
+                               de huffman
         """
-        # nouv_contenu_dict = frame_id + type_msg + index + taille paquet + paquet
+        # nouv_contenu_dict = (marqueur + type_msg) + taille paquet (varint) + paquet
         # --> pas besoin du numéro du macrobloc, car dictionnaire global
-        nouv_contenu_dict = self.int2bin(self.frame_id, 16) + self.int2bin(DICT_MSG, 2) + \
-                            self.int2bin(self.index_paquet_dict, 16) + \
-                            self.int2bin(len(dict_huffman_packet), 16) + dict_huffman_packet
+        nouv_contenu_dict = (bytes([BitstreamGenerator.premier_octet(DICT_MSG, dernier_paquet)])
+                             + encode_varint(len(dict_huffman_packet)) + octets_de_chaine(dict_huffman_packet))
         
         self.bitstream += nouv_contenu_dict
         self.len_dict_bitstream += len(nouv_contenu_dict)
-        self.index_paquet_dict += 1
         
         return(nouv_contenu_dict)
     
     
-    def construct_body(self, num_macrobloc, huffman_packet):
+    def construct_body(self, num_premier_macrobloc, segments, dernier_paquet=True):
         """
-        Construit le bitstream représentant le contenu d'un paquet encodé 
-        par huffman.
+        Construit un paquet du body, contenant les données (segments) de
+        plusieurs macroblocs consécutifs.
+        Les paquets du body doivent être construits dans l'ordre des macroblocs
+        (le numéro du 1er macrobloc est écrit sous forme d'écart avec celui du
+        dernier macrobloc du paquet précédent).
         Args:
-            num_macrobloc: numéro du macrobloc dont est issu le paquet encodé
-            huffman_packet: contenu du paquet encodé par huffman
+            num_premier_macrobloc: numéro du macrobloc du 1er segment
+            segments: données des macroblocs num_premier_macrobloc,
+                      num_premier_macrobloc + 1, etc. encodées par le codeur
+                      entropique, sous forme de tuples (octets, nb_bits) (cf.
+                      bit_io.extrait_bits), éventuellement incomplètes pour le
+                      1er et le dernier segment (cf. construct_body_paquets)
+            dernier_paquet: True si le dernier segment termine son macrobloc
         Returns:
-            bitstream (string): le bitstream représentant le paquet
+            bitstream (bytes): le bitstream représentant le paquet
         """
-        # nouveau contenu = frame_id + type_msg + numéro macrobloc + index + 
-        # taille paquet + paquet
-        nouv_contenu_body = self.int2bin(self.frame_id, 16) + self.int2bin(BODY_MSG, 2) + \
-                            self.int2bin(num_macrobloc, 16) + self.int2bin(self.index_paquet_macrobloc, 16) + \
-                            self.int2bin(len(huffman_packet), 16) + huffman_packet
+        ecart_macrobloc = num_premier_macrobloc - self.num_macrobloc_precedent
+        
+        if ecart_macrobloc < 0:
+            raise ValueError(f"Paquet du macrobloc n°{num_premier_macrobloc} construit après un paquet du macrobloc n°{self.num_macrobloc_precedent}")
+        
+        # nouveau contenu = (marqueur + type_msg) + écart entre les numéros de macroblocs (varint)
+        # + nombre de segments (varint) + table des tailles des segments (varints) + segments
+        # (chacun complété par des zéros jusqu'à la fin de son dernier octet)
+        metadonnees = (bytes([BitstreamGenerator.premier_octet(BODY_MSG, dernier_paquet)]) + encode_varint(ecart_macrobloc)
+                       + encode_varint(len(segments)) + b"".join(encode_varint(nb_bits) for (_, nb_bits) in segments))
+        
+        nouv_contenu_body = metadonnees + b"".join(octets for (octets, _) in segments)
         
         self.bitstream += nouv_contenu_body
         self.len_body_bitstream += len(nouv_contenu_body)
-        self.index_paquet_macrobloc += 1
+        self.num_macrobloc_precedent = num_premier_macrobloc + len(segments) - 1
         
         return(nouv_contenu_body)
     
     
+    def construct_body_paquets(self, octets, decalages_bits, bufsize):
+        """
+        Générateur construisant les paquets du body d'une frame : chaque paquet
+        est rempli, jusqu'à bufsize octets, avec les données de plusieurs
+        macroblocs consécutifs (cf. construct_body). Un macrobloc n'est coupé
+        entre plusieurs paquets que s'il ne tient pas dans un paquet entier.
+        Les données de chaque segment sont copiées directement depuis les
+        octets de la frame encodée (cf. bit_io.extrait_bits).
+        Args:
+            (octets, decalages_bits): frame encodée par le codeur entropique
+                                      (cf. CodeurEntropique.encode_tableaux)
+            bufsize: taille maximale (en octets) d'un paquet (>= 10)
+        Yields:
+            paquet (bytes): paquets du body, dans l'ordre
+        """
+        segments = []
+        num_premier_macrobloc = 0
+        
+        # taille du paquet en cours, sans son 1er octet, l'écart et le nombre
+        # de segments : somme des tailles des varints et des données des segments
+        taille_segments = 0
+        
+        def taille_paquet_avec(taille_segment):
+            # taille (en octets) du paquet en cours si on lui ajoutait un segment
+            # de taille_segment bits
+            return(1 + taille_varint(num_premier_macrobloc - self.num_macrobloc_precedent)
+                   + taille_varint(len(segments) + 1) + taille_segments
+                   + taille_varint(taille_segment) + (taille_segment + 7) // 8)
+        
+        bornes = decalages_bits.tolist()
+        
+        for num_macrobloc in range(len(bornes) - 1):
+            # bits restant à placer dans les paquets pour ce macrobloc
+            (debut, fin) = (bornes[num_macrobloc], bornes[num_macrobloc + 1])
+            
+            while True:
+                if len(segments) == 0:
+                    num_premier_macrobloc = num_macrobloc
+                
+                taille_reste = fin - debut
+                
+                if taille_paquet_avec(taille_reste) <= bufsize:
+                    segments.append((extrait_bits(octets, debut, fin), taille_reste))
+                    taille_segments += taille_varint(taille_reste) + (taille_reste + 7) // 8
+                    break
+                
+                if len(segments) > 0 and taille_varint(taille_reste) + (taille_reste + 7) // 8 <= bufsize - TAILLE_MAX_METADONNEES_BODY:
+                    # le macrobloc tient dans un paquet entier : on commence un nouveau paquet
+                    yield(self.construct_body(num_premier_macrobloc, segments, True))
+                    (segments, taille_segments) = ([], 0)
+                    continue
+                
+                # le macrobloc ne tient pas dans un paquet entier : on remplit
+                # la place restante avec son début
+                nb_octets_libres = bufsize - taille_paquet_avec(0) + 1
+                nb_octets_segment = nb_octets_libres - taille_varint(8 * nb_octets_libres)
+                
+                if nb_octets_segment > 0:
+                    segments.append((extrait_bits(octets, debut, debut + 8 * nb_octets_segment), 8 * nb_octets_segment))
+                    debut += 8 * nb_octets_segment
+                
+                yield(self.construct_body(num_premier_macrobloc, segments, nb_octets_segment <= 0))
+                (segments, taille_segments) = ([], 0)
+        
+        if len(segments) > 0:
+            yield(self.construct_body(num_premier_macrobloc, segments, True))
+    
+    
+    @staticmethod
+    def construct_index_paquets(paquets_body, bufsize):
+        """
+        Construit les paquets de l'index du body d'une frame, qui sont placés
+        entre son dict et son body. L'index n'étant connu qu'une fois tout le
+        body construit, il n'est pas ajouté au bitstream interne.
+        Args:
+            paquets_body: paquets du body de la frame (cf. construct_body_paquets)
+            bufsize: taille maximale (en octets) d'un paquet (>= 10)
+        Returns:
+            paquets: paquets de l'index
+        """
+        # entrées de l'index : taille de chaque paquet du body (varint), et
+        # écart entre le numéro de son 1er macrobloc et celui du paquet
+        # précédent (varint)
+        octets_index = bytearray()
+        num_dernier_macrobloc = 0
+        num_premier_macrobloc_precedent = 0
+        
+        for paquet in paquets_body:
+            (_, ecart_macrobloc, segments, _) = BitstreamGenerator.lit_paquet(paquet)
+            num_premier_macrobloc = num_dernier_macrobloc + ecart_macrobloc
+            num_dernier_macrobloc = num_premier_macrobloc + len(segments) - 1
+            
+            octets_index += encode_varint(len(paquet)) + encode_varint(num_premier_macrobloc - num_premier_macrobloc_precedent)
+            num_premier_macrobloc_precedent = num_premier_macrobloc
+        
+        # taille des données utiles (en octets) d'un paquet complet de l'index
+        taille_paquet_elementaire_index = bufsize - TAILLE_MAX_METADONNEES_DICT
+        
+        paquets = []
+        for indice_initial in range(0, len(octets_index), taille_paquet_elementaire_index):
+            donnees_paquet = bytes(octets_index[indice_initial : indice_initial + taille_paquet_elementaire_index])
+            dernier_paquet = (indice_initial + taille_paquet_elementaire_index >= len(octets_index))
+            
+            paquets.append(bytes([BitstreamGenerator.premier_octet(INDEX_MSG, dernier_paquet)])
+                           + encode_varint(8 * len(donnees_paquet)) + donnees_paquet)
+        
+        return(paquets)
+    
+    
     def construct_end_message(self):
         """
         Construit le bitstream représentant le message de fin d'une frame.
         Returns:
-            bitstream (string): le bitstream représentant le message de fin
+            bitstream (bytes): le bitstream représentant le message de fin
         """
-        # tail = frame_id + type_msg
-        self.tail = self.int2bin(self.frame_id, 16) + self.int2bin(TAIL_MSG, 2)
+        # tail = (marqueur + type_msg)
+        self.tail = bytes([BitstreamGenerator.premier_octet(TAIL_MSG)])
         
         self.bitstream += self.tail
         
@@ -175,10 +751,15 @@ class BitstreamGenerator:
     
     
     @staticmethod
-    def encode_frame_RLE(frame_id, img_size, macroblock_size, frame, bufsize):
+    def genere_paquets_frame_RLE(frame_id, img_size, macroblock_size, frame, bufsize, sous_echantillonnage=chroma.CHROMA_444,
+                                 qualite=quantification.QUALITE_SEUIL, type_matrice=quantification.MATRICE_JPEG,
+                                 id_table=tables_huffman.TABLE_DYNAMIQUE, symbolisation=categories.SYMBOLISATION_RUN_LEVEL,
+                                 id_codeur=codage_entropique.CODEUR_HUFFMAN, avec_index=False):
         """
-        Permet de convertir une frame RLE en un bitstream. Il s'agit d'une
-        fonction-outil. On reprend en fait tout le processus de la méthode
+        Permet de convertir une frame RLE en la liste des paquets de son 
+        bitstream (header, paquets du dict, paquets de l'index s'il y en a un,
+        paquets du body, tail), dans l'ordre
+        d'envoi. On reprend en fait tout le processus de la méthode
         'send_frame_RLE' de BitstreamSender, mais SANS passer par un réseau.
         
         Args:
@@ -187,32 +768,53 @@ class BitstreamGenerator:
             macroblock_size: longueur des côtés des macroblocs (on suppose que
                              ce sont des carrés), int > 1
             frame: frame_RLE de référence (liste de tuples d'entiers)
-            bufsize: taille maximale que peut prendre un paquet (int >= 51)
+            bufsize: taille maximale (en octets) que peut prendre un paquet
+                     (10 <= bufsize <= TAILLE_MAX_PAQUET, car la taille des
+                     données utiles d'un paquet, en bits, est écrite sur au
+                     plus 3 octets)
+            sous_echantillonnage: mode de sous-échantillonnage de la chrominance
+                                  utilisé pour générer la frame (cf. chroma.py)
+            qualite, type_matrice: paramètres de quantification utilisés pour
+                                   générer la frame (cf. quantification.py)
+            id_table: identifiant de la table de Huffman statique à utiliser (si
+                      elle est assez efficace), ou TABLE_DYNAMIQUE (cf. tables_huffman.py)
+            symbolisation: symboles codés par Huffman, SYMBOLISATION_RUN_LEVEL ou
+                           SYMBOLISATION_CATEGORIES (cf. categories.py)
+            id_codeur: codeur entropique, CODEUR_HUFFMAN, CODEUR_ARITHMETIQUE ou
+                       CODEUR_EXP_GOLOMB (cf. codage_entropique.py)
+            avec_index: True pour ajouter l'index du body (cf. construct_index_paquets),
+                        qui permet de décoder le body par morceaux, en parallèle
         
         Returns:
-            bitstream_total: bitstream associé à la frame RLE de référence 
+            paquets: liste des paquets (bytes) du bitstream associé à la frame RLE
+                     de référence
         """
         
         #--------------------------------------------------------------------#
         
+        # choix du codeur entropique, puis encodage du dictionnaire de huffman
+        # associé à la frame **entière** (s'il y en a un)
+        tableaux_RLE = rle.en_tableaux(frame)
+        (codeur, dict_huffman_encode,
+         id_codeur, id_table) = BitstreamGenerator.codeur_entropique(tableaux_RLE, id_codeur, id_table, symbolisation)
+        
         # initialisation du constructeur (du bitstream)
-        bit_generator = BitstreamGenerator(frame_id, img_size, macroblock_size)
+        bit_generator = BitstreamGenerator(frame_id, img_size, macroblock_size, sous_echantillonnage, qualite, type_matrice,
+                                           id_table, symbolisation, id_codeur)
+        
+        paquets = []
         
         #--------------------------------------------------------------------#
         
         # construction du header
-        bit_generator.construct_header()
+        paquets.append(bit_generator.construct_header())
         
         #--------------------------------------------------------------------#
         
         # dict
         
-        taille_metadonnees_dict = 50
-        taille_paquet_elementaire_dict = bufsize - taille_metadonnees_dict
-        
-        # encodage du dictionnaire de huffman associé à la frame **entière**
-        huff = Huffman([tuple_RLE for macrobloc in frame for tuple_RLE in macrobloc])
-        dict_huffman_encode = huff.dictToBin()
+        # taille des données utiles (en bits) d'un paquet complet du dict
+        taille_paquet_elementaire_dict = 8 * (bufsize - TAILLE_MAX_METADONNEES_DICT)
         
         # définition du nombre de paquets qui vont être générés à partir du dictionnaire
         # de huffman encodé
@@ -234,56 +836,52 @@ class BitstreamGenerator:
                 # dernier paquet
                 donnees_paquet = dict_huffman_encode[indice_initial : ]
             
-            bit_generator.construct_dict(donnees_paquet)
+            paquets.append(bit_generator.construct_dict(donnees_paquet, num_paquet_dict == nb_paquets_dict - 1))
         
         #--------------------------------------------------------------------#
         
         # body
         
-        taille_metadonnees_body = 66
-        taille_paquet_elementaire_body = bufsize - taille_metadonnees_body
+        # encodage de tous les macroblocs de la frame, en une seule passe
+        (octets_body, decalages_bits) = codeur.encode_tableaux(*tableaux_RLE)
         
-        total_num_of_macroblocks = len(frame)
+        # regroupement des macroblocs encodés dans des paquets de bufsize octets (au plus)
+        paquets_body = list(bit_generator.construct_body_paquets(octets_body, decalages_bits, bufsize))
         
-        for num_macrobloc in range(total_num_of_macroblocks):
-            macrobloc = frame[num_macrobloc]
-            macrobloc_encode = huff.encode_phrase(phrase=macrobloc)
-            
-            # création du bitstream associé au macrobloc
-            
-            # réinitialisation de l'index du paquet associé au macrobloc actuel
-            bit_generator.index_paquet_macrobloc = 0
-            
-            # définition du nombre de paquets qui vont être générés à partir du
-            # macrobloc encodé
-            len_macrobloc_encode = len(macrobloc_encode)
-            if len_macrobloc_encode % taille_paquet_elementaire_body == 0:
-                nb_paquets_macrobloc = len_macrobloc_encode // taille_paquet_elementaire_body
-            else:
-                nb_paquets_macrobloc = len_macrobloc_encode // taille_paquet_elementaire_body + 1
-            
-            # construction du bitstream associé au macrobloc, paquet par paquet
-            for num_paquet_macrobloc in range(nb_paquets_macrobloc):
-                indice_initial = num_paquet_macrobloc * taille_paquet_elementaire_body
-                
-                if num_paquet_macrobloc != nb_paquets_macrobloc - 1:
-                    indice_final = indice_initial + taille_paquet_elementaire_body
-                    donnees_paquet = macrobloc_encode[indice_initial : indice_final]
-                
-                else:
-                    # dernier paquet
-                    donnees_paquet = macrobloc_encode[indice_initial : ]
-                
-                bit_generator.construct_body(num_macrobloc, donnees_paquet)
+        # l'index (facultatif) est placé entre le dict et le body
+        if avec_index:
+            paquets.extend(BitstreamGenerator.construct_index_paquets(paquets_body, bufsize))
+        
+        paquets.extend(paquets_body)
         
         #--------------------------------------------------------------------#
         
         # construction du tail du bitstream (message de fin)
-        bit_generator.construct_end_message()
+        paquets.append(bit_generator.construct_end_message())
         
         #--------------------------------------------------------------------#
         
-        bitstream_total = bit_generator.bitstream
+        return(paquets)
+    
+    
+    @staticmethod
+    def encode_frame_RLE(frame_id, img_size, macroblock_size, frame, bufsize, sous_echantillonnage=chroma.CHROMA_444,
+                         qualite=quantification.QUALITE_SEUIL, type_matrice=quantification.MATRICE_JPEG,
+                         id_table=tables_huffman.TABLE_DYNAMIQUE, symbolisation=categories.SYMBOLISATION_RUN_LEVEL,
+                         id_codeur=codage_entropique.CODEUR_HUFFMAN, avec_index=False):
+        """
+        Permet de convertir une frame RLE en un bitstream. Il s'agit d'une
+        fonction-outil, qui met simplement bout à bout les paquets générés par
+        genere_paquets_frame_RLE (mêmes arguments).
+        
+        Returns:
+            bitstream_total: bitstream (bytes) associé à la frame RLE de référence 
+        """
+        paquets = BitstreamGenerator.genere_paquets_frame_RLE(frame_id, img_size, macroblock_size, frame, bufsize,
+                                                              sous_echantillonnage, qualite, type_matrice, id_table, symbolisation,
+                                                              id_codeur, avec_index)
+        
+        bitstream_total = b"".join(paquets)
         
         return(bitstream_total)
     
@@ -292,110 +890,199 @@ class BitstreamGenerator:
     def decode_bitstream_RLE(bitstream):
         """
         Permet de décoder un bitstream associé une frame RLE avec seulement 
-        les méthodes statiques de la classe Huffman. Fonction essentielle au début
+        des méthodes statiques. Fonction essentielle au début
         de la phase de décodage.
         Args:
-            bitstream (string): bitstream complet associé à une frame, généré grâce 
-                                à la classe BitstreamGenerator
+            bitstream (bytes): bitstream complet associé à une frame, généré grâce 
+                               à la classe BitstreamGenerator
         Returns:
             frame_RLE_decodee: frame RLE (liste de listes de tuples d'entiers) 
                                associée au bitstream mis en entrée
         """
         
-        #--------------------------------------------------------------------#
         
-        # récupération des données utiles du dict
+        #--------------------------------------------------------------------#
         
-        donnees_utiles_dict = ""
+        # lecture du header, puis du dict (on décode le dictionnaire de huffman
+        # associé à la frame, ou bien on charge la table statique indiquée dans
+        # le header, cf. decodeur_entropique)
+        (infos_header, decodeur, _, debut_body) = BitstreamGenerator.lit_debut_frame(bitstream)
+        (_, img_size, macroblock_size, sous_echantillonnage, _, _, _, _, _) = infos_header
         
-        # détermination de la taille du paquet utile dans la partie actuelle
-        # (chaque partie contient exactement un paquet utile)
-        indice_debut_partie = 48 # 48 = taille du header
-        type_msg = int(bitstream[indice_debut_partie + 16 : indice_debut_partie + 18], 2)
-        indice_debut_taille = indice_debut_partie + 34
-        indice_fin_taille = indice_debut_taille + 16
-        taille_donnees_paquet = int(bitstream[indice_debut_taille : indice_fin_taille], 2)
+        #--------------------------------------------------------------------#
         
-        # récupération des données utiles du dictionnaire dans la partie actuelle
-        # (ie la 1ère partie)
-        donnees_utiles_dict += bitstream[indice_debut_partie + 50 : indice_debut_partie + 50 + taille_donnees_paquet]
+        # récupération et décodage des données utiles du body
         
-        while type_msg == DICT_MSG:
-            indice_debut_partie += 50 + taille_donnees_paquet
-            
-            type_msg = int(bitstream[indice_debut_partie + 16 : indice_debut_partie + 18], 2)
-            
-            if type_msg == DICT_MSG:
-                # détermination de la taille du paquet utile dans la partie actuelle
-                indice_debut_taille = indice_debut_partie + 34
-                indice_fin_taille = indice_debut_taille + 16
-                taille_donnees_paquet = int(bitstream[indice_debut_taille : indice_fin_taille], 2)
-                
-                # récupération des données utiles du dictionnaire dans la partie actuelle
-                donnees_utiles_dict += bitstream[indice_debut_partie + 50 : indice_debut_partie + 50 + taille_donnees_paquet]
-            
-            # Si type_msg != DICT_MSG, c'est nécessairement parce que l'on a 
-            # type_msg = BODY_MSG = 2, et donc que l'on est en train de considérer 
-            # les données du body, et non celles du dict
-            # En outre, si cette condition n'est pas vérifiée, cela signifie que
-            # indice_debut_partie désigne l'indice du 1er élément du body 
+        # on détermine d'abord combien il y a de macroblocs en tout (cela dépend
+        # du mode de sous-échantillonnage de la chrominance)
+        total_num_of_macroblocks = chroma.nb_macroblocs_total(img_size, macroblock_size, sous_echantillonnage)
         
-        #--------------------------------------------------------------------#
+        # les paquets sont lus via des vues sur le bitstream (sans copie), à
+        # partir de leurs seules métadonnées
+        paquets = BitstreamGenerator.parcourt_paquets(bitstream, debut_body)
         
-        # on décode le dictionnaire de huffman associé à la frame
-        dict_huffman_decode = Huffman.binToDict(donnees_utiles_dict)
+        # les données de chaque macrobloc sont directement passées au décodeur
+        frame_RLE_decodee = [decodeur.decode_octets(octets, nb_bits)
+                             for (_, octets, nb_bits) in BitstreamGenerator.parcourt_macroblocs(paquets, total_num_of_macroblocks)]
         
-        #--------------------------------------------------------------------#
+        return(frame_RLE_decodee)
+
+
+    @staticmethod
+    def lit_debut_frame(bitstream):
+        """
+        Lit le header d'une frame, puis les paquets de son dict et de son index
+        (s'il y en a un), qui le suivent directement.
+        Args:
+            bitstream (bytes): bitstream commençant par le header d'une frame,
+                               complet ou bien s'arrêtant à la fin de l'index
+        Returns:
+            (infos_header, decodeur, entrees_index, debut_body): infos du header
+            (cf. decode_header), décodeur entropique de la frame, entrées de
+            l'index du body (liste des tuples (taille_paquet, ecart_macrobloc),
+            cf. construct_index_paquets), ou None si la frame n'a pas d'index,
+            et indice du 1er octet du body
+        """
+        infos_header = BitstreamGenerator.decode_header(bitstream)
+        (_, _, _, _, _, _, id_table, symbolisation, id_codeur) = infos_header
         
-        # on récupère le body associé à la frame (sans avoir trié les parties utiles)
-        body_bitstream = bitstream[indice_debut_partie : -18] # 18 = taille du tail
-        len_body_bitstream = len(body_bitstream)
+        vue = memoryview(bitstream)
+        segments_dict = []
+        segments_index = []
+        debut = TAILLE_HEADER
         
-        #--------------------------------------------------------------------#
+        while debut < len(vue):
+            (type_msg, _, segments, fin) = BitstreamGenerator.lit_paquet(vue, debut)
+            
+            if type_msg == DICT_MSG:
+                segments_dict.append((vue[segments[0][0] : fin], segments[0][1]))
+            elif type_msg == INDEX_MSG:
+                segments_index.append(vue[segments[0][0] : fin])
+            else:
+                break
+            
+            debut = fin
         
-        # récupération des données utiles du body
+        donnees_utiles_dict = "".join(chaine_de_bits(donnees, 0, taille_donnees) for (donnees, taille_donnees) in segments_dict)
+        decodeur = BitstreamGenerator.decodeur_entropique(id_codeur, id_table, symbolisation, donnees_utiles_dict)
         
-        frame_RLE_decodee = []
+        entrees_index = None
         
-        # on détermine d'abord combien il y a de macroblocs en tout
-        header = bitstream[ : 48]
-        img_width = int(header[18 : 30], 2)
-        img_height = int(header[30 : 42], 2)
-        macroblock_size = int(header[42 : ], 2)
-        total_num_of_macroblocks = (img_width * img_height) // macroblock_size**2
+        if len(segments_index) > 0:
+            # les données utiles de l'index sont des octets entiers
+            octets_index = b"".join(segments_index)
+            entrees_index = []
+            position = 0
+            
+            while position < len(octets_index):
+                (taille_paquet, position) = lit_varint(octets_index, position)
+                (ecart_macrobloc, position) = lit_varint(octets_index, position)
+                entrees_index.append((taille_paquet, ecart_macrobloc))
         
-        indice_debut_partie = 0 # ré-initialisation de indice_debut_partie
+        return(infos_header, decodeur, entrees_index, debut)
+    
+    
+    @staticmethod
+    def table_paquets_body(bitstream, debut_body, entrees_index=None):
+        """
+        Renvoie la position et le numéro du 1er macrobloc de chaque paquet du
+        body d'une frame, à partir de son index (cf. lit_debut_frame), ou bien,
+        si la frame n'en a pas, en parcourant les métadonnées de ses paquets.
+        Returns:
+            (positions, nums_macroblocs): indices du 1er octet de chaque paquet
+            du body, suivis de celui du tail, et numéros absolus des 1ers
+            macroblocs des paquets
+        """
+        positions = [debut_body]
+        nums_macroblocs = []
         
-        for num_macrobloc in range(total_num_of_macroblocks):
-            donnees_utiles_macrobloc = ""
+        if entrees_index is not None:
+            num_macrobloc = 0
             
-            num_macrobloc_actuel = int(body_bitstream[indice_debut_partie + 18 : indice_debut_partie + 34], 2)
+            for (taille_paquet, ecart_macrobloc) in entrees_index:
+                num_macrobloc += ecart_macrobloc
+                nums_macroblocs.append(num_macrobloc)
+                positions.append(positions[-1] + taille_paquet)
             
-            while (num_macrobloc_actuel == num_macrobloc) and (indice_debut_partie < len_body_bitstream):
-                # détermination de la taille du paquet utile dans la partie actuelle
-                indice_debut_taille = indice_debut_partie + 50
-                indice_fin_taille = indice_debut_taille + 16
-                taille_donnees_paquet = int(body_bitstream[indice_debut_taille : indice_fin_taille], 2)
-                
-                # récupération des données utiles du macrobloc dans la partie actuelle
-                indice_fin_donnees = indice_fin_taille + taille_donnees_paquet
-                donnees_paquet = body_bitstream[indice_fin_taille : indice_fin_donnees]
-                
-                donnees_utiles_macrobloc += donnees_paquet
-                
-                # on met à jour indice_debut_partie pour pouvoir ré-itérer ce processus
-                indice_debut_partie += 66 + taille_donnees_paquet
-                
-                if indice_debut_partie < len_body_bitstream:
-                    num_macrobloc_actuel = int(body_bitstream[indice_debut_partie + 18 : indice_debut_partie + 34], 2)
+            return(positions, nums_macroblocs)
+        
+        vue = memoryview(bitstream)
+        num_dernier_macrobloc = 0
+        
+        while True:
+            (type_msg, ecart_macrobloc, segments, fin) = BitstreamGenerator.lit_paquet(vue, positions[-1])
             
-            # on décode les données utiles du body
-            macrobloc_decode = Huffman.decode_frame_RLE(donnees_utiles_macrobloc, dict_huffman_decode)
+            if type_msg != BODY_MSG:
+                return(positions, nums_macroblocs)
             
-            # on ajoute le macrobloc décodé à la frame
-            frame_RLE_decodee.append(macrobloc_decode)
+            nums_macroblocs.append(num_dernier_macrobloc + ecart_macrobloc)
+            num_dernier_macrobloc = nums_macroblocs[-1] + len(segments) - 1
+            positions.append(fin)
+    
+    
+    @staticmethod
+    def paquets_des_macroblocs(bitstream, positions, nums_macroblocs, num_debut, num_fin):
+        """
+        Détermine les paquets du body contenant les données des macroblocs
+        n°num_debut (inclus) à n°num_fin (exclu), cf. table_paquets_body.
+        Returns:
+            (p, q): ce sont les paquets n°p (inclus) à n°q (exclu) du body
+        """
+        p = bisect.bisect_right(nums_macroblocs, num_debut) - 1
         
-        return(frame_RLE_decodee)
+        # le macrobloc n°num_debut peut commencer dans un paquet précédent,
+        # s'il est coupé entre plusieurs paquets
+        while p > 0 and nums_macroblocs[p] == num_debut and not BitstreamGenerator.est_dernier_paquet(bitstream, positions[p - 1]):
+            p -= 1
+        
+        q = bisect.bisect_right(nums_macroblocs, num_fin - 1)
+        
+        return(p, q)
+    
+    
+    @staticmethod
+    def decode_macroblocs_morceau(decodeur, morceau, num_premier_macrobloc, num_debut, num_fin):
+        """
+        Décode les macroblocs n°num_debut (inclus) à n°num_fin (exclu) d'une
+        frame à partir d'un morceau de son body (cf. paquets_des_macroblocs).
+        Le décodeur ne doit pas être adaptatif (cf. codage_entropique.py).
+        Args:
+            decodeur: décodeur entropique de la frame
+            morceau: paquets consécutifs du body contenant ces macroblocs
+            num_premier_macrobloc: numéro du 1er macrobloc du 1er paquet du morceau
+        Returns:
+            macroblocs_RLE: liste des paires (run, level) de chaque macrobloc
+        """
+        # le numéro du 1er macrobloc d'un paquet est écrit sous forme d'écart
+        # avec le dernier macrobloc du paquet précédent (cf. construct_body)
+        ecart_macrobloc = BitstreamGenerator.lit_metadonnees(morceau)[1]
+        paquets = BitstreamGenerator.parcourt_paquets(morceau, 0, len(morceau), num_premier_macrobloc - ecart_macrobloc)
+        
+        return([decodeur.decode_octets(octets, nb_bits)
+                for (_, octets, nb_bits) in BitstreamGenerator.parcourt_macroblocs(paquets, num_fin, num_debut)])
+    
+    
+    @staticmethod
+    def decode_macroblocs_RLE(bitstream, num_debut, num_fin):
+        """
+        Décode directement les macroblocs n°num_debut (inclus) à n°num_fin
+        (exclu) d'une frame, sans décoder ceux qui les précèdent (ce qui est
+        impossible avec un codeur entropique adaptatif). L'accès aux macroblocs
+        est direct si la frame a un index (cf. construct_index_paquets).
+        Returns:
+            macroblocs_RLE: liste des paires (run, level) de chaque macrobloc
+        """
+        (_, decodeur, entrees_index, debut_body) = BitstreamGenerator.lit_debut_frame(bitstream)
+        
+        if decodeur.adaptatif:
+            raise ValueError("Les macroblocs d'une frame encodée par un codeur adaptatif ne peuvent être décodés que dans l'ordre")
+        
+        (positions, nums_macroblocs) = BitstreamGenerator.table_paquets_body(bitstream, debut_body, entrees_index)
+        (p, q) = BitstreamGenerator.paquets_des_macroblocs(bitstream, positions, nums_macroblocs, num_debut, num_fin)
+        
+        morceau = memoryview(bitstream)[positions[p] : positions[q]]
+        
+        return(BitstreamGenerator.decode_macroblocs_morceau(decodeur, morceau, nums_macroblocs[p], num_debut, num_fin))
 
 
 ###############################################################################
@@ -406,37 +1093,37 @@ class ThreadWriteInBitstreamBuffer(threading.Thread):
     Thread qui va permettre d'append le bitstream à la fin d'un buffer, paquet
     par paquet.
     """
-    def __init__(self, frame_id, img_size, macroblock_size, frame, bufsize):
+    def __init__(self, frame_id, img_size, macroblock_size, frame, bufsize, sous_echantillonnage=chroma.CHROMA_444,
+                 qualite=quantification.QUALITE_SEUIL, type_matrice=quantification.MATRICE_JPEG,
+                 id_table=tables_huffman.TABLE_DYNAMIQUE, symbolisation=categories.SYMBOLISATION_RUN_LEVEL,
+                 id_codeur=codage_entropique.CODEUR_HUFFMAN):
         threading.Thread.__init__(self)
         
-        self.bit_generator = BitstreamGenerator(frame_id, img_size, macroblock_size)
+        self.bit_generator = BitstreamGenerator(frame_id, img_size, macroblock_size, sous_echantillonnage, qualite, type_matrice,
+                                                symbolisation=symbolisation, id_codeur=id_codeur)
         
         # liste de listes de tuples
         # chacune des sous-listes (qui sont ici des listes de tuples) correspond 
         # en fait à la représentation RLE d'un macrobloc
+        # (la frame peut aussi être donnée sous forme de tableaux, cf. rle.py)
         self.frame = frame
+        self.tableaux_RLE = rle.en_tableaux(self.frame)
         
         # c'est aussi égal à (img_size[0] * img_size[1]) // macroblock_size**2
-        self.total_num_of_macroblocks = len(self.frame)
+        self.total_num_of_macroblocks = len(self.tableaux_RLE[2]) - 1
         
         self.bufsize = bufsize
         
         # concrètement, les métadonnées des paquets envoyés pour former le bitstream
-        # du dict font 50 "bits" (50 = 16 + 2 + 16 + 16)
-        self.taille_metadonnees_dict = 50
+        # du dict font au plus 4 octets (cf. TAILLE_MAX_METADONNEES_DICT)
+        self.taille_metadonnees_dict = TAILLE_MAX_METADONNEES_DICT
         
-        # taille d'un paquet élémentaire du dict avant de l'adjoindre au paquet
-        # du bitstream
-        self.taille_paquet_elementaire_dict = self.bufsize - self.taille_metadonnees_dict
+        # taille (en bits) d'un paquet élémentaire du dict avant de l'adjoindre
+        # au paquet du bitstream
+        self.taille_paquet_elementaire_dict = 8 * (self.bufsize - self.taille_metadonnees_dict)
         
-        # les métadonnées des paquets envoyés pour former le bitstream du body
-        # ont une taille de 66 "bits" (66 = 16 + 2 + 16 + 16 + 16)
-        self.taille_metadonnees_body = 66
-        
-        # taille d'un paquet élémentaire du dict avant de l'adjoindre au paquet
-        # du bitstream (de taille 66 + taille_paquet_elementaire_body, qui vaut 
-        # bufsize par définition)
-        self.taille_paquet_elementaire_body = self.bufsize - self.taille_metadonnees_body
+        # (les paquets du body, eux, regroupent plusieurs macroblocs, cf.
+        # BitstreamGenerator.construct_body_paquets)
         
         # initialisation du nombre de paquets qui seront envoyés du client au 
         # serveur, et qui sont associés au dict (resp. au body)
@@ -445,18 +1132,20 @@ class ThreadWriteInBitstreamBuffer(threading.Thread):
         
         # génération puis encodage du dictionnaire de huffman associé à la 
         # frame **entière**
+        # (ou choix de la table statique id_table, cf. tables_huffman.py, ou
+        # bien du codeur arithmétique, cf. codage_entropique.py)
         t_debut_generation_dico_huffman = time()
-        self.huff = Huffman([tuple_RLE for macrobloc in self.frame for tuple_RLE in macrobloc])
+        (self.codeur, self.dict_huffman_encode, self.bit_generator.id_codeur,
+         self.bit_generator.id_table) = BitstreamGenerator.codeur_entropique(self.tableaux_RLE, id_codeur, id_table, symbolisation)
         t_fin_generation_dico_huffman = time()
         self.duree_generation_dico_huffman = t_fin_generation_dico_huffman - t_debut_generation_dico_huffman
-        self.dict_huffman_encode = self.huff.dictToBin()
         
         # définit la taille des données compressées **utiles** du body
         self.taille_donnees_compressees_huffman = 0
         
         # buffer qui se remplit si jamais verrou_buffer_bitstream est déjà acquis
         # par le thread principal
-        self.buffer_interne = ""
+        self.buffer_interne = bytearray()
     
     
     def add_header_to_buffer(self):
@@ -505,7 +1194,7 @@ class ThreadWriteInBitstreamBuffer(threading.Thread):
                 # dernier paquet
                 donnees_paquet = self.dict_huffman_encode[indice_initial : ]
             
-            nouv_paquet_dict = self.bit_generator.construct_dict(donnees_paquet)
+            nouv_paquet_dict = self.bit_generator.construct_dict(donnees_paquet, num_paquet_dict == self.nb_paquets_dict - 1)
             
             #-----------------------------------------------------------------#
             
@@ -516,73 +1205,40 @@ class ThreadWriteInBitstreamBuffer(threading.Thread):
                 verrou_bitstream_buffer.release()
                 
                 # ré-initialisation du buffer interne
-                self.buffer_interne = ""
+                self.buffer_interne = bytearray()
             
             else:
                 self.buffer_interne += nouv_paquet_dict
     
     
-    def add_macrobloc_to_buffer(self, num_macrobloc, macrobloc_encode):
+    def add_body_to_buffer(self):
         """
-        Permet d'ajouter le bitstream associé à un macrobloc encodé à la fin du 
-        buffer.
+        Permet d'ajouter le bitstream associé au body à la fin du buffer.
         """
         global bitstream_buffer
         global verrou_bitstream_buffer
         
-        # réinitialisation de l'index du paquet associé au macrobloc actuel
-        self.bit_generator.index_paquet_macrobloc = 0
-        
-        # définition du nombre de paquets qui vont être générés à partir du
-        # macrobloc encodé
-        len_macrobloc_encode = len(macrobloc_encode)
-        if len_macrobloc_encode % self.taille_paquet_elementaire_body == 0:
-            nb_paquets_macrobloc = len_macrobloc_encode // self.taille_paquet_elementaire_body
-        else:
-            nb_paquets_macrobloc = len_macrobloc_encode // self.taille_paquet_elementaire_body + 1
+        self.nb_paquets_body = 0
         
-        self.nb_paquets_body += nb_paquets_macrobloc
+        (octets_body, decalages_bits) = self.codeur.encode_tableaux(*self.tableaux_RLE)
+        self.taille_donnees_compressees_huffman += int(decalages_bits[-1])
         
-        # construction du bitstream associé au macrobloc, paquet par paquet
-        for num_paquet_macrobloc in range(nb_paquets_macrobloc):
-            indice_initial = num_paquet_macrobloc * self.taille_paquet_elementaire_body
-            
-            if num_paquet_macrobloc != nb_paquets_macrobloc - 1:
-                indice_final = indice_initial + self.taille_paquet_elementaire_body
-                donnees_paquet = macrobloc_encode[indice_initial : indice_final]
-            
-            else:
-                # dernier paquet
-                donnees_paquet = macrobloc_encode[indice_initial : ]
-            
-            nouv_paquet_macrobloc = self.bit_generator.construct_body(num_macrobloc, donnees_paquet)
-            
-            #-----------------------------------------------------------------#
+        # construction du body, paquet par paquet (chaque paquet regroupe
+        # plusieurs macroblocs)
+        for nouv_paquet_body in self.bit_generator.construct_body_paquets(octets_body, decalages_bits, self.bufsize):
+            self.nb_paquets_body += 1
             
             if not(verrou_bitstream_buffer.locked()):
                 # ajout des données à la fin du buffer
                 verrou_bitstream_buffer.acquire() # opération bloquante par défaut
-                bitstream_buffer += self.buffer_interne + nouv_paquet_macrobloc
+                bitstream_buffer += self.buffer_interne + nouv_paquet_body
                 verrou_bitstream_buffer.release()
                 
                 # ré-initialisation du buffer interne
-                self.buffer_interne = ""
+                self.buffer_interne = bytearray()
             
             else:
-                self.buffer_interne += nouv_paquet_macrobloc
-    
-    
-    def add_body_to_buffer(self):
-        """
-        Permet d'ajouter le bitstream associé au body à la fin du buffer.
-        """
-        self.nb_paquets_body = 0
-        
-        for num_macrobloc in range(self.total_num_of_macroblocks):
-            macrobloc = self.frame[num_macrobloc]
-            macrobloc_encode = self.huff.encode_phrase(phrase=macrobloc)
-            self.taille_donnees_compressees_huffman += len(macrobloc_encode)
-            self.add_macrobloc_to_buffer(num_macrobloc, macrobloc_encode)
+                self.buffer_interne += nouv_paquet_body
     
     
     def add_tail_to_buffer(self):
@@ -604,7 +1260,7 @@ class ThreadWriteInBitstreamBuffer(threading.Thread):
         
         # ré-initialisation du buffer interne (pas obligatoire, car on ne 
         # l'utilise plus)
-        self.buffer_interne = ""
+        self.buffer_interne = bytearray()
     
     
     def run(self):
@@ -630,26 +1286,23 @@ class BitstreamSender:
     Classe permettant de gérer l'envoi d'un bitstream via un réseau, d'un client
     à un serveur.
     """
-    def __init__(self, frame_id, img_size, macroblock_size, frame, client, bufsize):
+    def __init__(self, frame_id, img_size, macroblock_size, frame, client, bufsize, sous_echantillonnage=chroma.CHROMA_444,
+                 qualite=quantification.QUALITE_SEUIL, type_matrice=quantification.MATRICE_JPEG,
+                 id_table=tables_huffman.TABLE_DYNAMIQUE, symbolisation=categories.SYMBOLISATION_RUN_LEVEL,
+                 id_codeur=codage_entropique.CODEUR_HUFFMAN):
         # comme le client est défini par rapport à un serveur prédéfini, on n'a
         # pas besoin de créer une variable d'instance 'server'
         self.client = client
         
-        # concrètement, les métadonnées des paquets envoyés pour former le bitstream
-        # du dict font 50 "bits" (50 = 16 + 2 + 16 + 16)
-        self.taille_metadonnees_dict = 50
-        
-        # les métadonnées des paquets envoyés pour former le bitstream du body
-        # ont une taille de 66 "bits" (66 = 16 + 2 + 16 + 16 + 16)
-        self.taille_metadonnees_body = 66
-        
         global bitstream_buffer
-        bitstream_buffer = ""
+        bitstream_buffer = bytearray()
         
         global verrou_bitstream_buffer
         verrou_bitstream_buffer = threading.Lock()
         
-        self.th_WriteInBitstreamBuffer = ThreadWriteInBitstreamBuffer(frame_id, img_size, macroblock_size, frame, bufsize)
+        self.th_WriteInBitstreamBuffer = ThreadWriteInBitstreamBuffer(frame_id, img_size, macroblock_size, frame, bufsize,
+                                                                       sous_echantillonnage, qualite, type_matrice, id_table, symbolisation,
+                                                                       id_codeur)
     
     
     @staticmethod
@@ -713,35 +1366,17 @@ class BitstreamSender:
         while True:
             verrou_bitstream_buffer.acquire() # opération bloquante par défaut
             
-            str_type_msg = bitstream_buffer[16 : 18]
-            
-            if str_type_msg != "":
-                type_msg = int(str_type_msg, 2)
-                
-                if type_msg == HEADER_MSG:
-                    # taille constante
-                    data_size = 48
-                
-                elif type_msg == DICT_MSG:
-                    # extraction de la taille du paquet associé au dictionnaire de 
-                    # huffman encodé
-                    data_size = self.taille_metadonnees_dict + int(bitstream_buffer[34 : 50], 2)
-                
-                elif type_msg == BODY_MSG:
-                    # extraction de la taille du paquet associé au body (ie aux
-                    # différents macroblocs)
-                    data_size = self.taille_metadonnees_body + int(bitstream_buffer[50 : 66], 2)
-                
-                # ici, on a nécessairement type_msg = TAIL_MSG
-                else:
-                    # taille constante
-                    data_size = 18
+            if len(bitstream_buffer) != 0:
+                # le buffer ne contient que des paquets complets, dont on lit le
+                # type et la taille dans les métadonnées
+                type_msg = BitstreamGenerator.type_paquet(bitstream_buffer)
+                data_size = BitstreamGenerator.taille_paquet(bitstream_buffer)
                 
                 # extraction des données du buffer
-                data = bitstream_buffer[ : data_size]
+                data = bytes(bitstream_buffer[ : data_size])
                 
                 # suppression des données du buffer
-                bitstream_buffer = bitstream_buffer[data_size : ]
+                del bitstream_buffer[ : data_size]
                 
                 verrou_bitstream_buffer.release()
                 
@@ -804,20 +1439,18 @@ if __name__ == "__main__":
     
     # définition du bufsize (très important)
     
-    # On DOIT avoir bufsize >= 67 (pour que l'on puisse envoyer en 1 seule fois
+    # On DOIT avoir bufsize >= 10 (pour que l'on puisse envoyer en 1 seule fois
     # le header et la queue du bitstream, et pour que l'on puisse envoyer correctement 
-    # chacun des paquets constituant dict et body
+    # chacun des paquets constituant dict et body)
     
-    # En effet, la taille maximale des "métadonnées" associées à chacun des 
-    # paquets élémentaires de dict et de body est de 66 bits (enfin, pour être 
-    # précis, ce sont des chaînes de caractère de taille <= 66 qui sont uniquement 
-    # composées de '0' et de '1', mais chacun de ces '0' et '1' est codé sur 8 
-    # bits, donc sur un octet, donc en réalité ces métadonnées ont une taille 
-    # <= 66 octets, et non <= 66 bits)
+    # En effet, la taille maximale des métadonnées d'un paquet du body ne
+    # contenant qu'un seul segment est de 9 octets (le bitstream est binaire :
+    # chaque octet transmis contient 8 bits du bitstream)
     
-    # Rappel :
-    # taille métadonnées dict = 50 "bits"
-    # taille métadonnées body = 66 "bits"
+    # Rappel (les métadonnées sont des varints, cf. bit_io.encode_varint) :
+    # taille métadonnées dict <= TAILLE_MAX_METADONNEES_DICT = 4 octets
+    # taille métadonnées body (1 segment) <= TAILLE_MAX_METADONNEES_BODY = 9 octets
+    # (1er octet + écart + nombre de segments + taille du segment)
     
     # Le bufsize est souvent une puissance de 2, et désigne le nombre maximal
     # d'octets qui pourront être reçus (resp. être envoyés) par le serveur (resp. 
@@ -827,7 +1460,7 @@ if __name__ == "__main__":
     # intérêt à maximiser le bufsize
     
     puiss_2_random = randint(10, 12)
-    bufsize = 2 ** puiss_2_random # /!\ bufsize >= 67 /!\
+    bufsize = 2 ** puiss_2_random # /!\ bufsize >= 10 /!\
     
     #------------------------------------------------------------------------#
     
@@ -842,7 +1475,7 @@ if __name__ == "__main__":
     cli = Client(HOST, PORT, bufsize, affiche_messages)
     
     global received_data
-    received_data = "" # bitstream reçu par le serveur, construit itérativement
+    received_data = bytearray() # bitstream reçu par le serveur, construit itérativement
     
     def on_received_data(data):
         """
@@ -924,17 +1557,17 @@ if __name__ == "__main__":
     pourcentage_dict_bitstream = 100 * len_dict_bitstream / len_received_data
     pourcentage_body_bitstream = 100 * len_body_bitstream / len_received_data
     
-    # taille des différentes composantes du bitstream (en octets / "bits" / nombre de '0' et de '1')
-    log.debug(f"Taille du bitstream total : {len_received_data} \"bits\"")
-    log.debug("Taille du header : 48 (taille constante)")
-    log.debug(f"Taille de dict_bitstream : {len_dict_bitstream} ({pourcentage_dict_bitstream:.2f}%)")
-    log.debug(f"Taille de body_bitstream : {len_body_bitstream} ({pourcentage_body_bitstream:.2f}%)")
-    log.debug("Taille du tail : 18 (taille constante)\n")
+    # taille des différentes composantes du bitstream (en octets)
+    log.debug(f"Taille du bitstream total : {len_received_data} octets")
+    log.debug(f"Taille du header : {TAILLE_HEADER} octets (taille constante)")
+    log.debug(f"Taille de dict_bitstream : {len_dict_bitstream} octets ({pourcentage_dict_bitstream:.2f}%)")
+    log.debug(f"Taille de body_bitstream : {len_body_bitstream} octets ({pourcentage_body_bitstream:.2f}%)")
+    log.debug(f"Taille du tail : {TAILLE_TAIL} octets (taille constante)\n")
     
     # taux de compression (il n'a pas de réel sens physique ici, mais c'est toujours
     # intéressant de le calculer)
     taille_originale_en_bits = 8 * 3 * img_width * img_height
-    taux_compression = 100 * len(received_data) / taille_originale_en_bits
+    taux_compression = 100 * 8 * len(received_data) / taille_originale_en_bits
     log.debug(f"Taux de compression : {taux_compression:.2f}%\n")
     
     #------------------------------------------------------------------------#
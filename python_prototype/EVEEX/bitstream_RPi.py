@@ -5,405 +5,23 @@ Structure du bitstream adaptée à la communication RPi --> PC. Les changements
 se situent au niveau de la structure de la classe BitstreamSender : le buffer
 contenant les données des frames a été entièrement supprimé, afin de complètement
 délier le client et le serveur.
+
+La classe BitstreamGenerator (format du bitstream) est quant à elle commune
+avec bitstream.py, d'où elle est importée.
 """
 
 from random import randint
 from time import time, sleep
 
 from network_transmission import Server, Client
-from huffman import Huffman
 from logger import Logger, LogLevel
-
-###############################################################################
-
-# définition des variables globales (ici : les différents types de messages à encoder)
-
-global HEADER_MSG
-HEADER_MSG = 0
-
-global DICT_MSG
-DICT_MSG = 1
-
-global BODY_MSG
-BODY_MSG = 2
-
-global TAIL_MSG
-TAIL_MSG = 3
-
-###############################################################################
-
-
-class BitstreamGenerator:
-    """
-    Classe permettant de générer un bitstream à partir des infos d'une frame 
-    en entrée (après RLE). Chaque instance de cette classe servira à créer le 
-    bitstream d'une seule image (pour le moment).
-    
-    Concrètement, le bitstream d'une frame est constitué de 4 éléments :
-        - header: en-tête
-        - dict: relatif au dictionnaire de Huffman de la frame encodée (construit itérativement)
-        - body: relatif à la frame encodée (construit itérativement)
-        - tail: fin du bitstream
-    """
-    
-    def __init__(self, frame_id, img_size, macroblock_size):
-        self.frame_id = frame_id
-        
-        # img_size = (w, h), où w (= width = largeur) et h (= height = hauteur) 
-        # sont **obligatoirement** des multiples de macroblock_size
-        # En particulier, cela implique que w*h est un multiple de macroblock_size**2
-        self.img_size = img_size
-        self.img_width, self.img_height = self.img_size
-        
-        self.macroblock_size = macroblock_size
-        
-        # initialisation des index des paquets envoyés (pour le dict et le body)
-        self.index_paquet_dict = 0
-        self.index_paquet_macrobloc = 0
-        
-        self.len_dict_bitstream = 0
-        self.len_body_bitstream = 0
-        
-        self.bitstream = ""
-    
-    
-    @staticmethod
-    def int2bin(entier, nb_bits):
-        """
-        Fonction auxiliaire.
-        Retourne une chaîne de caractères correspondant à la représentation 
-        binaire d'un entier positif ou nul (entier), codé sur un nombre de bits
-        prédéfini (nb_bits). 
-        On suppose ici que entier <= 2**nb_bits - 1 (ie on suppose que cet entier
-        est codable sur le nombre de bits défini).
-        """
-        if entier == 0:
-            return("0".zfill(nb_bits))
-        
-        chaine_binaire = ""
-        while entier != 0:
-            entier, reste = divmod(entier, 2)
-            chaine_binaire = "01"[reste] + chaine_binaire
-        
-        return(chaine_binaire.zfill(nb_bits))
-    
-    
-    def construct_header(self):
-        """
-        Construit le bitstream d'en-tête d'une frame à partir des informations 
-        entrées lors de l'instanciation de la classe.
-        Returns:
-            bitstream (string): le bitstream représentant le header de la frame
-        """
-        
-        # header = frame_id + type_msg + largeur de l'image + hauteur de l'image
-        # + taille des macroblocs
-        header = self.int2bin(self.frame_id, 16) + self.int2bin(HEADER_MSG, 2) + \
-                 self.int2bin(self.img_width, 12) + self.int2bin(self.img_height, 12) + \
-                 self.int2bin(self.macroblock_size, 6)
-        
-        self.bitstream += header
-        
-        return(header)
-    
-    
-    def construct_dict(self, dict_huffman_packet):
-        """
-        Construit le bitstream représentant le dictionnaire de huffman associé
-        à la frame (après RLE), converti en binaire.
-        
-        Remarque importante : à part pour le tout dernier paquet provenant des données
-        utiles du dictionnaire de huffman encodé, on aura toujours la relation 
-        suivante : len(dict_huffman_packet) = bufsize - 50 = taille_paquet_elementaire_dict,
-        et donc len(nouv_contenu_dict) = taille_paquet_elementaire_dict + 50 = bufsize.
-        Pour le tout dernier paquet, on aura juste len(dict_huffman_packet) <= bufsize - 50
-        et len(nouv_contenu_dict) <= bufsize.
-        La raison pour laquelle on inclut quand même la taille des paquets est précisément
-        ce dernier paquet, qui n'est pas nécessairement de la même taille que tous 
-        les autres.
-        
-        --> Cette remarque est aussi valable pour la méthode construct_body (en 
-            remplaçant '50' par '66').
-        
-        Args:
-            dict_huffman_packet: paquet d'un dictionnaire de huffman encodé en binaire
-        Returns:
-            bitstream (string): le bitstream représentant une partie du dictionnaire 
-                                de huffman
-        """
-        # nouv_contenu_dict = frame_id + type_msg + index + taille paquet + paquet
-        # --> pas besoin du numéro du macrobloc, car dictionnaire global
-        nouv_contenu_dict = self.int2bin(self.frame_id, 16) + self.int2bin(DICT_MSG, 2) + \
-                            self.int2bin(self.index_paquet_dict, 16) + \
-                            self.int2bin(len(dict_huffman_packet), 16) + dict_huffman_packet
-        
-        self.bitstream += nouv_contenu_dict
-        self.len_dict_bitstream += len(nouv_contenu_dict)
-        self.index_paquet_dict += 1
-        
-        return(nouv_contenu_dict)
-    
-    
-    def construct_body(self, num_macrobloc, huffman_packet):
-        """
-        Construit le bitstream représentant le contenu d'un paquet encodé 
-        par huffman.
-        Args:
-            num_macrobloc: numéro du macrobloc dont est issu le paquet encodé
-            huffman_packet: contenu du paquet encodé par huffman
-        Returns:
-            bitstream (string): le bitstream représentant le paquet
-        """
-        # nouveau contenu = frame_id + type_msg + numéro macrobloc + index + 
-        # taille paquet + paquet
-        nouv_contenu_body = self.int2bin(self.frame_id, 16) + self.int2bin(BODY_MSG, 2) + \
-                            self.int2bin(num_macrobloc, 16) + self.int2bin(self.index_paquet_macrobloc, 16) + \
-                            self.int2bin(len(huffman_packet), 16) + huffman_packet
-        
-        self.bitstream += nouv_contenu_body
-        self.len_body_bitstream += len(nouv_contenu_body)
-        self.index_paquet_macrobloc += 1
-        
-        return(nouv_contenu_body)
-    
-    
-    def construct_end_message(self):
-        """
-        Construit le bitstream représentant le message de fin d'une frame.
-        Returns:
-            bitstream (string): le bitstream représentant le message de fin
-        """
-        # tail = frame_id + type_msg
-        self.tail = self.int2bin(self.frame_id, 16) + self.int2bin(TAIL_MSG, 2)
-        
-        self.bitstream += self.tail
-        
-        return(self.tail)
-    
-    
-    @staticmethod
-    def encode_frame_RLE(frame_id, img_size, macroblock_size, frame, bufsize):
-        """
-        Permet de convertir une frame RLE en un bitstream. Il s'agit d'une
-        fonction-outil. On reprend en fait tout le processus de la méthode
-        'send_frame_RLE' de BitstreamSender, mais SANS passer par un réseau.
-        
-        Args:
-            frame_id: identifiant de la frame (int)
-            img_size: tuple égal à (img_width, img_height)
-            macroblock_size: longueur des côtés des macroblocs (on suppose que
-                             ce sont des carrés), int > 1
-            frame: frame_RLE de référence (liste de tuples d'entiers)
-            bufsize: taille maximale que peut prendre un paquet (int >= 51)
-        
-        Returns:
-            bitstream_total: bitstream associé à la frame RLE de référence 
-        """
-        
-        #--------------------------------------------------------------------#
-        
-        # initialisation du constructeur (du bitstream)
-        bit_generator = BitstreamGenerator(frame_id, img_size, macroblock_size)
-        
-        #--------------------------------------------------------------------#
-        
-        # construction du header
-        bit_generator.construct_header()
-        
-        #--------------------------------------------------------------------#
-        
-        # dict
-        
-        taille_metadonnees_dict = 50
-        taille_paquet_elementaire_dict = bufsize - taille_metadonnees_dict
-        
-        # encodage du dictionnaire de huffman associé à la frame **entière**
-        huff = Huffman([tuple_RLE for macrobloc in frame for tuple_RLE in macrobloc])
-        dict_huffman_encode = huff.dictToBin()
-        
-        # définition du nombre de paquets qui vont être générés à partir du dictionnaire
-        # de huffman encodé
-        len_dict_bitstream = len(dict_huffman_encode)
-        if len_dict_bitstream % taille_paquet_elementaire_dict == 0:
-            nb_paquets_dict = len_dict_bitstream // taille_paquet_elementaire_dict
-        else:
-            nb_paquets_dict = len_dict_bitstream // taille_paquet_elementaire_dict + 1
-        
-        # construction du dict, paquet par paquet
-        for num_paquet_dict in range(nb_paquets_dict):
-            indice_initial = num_paquet_dict * taille_paquet_elementaire_dict
-            
-            if num_paquet_dict != nb_paquets_dict - 1:
-                indice_final = indice_initial + taille_paquet_elementaire_dict
-                donnees_paquet = dict_huffman_encode[indice_initial : indice_final]
-            
-            else:
-                # dernier paquet
-                donnees_paquet = dict_huffman_encode[indice_initial : ]
-            
-            bit_generator.construct_dict(donnees_paquet)
-        
-        #--------------------------------------------------------------------#
-        
-        # body
-        
-        taille_metadonnees_body = 66
-        taille_paquet_elementaire_body = bufsize - taille_metadonnees_body
-        
-        total_num_of_macroblocks = len(frame)
-        
-        for num_macrobloc in range(total_num_of_macroblocks):
-            macrobloc = frame[num_macrobloc]
-            macrobloc_encode = huff.encode_phrase(phrase=macrobloc)
-            
-            # création du bitstream associé au macrobloc
-            
-            # réinitialisation de l'index du paquet associé au macrobloc actuel
-            bit_generator.index_paquet_macrobloc = 0
-            
-            # définition du nombre de paquets qui vont être générés à partir du
-            # macrobloc encodé
-            len_macrobloc_encode = len(macrobloc_encode)
-            if len_macrobloc_encode % taille_paquet_elementaire_body == 0:
-                nb_paquets_macrobloc = len_macrobloc_encode // taille_paquet_elementaire_body
-            else:
-                nb_paquets_macrobloc = len_macrobloc_encode // taille_paquet_elementaire_body + 1
-            
-            # construction du bitstream associé au macrobloc, paquet par paquet
-            for num_paquet_macrobloc in range(nb_paquets_macrobloc):
-                indice_initial = num_paquet_macrobloc * taille_paquet_elementaire_body
-                
-                if num_paquet_macrobloc != nb_paquets_macrobloc - 1:
-                    indice_final = indice_initial + taille_paquet_elementaire_body
-                    donnees_paquet = macrobloc_encode[indice_initial : indice_final]
-                
-                else:
-                    # dernier paquet
-                    donnees_paquet = macrobloc_encode[indice_initial : ]
-                
-                bit_generator.construct_body(num_macrobloc, donnees_paquet)
-        
-        #--------------------------------------------------------------------#
-        
-        # construction du tail du bitstream (message de fin)
-        bit_generator.construct_end_message()
-        
-        #--------------------------------------------------------------------#
-        
-        bitstream_total = bit_generator.bitstream
-        
-        return(bitstream_total)
-    
-    
-    @staticmethod
-    def decode_bitstream_RLE(bitstream):
-        """
-        Permet de décoder un bitstream associé une frame RLE avec seulement 
-        les méthodes statiques de la classe Huffman. Fonction essentielle au début
-        de la phase de décodage.
-        Args:
-            bitstream (string): bitstream complet associé à une frame, généré grâce 
-                                à la classe BitstreamGenerator
-        Returns:
-            frame_RLE_decodee: frame RLE (liste de listes de tuples d'entiers) 
-                               associée au bitstream mis en entrée
-        """
-        
-        #--------------------------------------------------------------------#
-        
-        # récupération des données utiles du dict
-        
-        donnees_utiles_dict = ""
-        
-        # détermination de la taille du paquet utile dans la partie actuelle
-        # (chaque partie contient exactement un paquet utile)
-        indice_debut_partie = 48 # 48 = taille du header
-        type_msg = int(bitstream[indice_debut_partie + 16 : indice_debut_partie + 18], 2)
-        indice_debut_taille = indice_debut_partie + 34
-        indice_fin_taille = indice_debut_taille + 16
-        taille_donnees_paquet = int(bitstream[indice_debut_taille : indice_fin_taille], 2)
-        
-        # récupération des données utiles du dictionnaire dans la partie actuelle
-        # (ie la 1ère partie)
-        donnees_utiles_dict += bitstream[indice_debut_partie + 50 : indice_debut_partie + 50 + taille_donnees_paquet]
-        
-        while type_msg == DICT_MSG:
-            indice_debut_partie += 50 + taille_donnees_paquet
-            
-            type_msg = int(bitstream[indice_debut_partie + 16 : indice_debut_partie + 18], 2)
-            
-            if type_msg == DICT_MSG:
-                # détermination de la taille du paquet utile dans la partie actuelle
-                indice_debut_taille = indice_debut_partie + 34
-                indice_fin_taille = indice_debut_taille + 16
-                taille_donnees_paquet = int(bitstream[indice_debut_taille : indice_fin_taille], 2)
-                
-                # récupération des données utiles du dictionnaire dans la partie actuelle
-                donnees_utiles_dict += bitstream[indice_debut_partie + 50 : indice_debut_partie + 50 + taille_donnees_paquet]
-            
-            # Si type_msg != DICT_MSG, c'est nécessairement parce que l'on a 
-            # type_msg = BODY_MSG = 2, et donc que l'on est en train de considérer 
-            # les données du body, et non celles du dict
-            # En outre, si cette condition n'est pas vérifiée, cela signifie que
-            # indice_debut_partie désigne l'indice du 1er élément du body 
-        
-        #--------------------------------------------------------------------#
-        
-        # on décode le dictionnaire de huffman associé à la frame
-        dict_huffman_decode = Huffman.binToDict(donnees_utiles_dict)
-        
-        #--------------------------------------------------------------------#
-        
-        # on récupère le body associé à la frame (sans avoir trié les parties utiles)
-        body_bitstream = bitstream[indice_debut_partie : -18] # 18 = taille du tail
-        len_body_bitstream = len(body_bitstream)
-        
-        #--------------------------------------------------------------------#
-        
-        # récupération des données utiles du body
-        
-        frame_RLE_decodee = []
-        
-        # on détermine d'abord combien il y a de macroblocs en tout
-        header = bitstream[ : 48]
-        img_width = int(header[18 : 30], 2)
-        img_height = int(header[30 : 42], 2)
-        macroblock_size = int(header[42 : ], 2)
-        total_num_of_macroblocks = (img_width * img_height) // macroblock_size**2
-        
-        indice_debut_partie = 0 # ré-initialisation de indice_debut_partie
-        
-        for num_macrobloc in range(total_num_of_macroblocks):
-            donnees_utiles_macrobloc = ""
-            
-            num_macrobloc_actuel = int(body_bitstream[indice_debut_partie + 18 : indice_debut_partie + 34], 2)
-            
-            while (num_macrobloc_actuel == num_macrobloc) and (indice_debut_partie < len_body_bitstream):
-                # détermination de la taille du paquet utile dans la partie actuelle
-                indice_debut_taille = indice_debut_partie + 50
-                indice_fin_taille = indice_debut_taille + 16
-                taille_donnees_paquet = int(body_bitstream[indice_debut_taille : indice_fin_taille], 2)
-                
-                # récupération des données utiles du macrobloc dans la partie actuelle
-                indice_fin_donnees = indice_fin_taille + taille_donnees_paquet
-                donnees_paquet = body_bitstream[indice_fin_taille : indice_fin_donnees]
-                
-                donnees_utiles_macrobloc += donnees_paquet
-                
-                # on met à jour indice_debut_partie pour pouvoir ré-itérer ce processus
-                indice_debut_partie += 66 + taille_donnees_paquet
-                
-                if indice_debut_partie < len_body_bitstream:
-                    num_macrobloc_actuel = int(body_bitstream[indice_debut_partie + 18 : indice_debut_partie + 34], 2)
-            
-            # on décode les données utiles du body
-            macrobloc_decode = Huffman.decode_frame_RLE(donnees_utiles_macrobloc, dict_huffman_decode)
-            
-            # on ajoute le macrobloc décodé à la frame
-            frame_RLE_decodee.append(macrobloc_decode)
-        
-        return(frame_RLE_decodee)
-
+from bitstream import BitstreamGenerator, TAILLE_HEADER, TAILLE_MAX_METADONNEES_DICT, TAILLE_TAIL
+import chroma
+import quantification
+import rle
+import tables_huffman
+import categories
+import codage_entropique
 
 ###############################################################################
 
@@ -413,37 +31,37 @@ class BitstreamSender:
     Classe permettant de gérer l'envoi d'un bitstream via un réseau, d'un client
     à un serveur.
     """
-    def __init__(self, frame_id, img_size, macroblock_size, frame, client, bufsize):
-        self.bit_generator = BitstreamGenerator(frame_id, img_size, macroblock_size)
+    def __init__(self, frame_id, img_size, macroblock_size, frame, client, bufsize, sous_echantillonnage=chroma.CHROMA_444,
+                 qualite=quantification.QUALITE_SEUIL, type_matrice=quantification.MATRICE_JPEG,
+                 id_table=tables_huffman.TABLE_DYNAMIQUE, symbolisation=categories.SYMBOLISATION_RUN_LEVEL,
+                 id_codeur=codage_entropique.CODEUR_HUFFMAN):
+        self.bit_generator = BitstreamGenerator(frame_id, img_size, macroblock_size, sous_echantillonnage, qualite, type_matrice,
+                                                symbolisation=symbolisation, id_codeur=id_codeur)
         
         # liste de listes de tuples
         # chacune des sous-listes (qui sont ici des listes de tuples) correspond 
         # en fait à la représentation RLE d'un macrobloc
+        # (la frame peut aussi être donnée sous forme de tableaux, cf. rle.py)
         self.frame = frame
+        self.tableaux_RLE = rle.en_tableaux(self.frame)
         
         # c'est aussi égal à (img_size[0] * img_size[1]) // macroblock_size**2
-        self.total_num_of_macroblocks = len(self.frame)
+        self.total_num_of_macroblocks = len(self.tableaux_RLE[2]) - 1
         
         self.client = client
         
         self.bufsize = bufsize
         
         # concrètement, les métadonnées des paquets envoyés pour former le bitstream
-        # du dict font 50 "bits" (50 = 16 + 2 + 16 + 16)
-        self.taille_metadonnees_dict = 50
+        # du dict font au plus 4 octets (cf. TAILLE_MAX_METADONNEES_DICT)
+        self.taille_metadonnees_dict = TAILLE_MAX_METADONNEES_DICT
         
-        # taille d'un paquet élémentaire du dict avant de l'adjoindre au paquet
-        # du bitstream
-        self.taille_paquet_elementaire_dict = self.bufsize - self.taille_metadonnees_dict
+        # taille (en bits) d'un paquet élémentaire du dict avant de l'adjoindre
+        # au paquet du bitstream
+        self.taille_paquet_elementaire_dict = 8 * (self.bufsize - self.taille_metadonnees_dict)
         
-        # les métadonnées des paquets envoyés pour former le bitstream du body
-        # ont une taille de 66 "bits" (66 = 16 + 2 + 16 + 16 + 16)
-        self.taille_metadonnees_body = 66
-        
-        # taille d'un paquet élémentaire du dict avant de l'adjoindre au paquet
-        # du bitstream (de taille 66 + taille_paquet_elementaire_body, qui vaut 
-        # bufsize par définition)
-        self.taille_paquet_elementaire_body = self.bufsize - self.taille_metadonnees_body
+        # (les paquets du body, eux, regroupent plusieurs macroblocs, cf.
+        # BitstreamGenerator.construct_body_paquets)
         
         # initialisation du nombre de paquets qui seront envoyés du client au 
         # serveur, et qui sont associés au dict (resp. au body)
@@ -452,11 +70,13 @@ class BitstreamSender:
         
         # génération puis encodage du dictionnaire de huffman associé à la 
         # frame **entière**
+        # (ou choix de la table statique id_table, cf. tables_huffman.py, ou
+        # bien du codeur arithmétique, cf. codage_entropique.py)
         t_debut_generation_dico_huffman = time()
-        self.huff = Huffman([tuple_RLE for macrobloc in self.frame for tuple_RLE in macrobloc])
+        (self.codeur, self.dict_huffman_encode, self.bit_generator.id_codeur,
+         self.bit_generator.id_table) = BitstreamGenerator.codeur_entropique(self.tableaux_RLE, id_codeur, id_table, symbolisation)
         t_fin_generation_dico_huffman = time()
         self.duree_generation_dico_huffman = t_fin_generation_dico_huffman - t_debut_generation_dico_huffman
-        self.dict_huffman_encode = self.huff.dictToBin()
         
         # définit la taille des données compressées **utiles** du body
         self.taille_donnees_compressees_huffman = 0
@@ -509,6 +129,21 @@ class BitstreamSender:
         return(frame)
     
     
+    @staticmethod
+    def envoie_paquets(client, paquets):
+        """
+        Permet d'envoyer au serveur, un par un, des paquets déjà construits
+        (typiquement par BitstreamGenerator.genere_paquets_frame_RLE). Comme 
+        dans send_frame_RLE, on attend la réponse du serveur après chaque paquet.
+        Args:
+            client: client connecté au serveur
+            paquets: liste des paquets (bytes) à envoyer, dans l'ordre
+        """
+        for paquet in paquets:
+            client.send_data_to_server(paquet)
+            client.wait_for_response()
+    
+    
     def send_header_bitstream(self):
         """
         Permet d'envoyer le bitstream associé au header du client au serveur. 
@@ -544,60 +179,28 @@ class BitstreamSender:
                 # dernier paquet
                 donnees_paquet = self.dict_huffman_encode[indice_initial : ]
             
-            nouv_paquet_dict = self.bit_generator.construct_dict(donnees_paquet)
+            nouv_paquet_dict = self.bit_generator.construct_dict(donnees_paquet, num_paquet_dict == nb_paquets_dict - 1)
             
             self.client.send_data_to_server(nouv_paquet_dict)
             self.client.wait_for_response()
     
     
-    def send_macrobloc_bitstream(self, num_macrobloc, macrobloc_encode):
-        """
-        Permet d'envoyer le bitstream associé à un macrobloc encodé du client 
-        au serveur.
-        """
-        
-        # réinitialisation de l'index du paquet associé au macrobloc actuel
-        self.bit_generator.index_paquet_macrobloc = 0
-        
-        # définition du nombre de paquets qui vont être générés à partir du
-        # macrobloc encodé
-        len_macrobloc_encode = len(macrobloc_encode)
-        if len_macrobloc_encode % self.taille_paquet_elementaire_body == 0:
-            nb_paquets_macrobloc = len_macrobloc_encode // self.taille_paquet_elementaire_body
-        else:
-            nb_paquets_macrobloc = len_macrobloc_encode // self.taille_paquet_elementaire_body + 1
-        
-        self.nb_paquets_body += nb_paquets_macrobloc
-        
-        # construction du bitstream associé au macrobloc, paquet par paquet
-        for num_paquet_macrobloc in range(nb_paquets_macrobloc):
-            indice_initial = num_paquet_macrobloc * self.taille_paquet_elementaire_body
-            
-            if num_paquet_macrobloc != nb_paquets_macrobloc - 1:
-                indice_final = indice_initial + self.taille_paquet_elementaire_body
-                donnees_paquet = macrobloc_encode[indice_initial : indice_final]
-            
-            else:
-                # dernier paquet
-                donnees_paquet = macrobloc_encode[indice_initial : ]
-            
-            nouv_paquet_macrobloc = self.bit_generator.construct_body(num_macrobloc, donnees_paquet)
-            
-            self.client.send_data_to_server(nouv_paquet_macrobloc)
-            self.client.wait_for_response()
-    
-    
     def send_body_bitstream(self):
         """
         Permet d'envoyer le bitstream associé au body du client au serveur.
         """
         self.nb_paquets_body = 0
         
-        for num_macrobloc in range(self.total_num_of_macroblocks):
-            macrobloc = self.frame[num_macrobloc]
-            macrobloc_encode = self.huff.encode_phrase(phrase=macrobloc)
-            self.taille_donnees_compressees_huffman += len(macrobloc_encode)
-            self.send_macrobloc_bitstream(num_macrobloc, macrobloc_encode)
+        (octets_body, decalages_bits) = self.codeur.encode_tableaux(*self.tableaux_RLE)
+        self.taille_donnees_compressees_huffman += int(decalages_bits[-1])
+        
+        # construction du body, paquet par paquet (chaque paquet regroupe
+        # plusieurs macroblocs)
+        for nouv_paquet_body in self.bit_generator.construct_body_paquets(octets_body, decalages_bits, self.bufsize):
+            self.nb_paquets_body += 1
+            
+            self.client.send_data_to_server(nouv_paquet_body)
+            self.client.wait_for_response()
     
     
     def send_tail_bitstream(self):
@@ -671,20 +274,18 @@ if __name__ == "__main__":
     
     # définition du bufsize (très important)
     
-    # On DOIT avoir bufsize >= 67 (pour que l'on puisse envoyer en 1 seule fois
+    # On DOIT avoir bufsize >= 10 (pour que l'on puisse envoyer en 1 seule fois
     # le header et la queue du bitstream, et pour que l'on puisse envoyer correctement 
-    # chacun des paquets constituant dict et body
+    # chacun des paquets constituant dict et body)
     
-    # En effet, la taille maximale des "métadonnées" associées à chacun des 
-    # paquets élémentaires de dict et de body est de 66 bits (enfin, pour être 
-    # précis, ce sont des chaînes de caractère de taille <= 66 qui sont uniquement 
-    # composées de '0' et de '1', mais chacun de ces '0' et '1' est codé sur 8 
-    # bits, donc sur un octet, donc en réalité ces métadonnées ont une taille 
-    # <= 66 octets, et non <= 66 bits)
+    # En effet, la taille maximale des métadonnées d'un paquet du body ne
+    # contenant qu'un seul segment est de 9 octets (le bitstream est binaire :
+    # chaque octet transmis contient 8 bits du bitstream)
     
-    # Rappel :
-    # taille métadonnées dict = 50 "bits"
-    # taille métadonnées body = 66 "bits"
+    # Rappel (les métadonnées sont des varints, cf. bit_io.encode_varint) :
+    # taille métadonnées dict <= TAILLE_MAX_METADONNEES_DICT = 4 octets
+    # taille métadonnées body (1 segment) <= TAILLE_MAX_METADONNEES_BODY = 9 octets
+    # (1er octet + écart + nombre de segments + taille du segment)
     
     # Le bufsize est souvent une puissance de 2, et désigne le nombre maximal
     # d'octets qui pourront être reçus (resp. être envoyés) par le serveur (resp. 
@@ -694,7 +295,7 @@ if __name__ == "__main__":
     # intérêt à maximiser le bufsize
     
     puiss_2_random = randint(10, 12)
-    bufsize = 2 ** puiss_2_random # /!\ bufsize >= 67 /!\
+    bufsize = 2 ** puiss_2_random # /!\ bufsize >= 10 /!\
     
     #------------------------------------------------------------------------#
     
@@ -709,7 +310,7 @@ if __name__ == "__main__":
     cli = Client(HOST, PORT, bufsize, affiche_messages)
     
     global received_data
-    received_data = "" # bitstream reçu par le serveur, construit itérativement
+    received_data = bytearray() # bitstream reçu par le serveur, construit itérativement
     
     def on_received_data(data):
         """
@@ -787,17 +388,17 @@ if __name__ == "__main__":
     pourcentage_dict_bitstream = 100 * len_dict_bitstream / len_received_data
     pourcentage_body_bitstream = 100 * len_body_bitstream / len_received_data
     
-    # taille des différentes composantes du bitstream (en octets / "bits" / nombre de '0' et de '1')
-    log.debug(f"Taille du bitstream total : {len_received_data} \"bits\"")
-    log.debug("Taille du header : 48 (taille constante)")
-    log.debug(f"Taille de dict_bitstream : {len_dict_bitstream} ({pourcentage_dict_bitstream:.2f}%)")
-    log.debug(f"Taille de body_bitstream : {len_body_bitstream} ({pourcentage_body_bitstream:.2f}%)")
-    log.debug("Taille du tail : 18 (taille constante)\n")
+    # taille des différentes composantes du bitstream (en octets)
+    log.debug(f"Taille du bitstream total : {len_received_data} octets")
+    log.debug(f"Taille du header : {TAILLE_HEADER} octets (taille constante)")
+    log.debug(f"Taille de dict_bitstream : {len_dict_bitstream} octets ({pourcentage_dict_bitstream:.2f}%)")
+    log.debug(f"Taille de body_bitstream : {len_body_bitstream} octets ({pourcentage_body_bitstream:.2f}%)")
+    log.debug(f"Taille du tail : {TAILLE_TAIL} octets (taille constante)\n")
     
     # taux de compression (il n'a pas de réel sens physique ici, mais c'est toujours
     # intéressant de le calculer)
     taille_originale_en_bits = 8 * 3 * img_width * img_height
-    taux_compression = 100 * len(received_data) / taille_originale_en_bits
+    taux_compression = 100 * 8 * len(received_data) / taille_originale_en_bits
     log.debug(f"Taux de compression : {taux_compression:.2f}%\n")
     
     #------------------------------------------------------------------------#
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+
+"""
+Symbolisation "à la JPEG" des paires (run, level) : au lieu de coder chaque
+paire (run, level) par un code de Huffman qui lui est propre (ce qui donne
+autant de symboles que de valeurs de levels distinctes), on ne code avec
+Huffman que la paire (run, categorie), où la catégorie d'un level est le nombre
+de bits de sa valeur absolue. Les bits du level ("amplitude") sont ensuite
+écrits tels quels, juste après le code de Huffman.
+
+Comme en JPEG :
+    - l'amplitude d'un level positif est son écriture binaire (sur 'categorie'
+      bits), et celle d'un level négatif est le complément à 1 de sa valeur
+      absolue (par exemple : 5 --> "101", -5 --> "010")
+    - les runs sont bornés : un run d'au moins NB_ZEROS_ZRL zéros est précédé
+      d'autant de symboles ZRL (= NB_ZEROS_ZRL zéros) que nécessaire
+
+Les runs des symboles sont donc compris entre 0 et NB_ZEROS_ZRL - 1 (ou égaux
+à NB_ZEROS_ZRL pour ZRL), et les catégories entre 0 et CATEGORIE_MAX : il y a
+au plus quelques centaines de symboles distincts, quel que soit le contenu des
+frames, ce qui rend le dictionnaire de Huffman (et la construction de l'arbre)
+très peu coûteux.
+
+La paire de fin (n - 1, 0) d'un macrobloc (cf. rle.py) est de catégorie 0, et
+n'a donc pas d'amplitude.
+
+Source : https://www.w3.org/Graphics/JPEG/itu-t81.pdf (section F.1.2.2)
+"""
+
+import numpy as np
+
+from bit_io import BitWriter, lit_bits
+from huffman import Huffman, DecodeurHuffman
+
+##############################################################################
+
+
+# symbolisations possibles des paires (run, level), indiquées dans le header
+SYMBOLISATION_RUN_LEVEL = 0
+SYMBOLISATION_CATEGORIES = 1
+
+# un symbole ZRL représente NB_ZEROS_ZRL zéros consécutifs ; il ne peut pas
+# être confondu avec une paire de fin (n - 1, 0), dont le run est plus petit
+NB_ZEROS_ZRL = 16
+ZRL = (NB_ZEROS_ZRL, 0)
+
+# catégorie maximale des levels (codés sur 16 bits)
+CATEGORIE_MAX = 16
+
+
+##############################################################################
+
+
+def categories_levels(levels):
+    """
+    Renvoie la catégorie de chaque level, i.e. le nombre de bits de sa valeur
+    absolue (0 pour un level nul).
+    """
+    # np.frexp renvoie l'exposant e tel que |level| = m * 2**e, avec 0.5 <= m < 1
+    _, exposants = np.frexp(np.abs(np.asarray(levels, dtype=np.float64)))
+    return(exposants.astype(np.int64))
+
+
+def amplitudes_levels(levels, categories):
+    """
+    Renvoie l'amplitude (les bits écrits après le code de Huffman) de chaque level.
+    """
+    levels = np.asarray(levels, dtype=np.int64)
+    return(np.where(levels >= 0, levels, levels + (1 << categories) - 1))
+
+
+def level_depuis_amplitude(amplitude, categorie):
+    """
+    Opération inverse de amplitudes_levels (pour un seul level).
+    """
+    if categorie == 0 or amplitude >= 1 << (categorie - 1):
+        return(amplitude)
+    return(amplitude - (1 << categorie) + 1)
+
+
+def en_symboles(runs, levels, debuts=None):
+    """
+    Convertit une frame RLE (sous forme de tableaux, cf. rle.py) en symboles
+    (run, categorie), en insérant les symboles ZRL nécessaires.
+
+    Args:
+        runs, levels, debuts: frame RLE sous forme de tableaux (debuts est
+                              facultatif si l'on n'a pas besoin des bornes
+                              des macroblocs)
+
+    Returns:
+        (runs_symboles, categories, amplitudes, debuts_symboles): tableaux de
+        même taille (sauf debuts_symboles, qui donne les bornes des macroblocs
+        dans les symboles). L'amplitude d'un symbole s'écrit sur 'categorie'
+        bits (aucun bit pour les symboles ZRL).
+    """
+    runs = np.asarray(runs, dtype=np.int64)
+    levels = np.asarray(levels, dtype=np.int64)
+
+    # chaque paire donne (run // NB_ZEROS_ZRL) symboles ZRL, puis un symbole (run, categorie)
+    nb_symboles = runs // NB_ZEROS_ZRL + 1
+    fins = np.cumsum(nb_symboles)
+    derniers = fins - 1
+
+    runs_symboles = np.full(int(fins[-1]) if fins.size > 0 else 0, NB_ZEROS_ZRL, dtype=np.int64)
+    categories = np.zeros(runs_symboles.size, dtype=np.int64)
+    amplitudes = np.zeros(runs_symboles.size, dtype=np.int64)
+
+    categories_paires = categories_levels(levels)
+    runs_symboles[derniers] = runs % NB_ZEROS_ZRL
+    categories[derniers] = categories_paires
+    amplitudes[derniers] = amplitudes_levels(levels, categories_paires)
+
+    debuts_symboles = None
+    if debuts is not None:
+        debuts_symboles = np.concatenate(([0], fins))[debuts]
+
+    return(runs_symboles, categories, amplitudes, debuts_symboles)
+
+
+##############################################################################
+
+
+class HuffmanCategories(Huffman):
+    """
+    Code de Huffman des symboles (run, categorie) d'une frame RLE. Le
+    dictionnaire (et donc dictToBin / binToDict) est le même que celui d'un
+    code de Huffman des paires (run, level), seuls ses symboles changent.
+    """
+
+    @classmethod
+    def depuis_tableaux(cls, runs, levels):
+        """
+        Construit le code de Huffman des symboles (run, categorie) d'une frame
+        RLE sous forme de tableaux.
+        """
+        runs_symboles, categories, _, _ = en_symboles(runs, levels)
+        return(super().depuis_tableaux(runs_symboles, categories))
+
+
+    def nb_bits_body(self, runs, levels):
+        """
+        Renvoie le nombre total de bits qu'occuperaient les codes des paires
+        (run, level) données, amplitudes comprises (cf. Huffman.nb_bits_body).
+        """
+        runs_symboles, categories, _, _ = en_symboles(runs, levels)
+        return(super().nb_bits_body(runs_symboles, categories) + int(categories.sum()))
+
+
+    def encode_tableaux(self, runs, levels, debuts):
+        """
+        Encode une frame RLE sous forme de tableaux : chaque symbole (run, categorie)
+        est remplacé par son code de Huffman, suivi de son amplitude.
+
+        Returns:
+            (octets, decalages_bits): cf. Huffman.encode_tableaux
+        """
+        runs_symboles, categories, amplitudes, debuts_symboles = en_symboles(runs, levels, debuts)
+
+        _, codes, longueurs = self.tables_codes()
+        indices = self.indices_symboles(runs_symboles, categories)
+
+        if (indices < 0).any():
+            raise KeyError("Certains symboles (run, categorie) n'ont pas de code de Huffman")
+
+        # chaque symbole occupe 2 codes : son code de Huffman, puis son amplitude
+        codes_frame = np.stack((codes[indices], amplitudes), axis=1).ravel()
+        longueurs_codes_frame = np.stack((longueurs[indices], categories), axis=1).ravel()
+
+        non_vides = longueurs_codes_frame > 0
+        writer = BitWriter()
+        writer.ecrit_codes(codes_frame[non_vides], longueurs_codes_frame[non_vides])
+
+        decalages_bits = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(longueurs[indices] + categories, out=decalages_bits[1 : ])
+
+        return(writer.octets(), decalages_bits[debuts_symboles])
+
+
+#----------------------------------------------------------------------------#
+
+
+class DecodeurCategories(DecodeurHuffman):
+    """
+    Décodeur des symboles (run, categorie) (cf. DecodeurHuffman) : il lit
+    l'amplitude qui suit chaque code, et renvoie directement les paires
+    (run, level) de la frame RLE.
+    """
+
+    def __init__(self, dico, *args, **kwargs):
+        super().__init__(dico, *args, **kwargs)
+
+        self.avec_suffixes = True
+        self.nb_bits_suffixe_max = CATEGORIE_MAX
+
+
+    def lit_suffixe(self, symbole, valeur, taille, k):
+        """
+        Lit l'amplitude qui suit le code du symbole (run, categorie), et renvoie
+        la paire (run, level) associée (cf. DecodeurHuffman.lit_suffixe).
+        """
+        run, categorie = symbole
+        if categorie == 0:
+            return((run, 0), k)
+
+        amplitude = lit_bits(valeur, taille, k, categorie)
+        return((run, level_depuis_amplitude(amplitude, categorie)), k + categorie)
+
+
+    def decode_bits(self, valeur, nb_bits):
+        """
+        Décode le body d'un macrobloc, donné sous forme d'entier (cf.
+        DecodeurHuffman.decode_bits).
+
+        Returns:
+            res: liste des paires (run, level) décodées
+        """
+        res = []
+        nb_zeros = 0
+
+        for (run, level) in super().decode_bits(valeur, nb_bits):
+            if (run, level) == ZRL:
+                nb_zeros += NB_ZEROS_ZRL
+                continue
+
+            res.append((nb_zeros + run, level))
+            nb_zeros = 0
+
+        return(res)
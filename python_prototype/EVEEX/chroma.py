@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+"""
+Sous-échantillonnage de la chrominance (4:4:4, 4:2:2 et 4:2:0).
+
+En 4:4:4 (mode historique), les 3 couches Y, U et V d'un macrobloc sont
+linéarisées bout à bout dans un même vecteur RLE (cf. Encoder.zigzag_linearisation).
+
+En 4:2:2 et en 4:2:0, on passe à une représentation **planaire** : les couches
+U et V sont d'abord sous-échantillonnées (moyenne sur des blocs de 1x2, resp.
+2x2 pixels), puis chaque plan (Y, puis U, puis V) est découpé en macroblocs
+d'une seule couche. La frame RLE contient alors tous les macroblocs de Y, puis
+tous ceux de U, puis tous ceux de V.
+
+Comme les plans de chrominance n'ont plus forcément des dimensions multiples de
+macroblock_size, ils sont complétés (en répétant leurs bords) avant la DCT, puis
+recadrés après la DCT inverse.
+"""
+
+import numpy as np
+
+##############################################################################
+
+
+# modes de sous-échantillonnage (codés sur 2 bits dans le header)
+CHROMA_444 = 0
+CHROMA_422 = 1
+CHROMA_420 = 2
+
+# facteurs de sous-échantillonnage (vertical, horizontal) de la chrominance
+FACTEURS_SOUS_ECHANTILLONNAGE = {
+    CHROMA_444 : (1, 1),
+    CHROMA_422 : (1, 2),
+    CHROMA_420 : (2, 2)
+}
+
+NOMS_SOUS_ECHANTILLONNAGE = {
+    CHROMA_444 : "4:4:4",
+    CHROMA_422 : "4:2:2",
+    CHROMA_420 : "4:2:0"
+}
+
+
+##############################################################################
+
+
+def facteurs(sous_echantillonnage):
+    """
+    Renvoie les facteurs de sous-échantillonnage (vertical, horizontal) de la
+    chrominance associés au mode donné.
+    """
+    if sous_echantillonnage not in FACTEURS_SOUS_ECHANTILLONNAGE:
+        raise ValueError(f"Mode de sous-échantillonnage inconnu : {sous_echantillonnage}")
+
+    return(FACTEURS_SOUS_ECHANTILLONNAGE[sous_echantillonnage])
+
+
+def est_planaire(sous_echantillonnage):
+    """
+    Renvoie True si les couches Y, U et V sont encodées séparément (plan par plan).
+    """
+    return(facteurs(sous_echantillonnage) != (1, 1))
+
+
+def taille_plan_chroma(img_size, sous_echantillonnage):
+    """
+    Renvoie la taille (largeur, hauteur) des plans U et V sous-échantillonnés.
+
+    Args:
+        img_size: tuple égal à (img_width, img_height)
+        sous_echantillonnage: CHROMA_444, CHROMA_422 ou CHROMA_420
+
+    Returns:
+        (chroma_width, chroma_height)
+    """
+    img_width, img_height = img_size
+    facteur_vertical, facteur_horizontal = facteurs(sous_echantillonnage)
+
+    if (img_width % facteur_horizontal != 0) or (img_height % facteur_vertical != 0):
+        raise ValueError(f"Les dimensions de l'image {img_size} ne sont pas compatibles avec "
+                         f"le sous-échantillonnage {NOMS_SOUS_ECHANTILLONNAGE[sous_echantillonnage]}")
+
+    return(img_width // facteur_horizontal, img_height // facteur_vertical)
+
+
+def taille_plan_complete(taille_plan, macroblock_size):
+    """
+    Renvoie la taille (largeur, hauteur) du plan une fois complété, de sorte
+    que ses 2 dimensions soient des multiples de macroblock_size.
+    """
+    return tuple(-(-cote // macroblock_size) * macroblock_size for cote in taille_plan)
+
+
+def nb_macroblocs_par_plan(img_size, macroblock_size, sous_echantillonnage):
+    """
+    Renvoie le nombre de macroblocs du plan Y et celui de chacun des plans U et V.
+    En 4:4:4, il n'y a qu'un seul "plan" (les 3 couches étant entrelacées), et
+    le nombre de macroblocs de chrominance vaut donc 0.
+    """
+    img_width, img_height = img_size
+    nb_macroblocs_Y = (img_width * img_height) // macroblock_size**2
+
+    if not est_planaire(sous_echantillonnage):
+        return(nb_macroblocs_Y, 0)
+
+    chroma_width, chroma_height = taille_plan_complete(taille_plan_chroma(img_size, sous_echantillonnage), macroblock_size)
+
+    return(nb_macroblocs_Y, (chroma_width * chroma_height) // macroblock_size**2)
+
+
+def nb_macroblocs_total(img_size, macroblock_size, sous_echantillonnage):
+    """
+    Renvoie le nombre total de macroblocs RLE d'une frame.
+    """
+    nb_macroblocs_Y, nb_macroblocs_chroma = nb_macroblocs_par_plan(img_size, macroblock_size, sous_echantillonnage)
+    return(nb_macroblocs_Y + 2 * nb_macroblocs_chroma)
+
+
+#----------------------------------------------------------------------------#
+
+
+def sous_echantillonne(plan, sous_echantillonnage):
+    """
+    Sous-échantillonne un plan de chrominance, en moyennant chacun des blocs de
+    facteur_vertical x facteur_horizontal pixels.
+
+    Args:
+        plan: tableau de taille (hauteur, largeur)
+        sous_echantillonnage: CHROMA_444, CHROMA_422 ou CHROMA_420
+
+    Returns:
+        plan_sous_echantillonne: tableau (float64) de taille
+                                 (hauteur // facteur_vertical, largeur // facteur_horizontal)
+    """
+    facteur_vertical, facteur_horizontal = facteurs(sous_echantillonnage)
+    hauteur, largeur = plan.shape
+
+    blocs = np.asarray(plan, dtype=float).reshape(hauteur // facteur_vertical, facteur_vertical,
+                                                  largeur // facteur_horizontal, facteur_horizontal)
+
+    return(blocs.mean(axis=(1, 3)))
+
+
+def sur_echantillonne(plan, sous_echantillonnage):
+    """
+    Opération inverse (approchée) de sous_echantillonne : chaque pixel est
+    répété facteur_vertical x facteur_horizontal fois.
+    """
+    facteur_vertical, facteur_horizontal = facteurs(sous_echantillonnage)
+
+    return(np.repeat(np.repeat(plan, facteur_vertical, axis=0), facteur_horizontal, axis=1))
+
+
+def complete_plan(plan, macroblock_size):
+    """
+    Complète un plan (en répétant sa dernière ligne et sa dernière colonne) de
+    sorte que ses 2 dimensions soient des multiples de macroblock_size.
+    """
+    hauteur, largeur = plan.shape
+    largeur_complete, hauteur_complete = taille_plan_complete((largeur, hauteur), macroblock_size)
+
+    if (largeur_complete, hauteur_complete) == (largeur, hauteur):
+        return(plan)
+
+    return(np.pad(plan, ((0, hauteur_complete - hauteur), (0, largeur_complete - largeur)), mode="edge"))
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+"""
+Interface commune des codeurs entropiques du bitstream (cf. bitstream.py).
+
+Un codeur entropique transforme les paires (run, level) de chaque macrobloc
+d'une frame RLE en une chaîne de "0" et de "1", qui constitue le body du
+macrobloc. Il peut aussi avoir besoin de transmettre des données propres à la
+frame (par exemple le dictionnaire de Huffman), qui sont envoyées dans les
+paquets DICT_MSG.
+
+Le codeur utilisé par une frame est indiqué dans son header (sur NB_BITS_ID_CODEUR
+bits), ce qui permet de choisir le codeur flux par flux :
+    - CODEUR_HUFFMAN : codes de Huffman (cf. huffman.py, tables_huffman.py et
+                       categories.py)
+    - CODEUR_ARITHMETIQUE : codage arithmétique binaire adaptatif, sans table
+                            à transmettre (cf. codeur_arithmetique.py)
+    - CODEUR_EXP_GOLOMB : codes de Golomb exponentiels, sans table à transmettre
+                          (cf. codeur_exp_golomb.py), choisi automatiquement à
+                          la place de CODEUR_HUFFMAN si le dictionnaire de
+                          Huffman coûte plus cher que ce qu'il fait gagner
+"""
+
+##############################################################################
+
+
+CODEUR_HUFFMAN = 0
+CODEUR_ARITHMETIQUE = 1
+CODEUR_EXP_GOLOMB = 2
+
+NB_BITS_ID_CODEUR = 2
+
+
+##############################################################################
+
+
+class CodeurEntropique:
+    """
+    Codeur entropique d'une frame RLE. Une instance n'encode qu'une seule
+    frame (les codeurs adaptatifs gardent un état d'un macrobloc à l'autre).
+    """
+
+    def dictToBin(self):
+        """
+        Renvoie les données (chaîne de "0" et de "1") à transmettre dans les
+        paquets DICT_MSG de la frame, éventuellement vides.
+        """
+        return("")
+
+
+    def encode_tableaux(self, runs, levels, debuts):
+        """
+        Encode une frame RLE sous forme de tableaux (cf. rle.py).
+
+        Returns:
+            octets: bytearray contenant les bodies de tous les macroblocs
+            decalages_bits: tableau de taille nb_macroblocs + 1, tel que le
+                            macrobloc n°k occupe les bits n°decalages_bits[k]
+                            (inclus) à n°decalages_bits[k+1] (exclu)
+        """
+        raise NotImplementedError
+
+
+class DecodeurEntropique:
+    """
+    Décodeur associé à un CodeurEntropique. Une instance ne décode qu'une
+    seule frame. Les macroblocs d'un décodeur adaptatif doivent être décodés
+    dans l'ordre ; ceux des autres décodeurs sont indépendants, et peuvent
+    être décodés dans n'importe quel ordre (cf. parallel_decoder.py).
+    """
+
+    # True si le décodage d'un macrobloc dépend des macroblocs précédents
+    adaptatif = False
+
+    def decode(self, enc):
+        """
+        Décode le body 'enc' (chaîne de "0" et de "1") d'un macrobloc.
+
+        Returns:
+            res: liste des paires (run, level) du macrobloc
+        """
+        raise NotImplementedError
+
+
+    def decode_bits(self, valeur, nb_bits):
+        """
+        Décode le body d'un macrobloc donné sous forme d'entier : ce sont les
+        nb_bits bits de 'valeur', le 1er bit étant celui de poids fort. Par
+        défaut, les bits sont simplement convertis en chaîne de "0" et de "1",
+        puis décodés par 'decode' ; les décodeurs qui lisent directement les
+        bits de l'entier redéfinissent cette méthode.
+
+        Returns:
+            res: liste des paires (run, level) du macrobloc
+        """
+        return(self.decode(format(valeur, f"0{nb_bits}b") if nb_bits > 0 else ""))
+
+
+    def decode_octets(self, octets, nb_bits):
+        """
+        Décode le body d'un macrobloc donné sous forme d'octets : ce sont ses
+        nb_bits premiers bits (cf. bitstream.BitstreamGenerator.parcourt_macroblocs).
+        Les octets sont convertis en un seul entier (ce qui est plus rapide que
+        Numpy pour les quelques octets d'un macrobloc), décodé par decode_bits.
+
+        Args:
+            octets: bytes, bytearray ou memoryview
+            nb_bits: nombre de bits utiles
+
+        Returns:
+            res: liste des paires (run, level) du macrobloc
+        """
+        return(self.decode_bits(int.from_bytes(octets, "big") >> (8 * len(octets) - nb_bits), nb_bits))
@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+
+"""
+Codage arithmétique binaire adaptatif des frames RLE (cf. codage_entropique.py).
+
+Chaque paire (run, level) est d'abord "binarisée", i.e. transformée en une
+suite de décisions binaires :
+    - un drapeau "fin du macrobloc", qui remplace la paire de fin (n - 1, 0) :
+      comme le nombre total de coefficients du macrobloc (i.e. la somme des
+      run + 1) est connu, n s'en déduit
+    - le run, écrit avec un code de Golomb exponentiel (cf. exp_golomb.py)
+    - le level, décrit par un drapeau "level nul", puis par son signe, et
+      enfin par |level| - 1, écrit lui aussi avec un code de Golomb exponentiel.
+      Le coefficient continu d'un macrobloc (i.e. sa 1ère paire, si son run
+      est nul) est, comme en JPEG, remplacé par l'écart avec celui du macrobloc
+      précédent
+Le nombre total de coefficients de chaque macrobloc est écrit au début de son
+body (il est en pratique le même pour tous les macroblocs d'un plan, et ne
+coûte donc presque rien une fois les contextes adaptés). Les paires sont
+décodées jusqu'à atteindre ce nombre de coefficients.
+
+Chaque décision binaire est ensuite codée par un codeur arithmétique (à
+renormalisation bit par bit, sur PRECISION bits), avec la probabilité donnée
+par son contexte. Chaque contexte est associé à une position précise dans la
+binarisation (par exemple : le 3ème bit du préfixe d'un run), et sa probabilité
+est mise à jour après chaque décision, de la même façon par le codeur et par le
+décodeur : le code s'adapte donc au fil de la frame aux statistiques de ses
+paires (run, level), sans aucune table à transmettre.
+
+Les contextes sont remis à zéro au début de chaque frame, et conservés d'un
+macrobloc à l'autre : les macroblocs d'une frame doivent donc être décodés dans
+l'ordre. Le codeur arithmétique, lui, est vidé à la fin de chaque macrobloc (ce
+qui ne coûte que quelques bits), de sorte que chaque body puisse être découpé en
+paquets indépendamment des autres.
+
+Source : Witten, Neal et Cleary, "Arithmetic coding for data compression" (1987)
+"""
+
+import numpy as np
+
+from bit_io import octets_de_chaine
+from codage_entropique import CodeurEntropique, DecodeurEntropique
+
+##############################################################################
+
+
+# précision (en bits) des bornes de l'intervalle du codeur arithmétique
+PRECISION = 32
+MAXIMUM = 2**PRECISION - 1
+MOITIE = 2**(PRECISION - 1)
+QUART = 2**(PRECISION - 2)
+TROIS_QUARTS = 3 * QUART
+
+# les probabilités (d'avoir un bit nul) sont stockées sur NB_BITS_PROBA bits,
+# et se rapprochent à chaque décision de la valeur observée d'une fraction
+# 2**(-VITESSE_ADAPTATION) de l'écart
+NB_BITS_PROBA = 12
+PROBA_INITIALE = 2**(NB_BITS_PROBA - 1)
+VITESSE_ADAPTATION = 5
+
+# nombre de contextes des préfixes (et des suffixes) des codes de Golomb
+# exponentiels : les préfixes plus longs partagent le dernier contexte
+NB_CONTEXTES_GOLOMB = 16
+
+# les paires sont réparties en NB_CLASSES classes selon la position (dans le
+# macrobloc linéarisé) du premier coefficient qu'elles décrivent : 0, 1, 2 à 3,
+# 4 à 7, ..., chaque classe ayant ses propres contextes. En effet, les paires
+# des basses fréquences ont des levels bien plus grands et des runs bien plus
+# petits que celles des hautes fréquences.
+NB_CLASSES = 7
+
+# position des différents contextes dans la liste des probabilités
+TAILLE_GOLOMB = 2 * NB_CONTEXTES_GOLOMB
+CONTEXTES_NB_COEFFICIENTS = 0
+CONTEXTES_FIN = CONTEXTES_NB_COEFFICIENTS + TAILLE_GOLOMB
+CONTEXTES_RUNS = CONTEXTES_FIN + NB_CLASSES
+CONTEXTES_NUL = CONTEXTES_RUNS + NB_CLASSES * TAILLE_GOLOMB
+CONTEXTES_SIGNE = CONTEXTES_NUL + NB_CLASSES
+CONTEXTES_LEVELS = CONTEXTES_SIGNE + NB_CLASSES
+CONTEXTES_DC = CONTEXTES_LEVELS + NB_CLASSES * TAILLE_GOLOMB
+NB_CONTEXTES = CONTEXTES_DC + TAILLE_GOLOMB
+
+
+def nouveaux_contextes():
+    """
+    Renvoie les probabilités initiales de tous les contextes.
+    """
+    return([PROBA_INITIALE] * NB_CONTEXTES)
+
+
+def entier_naturel(n):
+    """
+    Associe un entier naturel à l'entier relatif n (0, 1, -1, 2, -2, ... -->
+    0, 1, 2, 3, 4, ...), comme exp_golomb.encode_signe.
+    """
+    return(2 * n - 1 if n > 0 else -2 * n)
+
+
+def entier_relatif(n):
+    """
+    Opération inverse de entier_naturel.
+    """
+    return((n + 1) // 2 if n % 2 == 1 else -(n // 2))
+
+
+##############################################################################
+
+
+class CodeurArithmetique(CodeurEntropique):
+    """
+    Codeur arithmétique binaire adaptatif d'une frame RLE.
+    """
+
+    def __init__(self):
+        self.probas = nouveaux_contextes()
+        self.dc_precedent = 0
+
+        self.bas = 0
+        self.haut = MAXIMUM
+        self.nb_bits_en_attente = 0
+        self.bits = []
+
+
+    def encode_bit(self, bit, contexte):
+        """
+        Encode la décision binaire 'bit', avec la probabilité du contexte donné
+        (qui est ensuite mise à jour).
+        """
+        proba = self.probas[contexte]
+        bas, haut = self.bas, self.haut
+
+        milieu = bas + (((haut - bas + 1) * proba) >> NB_BITS_PROBA) - 1
+        if bit == 0:
+            haut = milieu
+            self.probas[contexte] = proba + ((2**NB_BITS_PROBA - proba) >> VITESSE_ADAPTATION)
+        else:
+            bas = milieu + 1
+            self.probas[contexte] = proba - (proba >> VITESSE_ADAPTATION)
+
+        # renormalisation : on écrit les bits de poids fort déjà déterminés
+        while True:
+            if haut < MOITIE:
+                self.ecrit_bit("0")
+            elif bas >= MOITIE:
+                self.ecrit_bit("1")
+                bas -= MOITIE
+                haut -= MOITIE
+            elif bas >= QUART and haut < TROIS_QUARTS:
+                # l'intervalle chevauche le milieu : le prochain bit écrit sera
+                # suivi d'un bit opposé de plus
+                self.nb_bits_en_attente += 1
+                bas -= QUART
+                haut -= QUART
+            else:
+                break
+
+            bas = 2 * bas
+            haut = 2 * haut + 1
+
+        self.bas, self.haut = bas, haut
+
+
+    def ecrit_bit(self, bit):
+        self.bits.append(bit)
+
+        if self.nb_bits_en_attente > 0:
+            self.bits.append(("1" if bit == "0" else "0") * self.nb_bits_en_attente)
+            self.nb_bits_en_attente = 0
+
+
+    def encode_entier(self, n, contextes):
+        """
+        Encode l'entier naturel n avec un code de Golomb exponentiel, dont chaque
+        bit est une décision binaire (les contextes des préfixes commencent à
+        l'indice 'contextes', suivis de ceux des suffixes).
+        """
+        n += 1
+        nb_bits_suffixe = n.bit_length() - 1
+
+        for i in range(nb_bits_suffixe):
+            self.encode_bit(1, contextes + min(i, NB_CONTEXTES_GOLOMB - 1))
+        self.encode_bit(0, contextes + min(nb_bits_suffixe, NB_CONTEXTES_GOLOMB - 1))
+
+        contexte_suffixe = contextes + NB_CONTEXTES_GOLOMB + min(nb_bits_suffixe, NB_CONTEXTES_GOLOMB - 1)
+        for i in range(nb_bits_suffixe - 1, -1, -1):
+            self.encode_bit((n >> i) & 1, contexte_suffixe)
+
+
+    def termine(self):
+        """
+        Vide le codeur arithmétique : écrit les bits nécessaires pour désigner
+        un nombre de l'intervalle actuel (quels que soient les bits qui suivent),
+        puis renvoie tous les bits écrits depuis le dernier appel.
+        """
+        self.nb_bits_en_attente += 1
+        self.ecrit_bit("0" if self.bas < QUART else "1")
+
+        enc = "".join(self.bits)
+
+        self.bas = 0
+        self.haut = MAXIMUM
+        self.bits = []
+
+        return(enc)
+
+
+    def encode_macrobloc(self, paires):
+        """
+        Encode la liste des paires (run, level) d'un macrobloc.
+
+        Returns:
+            enc: body du macrobloc (chaîne de "0" et de "1")
+        """
+        nb_coefficients = sum(run + 1 for (run, _) in paires)
+        self.encode_entier(nb_coefficients, CONTEXTES_NB_COEFFICIENTS)
+
+        position = 0
+        for (rang, (run, level)) in enumerate(paires):
+            classe = min(position.bit_length(), NB_CLASSES - 1)
+            position += run + 1
+
+            # paire de fin (n - 1, 0)
+            if level == 0 and position == nb_coefficients:
+                self.encode_bit(1, CONTEXTES_FIN + classe)
+                break
+            self.encode_bit(0, CONTEXTES_FIN + classe)
+
+            self.encode_entier(run, CONTEXTES_RUNS + classe * TAILLE_GOLOMB)
+
+            if rang == 0 and run == 0:
+                # coefficient continu : on n'écrit que l'écart avec celui du
+                # macrobloc précédent
+                self.encode_entier(entier_naturel(level - self.dc_precedent), CONTEXTES_DC)
+                self.dc_precedent = level
+                continue
+
+            if level == 0:
+                self.encode_bit(1, CONTEXTES_NUL + classe)
+                continue
+
+            self.encode_bit(0, CONTEXTES_NUL + classe)
+            self.encode_bit(int(level < 0), CONTEXTES_SIGNE + classe)
+            self.encode_entier(abs(level) - 1, CONTEXTES_LEVELS + classe * TAILLE_GOLOMB)
+
+        return(self.termine())
+
+
+    def encode_tableaux(self, runs, levels, debuts):
+        """
+        Encode une frame RLE sous forme de tableaux (cf. CodeurEntropique) : les
+        bodies des macroblocs (cf. encode_macrobloc) sont mis bout à bout.
+        """
+        paires = list(zip(runs.tolist(), levels.tolist()))
+        bornes = debuts.tolist()
+
+        macroblocs_encodes = [self.encode_macrobloc(paires[bornes[k] : bornes[k+1]]) for k in range(len(bornes) - 1)]
+
+        decalages_bits = np.zeros(len(macroblocs_encodes) + 1, dtype=np.int64)
+        np.cumsum([len(macrobloc_encode) for macrobloc_encode in macroblocs_encodes], out=decalages_bits[1 : ])
+
+        return(bytearray(octets_de_chaine("".join(macroblocs_encodes))), decalages_bits)
+
+
+##############################################################################
+
+
+class DecodeurArithmetique(DecodeurEntropique):
+    """
+    Décodeur associé à CodeurArithmetique.
+    """
+
+    # les probabilités des contextes et la prédiction du coefficient DC sont
+    # mises à jour d'un macrobloc à l'autre
+    adaptatif = True
+
+    def __init__(self):
+        self.probas = nouveaux_contextes()
+        self.dc_precedent = 0
+
+        self.bas = 0
+        self.haut = MAXIMUM
+        self.valeur = 0
+
+        self.enc = ""
+        self.k = 0
+
+
+    def decode_bit(self, contexte):
+        """
+        Décode une décision binaire avec la probabilité du contexte donné (qui
+        est ensuite mise à jour, comme dans CodeurArithmetique.encode_bit).
+        """
+        proba = self.probas[contexte]
+        bas, haut, valeur = self.bas, self.haut, self.valeur
+
+        milieu = bas + (((haut - bas + 1) * proba) >> NB_BITS_PROBA) - 1
+        if valeur <= milieu:
+            bit = 0
+            haut = milieu
+            self.probas[contexte] = proba + ((2**NB_BITS_PROBA - proba) >> VITESSE_ADAPTATION)
+        else:
+            bit = 1
+            bas = milieu + 1
+            self.probas[contexte] = proba - (proba >> VITESSE_ADAPTATION)
+
+        while True:
+            if haut < MOITIE:
+                pass
+            elif bas >= MOITIE:
+                bas -= MOITIE
+                haut -= MOITIE
+                valeur -= MOITIE
+            elif bas >= QUART and haut < TROIS_QUARTS:
+                bas -= QUART
+                haut -= QUART
+                valeur -= QUART
+            else:
+                break
+
+            bas = 2 * bas
+            haut = 2 * haut + 1
+            valeur = 2 * valeur + (self.enc[self.k] == "1")
+            self.k += 1
+
+        self.bas, self.haut, self.valeur = bas, haut, valeur
+
+        return(bit)
+
+
+    def decode_entier(self, contextes):
+        """
+        Opération inverse de CodeurArithmetique.encode_entier.
+        """
+        nb_bits_suffixe = 0
+        while self.decode_bit(contextes + min(nb_bits_suffixe, NB_CONTEXTES_GOLOMB - 1)) == 1:
+            nb_bits_suffixe += 1
+
+        contexte_suffixe = contextes + NB_CONTEXTES_GOLOMB + min(nb_bits_suffixe, NB_CONTEXTES_GOLOMB - 1)
+        n = 1
+        for _ in range(nb_bits_suffixe):
+            n = 2 * n + self.decode_bit(contexte_suffixe)
+
+        return(n - 1)
+
+
+    def decode(self, enc):
+        """
+        Décode le body 'enc' d'un macrobloc (cf. DecodeurEntropique).
+        """
+        # le décodeur lit au plus PRECISION bits au-delà du dernier bit écrit
+        # par le codeur : les bits manquants valent 0
+        self.enc = enc + "0" * PRECISION
+        self.k = PRECISION
+
+        self.bas = 0
+        self.haut = MAXIMUM
+        self.valeur = int(self.enc[ : PRECISION], 2)
+
+        res = []
+        nb_coefficients = self.decode_entier(CONTEXTES_NB_COEFFICIENTS)
+
+        position = 0
+        rang = 0
+        while position < nb_coefficients:
+            classe = min(position.bit_length(), NB_CLASSES - 1)
+
+            if self.decode_bit(CONTEXTES_FIN + classe) == 1:
+                res.append((nb_coefficients - position - 1, 0))
+                break
+
+            run = self.decode_entier(CONTEXTES_RUNS + classe * TAILLE_GOLOMB)
+            position += run + 1
+
+            if rang == 0 and run == 0:
+                self.dc_precedent += entier_relatif(self.decode_entier(CONTEXTES_DC))
+                level = self.dc_precedent
+            elif self.decode_bit(CONTEXTES_NUL + classe) == 1:
+                level = 0
+            else:
+                signe = self.decode_bit(CONTEXTES_SIGNE + classe)
+                level = self.decode_entier(CONTEXTES_LEVELS + classe * TAILLE_GOLOMB) + 1
+                if signe:
+                    level = -level
+
+            res.append((run, level))
+            rang += 1
+
+        return(res)
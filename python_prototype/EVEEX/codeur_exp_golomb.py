@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+"""
+Codage des frames RLE par des codes de Golomb exponentiels (cf. exp_golomb.py
+et codage_entropique.py) : chaque run est écrit avec un code de Golomb
+exponentiel "non signé", et chaque level avec un code "signé".
+
+Ces codes étant universels, aucun dictionnaire n'est à transmettre. Ils sont
+moins compacts qu'un code de Huffman adapté à la frame, mais pour les petites
+frames (par exemple en 96x96), le dictionnaire de Huffman peut coûter plus cher
+que ce qu'il fait gagner sur le body : l'émetteur choisit alors ce codeur
+automatiquement (cf. BitstreamGenerator.codeur_entropique).
+"""
+
+import numpy as np
+
+from bit_io import BitWriter
+from codage_entropique import CodeurEntropique, DecodeurEntropique
+import exp_golomb
+
+##############################################################################
+
+
+def nb_bits_entiers(entiers):
+    """
+    Renvoie le nombre de bits de l'écriture binaire de chaque entier (strictement
+    positif) du tableau 'entiers'.
+    """
+    # np.frexp renvoie l'exposant e tel que n = m * 2**e, avec 0.5 <= m < 1
+    _, exposants = np.frexp(np.asarray(entiers, dtype=np.float64))
+    return(exposants.astype(np.int64))
+
+
+def entiers_naturels(levels):
+    """
+    Associe un entier naturel à chaque level, comme exp_golomb.encode_signe
+    (0, 1, -1, 2, -2, ... --> 0, 1, 2, 3, 4, ...).
+    """
+    levels = np.asarray(levels, dtype=np.int64)
+    return(np.where(levels > 0, 2 * levels - 1, -2 * levels))
+
+
+def longueurs_codes(runs, levels):
+    """
+    Renvoie la longueur (en bits) du code de chaque paire (run, level).
+    """
+    runs = np.asarray(runs, dtype=np.int64)
+    return(2 * nb_bits_entiers(runs + 1) - 1 + 2 * nb_bits_entiers(entiers_naturels(levels) + 1) - 1)
+
+
+##############################################################################
+
+
+class CodeurExpGolomb(CodeurEntropique):
+    """
+    Codeur d'une frame RLE par des codes de Golomb exponentiels.
+    """
+
+    def encode_tableaux(self, runs, levels, debuts):
+        """
+        Encode (en une seule passe) une frame RLE sous forme de tableaux.
+
+        Returns:
+            (octets, decalages_bits): cf. Huffman.encode_tableaux
+        """
+        valeurs_runs = np.asarray(runs, dtype=np.int64) + 1
+        valeurs_levels = entiers_naturels(levels) + 1
+        nb_bits_runs = nb_bits_entiers(valeurs_runs)
+        nb_bits_levels = nb_bits_entiers(valeurs_levels)
+
+        # chaque paire occupe 4 codes : les zéros du préfixe du run, puis sa
+        # valeur (+ 1), et de même pour le level (dont le code complet peut
+        # dépasser bit_io.LONGUEUR_MAX_EMBALLAGE bits)
+        codes = np.stack((np.zeros_like(valeurs_runs), valeurs_runs, np.zeros_like(valeurs_levels), valeurs_levels), axis=1).ravel()
+        longueurs = np.stack((nb_bits_runs - 1, nb_bits_runs, nb_bits_levels - 1, nb_bits_levels), axis=1).ravel()
+
+        non_vides = longueurs > 0
+        writer = BitWriter()
+        writer.ecrit_codes(codes[non_vides], longueurs[non_vides])
+
+        decalages_bits = np.zeros(len(valeurs_runs) + 1, dtype=np.int64)
+        np.cumsum(2 * nb_bits_runs - 1 + 2 * nb_bits_levels - 1, out=decalages_bits[1 : ])
+
+        return(writer.octets(), decalages_bits[debuts])
+
+
+class DecodeurExpGolomb(DecodeurEntropique):
+    """
+    Décodeur associé à CodeurExpGolomb.
+    """
+
+    def decode(self, enc):
+        """
+        Décode le body 'enc' d'un macrobloc (cf. DecodeurEntropique).
+        """
+        return(self.decode_bits(int(enc, 2) if len(enc) > 0 else 0, len(enc)))
+
+
+    def decode_bits(self, valeur, nb_bits):
+        """
+        Décode le body d'un macrobloc donné sous forme d'entier, en lisant
+        directement les codes dans ses bits (cf. exp_golomb.lit_non_signe).
+        """
+        res = []
+        k = 0
+
+        while k < nb_bits:
+            run, k = exp_golomb.lit_non_signe(valeur, nb_bits, k)
+            level, k = exp_golomb.lit_signe(valeur, nb_bits, k)
+            res.append((run, level))
+
+        return(res)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+"""
+Conversions entre espaces de couleurs (RGB/BGR <--> YUV, RGB --> YCbCr),
+appliquées à la frame **entière** en une seule opération matricielle (au lieu
+d'une double boucle Python sur chacun des pixels).
+
+Deux variantes sont proposées :
+    - une variante flottante (float64), qui reproduit exactement les formules
+      historiques de Encoder/Decoder
+    - une variante en virgule fixe (coefficients entiers sur int32, résultat
+      sur int16), pensée pour la Raspberry Pi : les frames uint8 de la PiCamera
+      sont converties sans jamais passer par des float64
+
+Sources pour les coefficients :
+https://fr.wikipedia.org/wiki/YUV
+https://fr.wikipedia.org/wiki/YCbCr
+"""
+
+import numpy as np
+
+##############################################################################
+
+
+# matrices de passage (une ligne par composante de sortie)
+
+MATRICE_RGB_VERS_YUV = np.array([[ 0.299,    0.587,    0.114  ],
+                                 [-0.14713, -0.28886,  0.436  ],
+                                 [ 0.615,   -0.51498, -0.10001]])
+
+MATRICE_YUV_VERS_RGB = np.array([[1.0,  0.0,      1.13983],
+                                 [1.0, -0.39465, -0.5806 ],
+                                 [1.0,  2.03211,  0.0    ]])
+
+MATRICE_RGB_VERS_YCBCR = np.array([[ 0.299,   0.587,   0.114 ],
+                                   [-0.1687, -0.3313,  0.5   ],
+                                   [ 0.5,    -0.4187, -0.0813]])
+
+DECALAGE_YCBCR = np.array([0.0, 128.0, 128.0])
+
+
+# nombre de bits de la partie fractionnaire des coefficients en virgule fixe
+# Avec des entrées uint8, le plus grand accumulateur vaut environ
+# 255 * 1.07 * 2**14 < 2**23 : on reste donc très largement dans un int32
+PRECISION_VIRGULE_FIXE = 14
+
+MATRICE_RGB_VERS_YUV_VIRGULE_FIXE = np.round(MATRICE_RGB_VERS_YUV * 2**PRECISION_VIRGULE_FIXE).astype(np.int32)
+
+
+##############################################################################
+
+
+def _vers_ordre_RGB(image, mode_RPi):
+    """
+    Renvoie une vue de l'image dont les canaux sont dans l'ordre RGB. Si
+    mode_RPi vaut True, l'image d'entrée est au format BGR (OpenCV / PiCamera).
+    """
+    if mode_RPi:
+        return(image[..., ::-1])
+    return(image)
+
+
+def RGB_to_YUV(image, mode_RPi=False):
+    """
+    Convertit une image RGB (ou BGR si mode_RPi vaut True) en image YUV.
+
+    Args:
+        image: tableau de pixels de taille (img_height, img_width, 3)
+        mode_RPi: True si l'image d'entrée est au format BGR
+
+    Returns:
+        image_yuv: tableau (float64) de même taille représentant l'image au format YUV
+    """
+    image_rgb = _vers_ordre_RGB(np.asarray(image, dtype=float), mode_RPi)
+    return(image_rgb @ MATRICE_RGB_VERS_YUV.T)
+
+
+def RGB_to_YCbCr(image):
+    """
+    Convertit une image RGB en image YCbCr.
+
+    Args:
+        image: tableau de pixels de taille (img_height, img_width, 3)
+
+    Returns:
+        image_ycbcr: tableau (float64) de même taille représentant l'image au format YCbCr
+    """
+    image_rgb = np.asarray(image, dtype=float)
+    return(image_rgb @ MATRICE_RGB_VERS_YCBCR.T + DECALAGE_YCBCR)
+
+
+def YUV_to_RGB(yuv_data, mode_RPi=False):
+    """
+    Convertit une image YUV en image RGB (ou BGR si mode_RPi vaut True).
+
+    Args:
+        yuv_data: tableau de taille (img_height, img_width, 3) au format YUV
+        mode_RPi: True si l'on veut une image de sortie au format BGR
+
+    Returns:
+        rgb_data: tableau (float64) de même taille, au format RGB (ou BGR)
+    """
+    rgb_data = np.asarray(yuv_data, dtype=float) @ MATRICE_YUV_VERS_RGB.T
+    return(_vers_ordre_RGB(rgb_data, mode_RPi))
+
+
+def RGB_to_YUV_fixed_point(image, mode_RPi=False):
+    """
+    Variante en virgule fixe de RGB_to_YUV. Les calculs sont faits sur des
+    int32 (coefficients multipliés par 2**PRECISION_VIRGULE_FIXE), puis le
+    résultat est arrondi à l'entier le plus proche et stocké sur des int16.
+
+    Args:
+        image: tableau d'entiers (typiquement uint8) de taille (img_height, img_width, 3)
+        mode_RPi: True si l'image d'entrée est au format BGR
+
+    Returns:
+        image_yuv: tableau (int16) de même taille représentant l'image au format YUV
+    """
+    image_rgb = _vers_ordre_RGB(np.asarray(image), mode_RPi).astype(np.int32)
+
+    accumulateur = image_rgb @ MATRICE_RGB_VERS_YUV_VIRGULE_FIXE.T
+
+    # arrondi à l'entier le plus proche : on ajoute 0.5 (en virgule fixe), puis
+    # on fait un décalage arithmétique (qui arrondit vers -infini)
+    accumulateur += 1 << (PRECISION_VIRGULE_FIXE - 1)
+    accumulateur >>= PRECISION_VIRGULE_FIXE
+
+    return(accumulateur.astype(np.int16))
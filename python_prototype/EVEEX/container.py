@@ -0,0 +1,447 @@
+# -*- coding: utf-8 -*-
+
+"""
+Conteneur de fichier multi-frames (".evx"), avec un index permettant d'accéder
+directement à n'importe quelle frame.
+
+Structure du fichier (entiers big endian) :
+    - en-tête du fichier (TAILLE_EN_TETE octets) : MAGIC_FICHIER, version du
+      format, et nombre d'images par seconde de la vidéo
+    - une suite d'enregistrements, un par frame : MAGIC_ENREGISTREMENT, taille
+      du bitstream de la frame (en octets), type de la frame, horodatage (en ms), puis le
+      bitstream complet de la frame (header, dict, body et tail, cf. bitstream.py)
+    - l'index : pour chaque frame, la position de son enregistrement dans le
+      fichier, la taille de son bitstream, son type et son horodatage
+    - le pied du fichier (TAILLE_PIED octets) : position de l'index, nombre de
+      frames, et MAGIC_INDEX
+
+Le pied étant de taille fixe, et les entrées de l'index aussi, la position de
+la frame n°k se lit en O(1), sans parcourir le fichier. Si le fichier n'a pas
+d'index (écriture interrompue), il est reconstruit en parcourant les
+enregistrements, qui sont autonomes.
+
+Pour ajouter des frames à un conteneur existant, l'index est relu puis
+écrasé par les nouveaux enregistrements, et réécrit à la fermeture.
+
+En lecture, le fichier est projeté en mémoire (mmap) : seules les pages
+effectivement lues (pied, index, et bitstreams des frames demandées) sont
+chargées par le système, quelle que soit la taille de l'enregistrement.
+DecodeurConteneur décode les frames à la demande (par indice ou par
+horodatage), et garde les dernières frames décodées dans un cache LRU, pour
+les allers-retours dans la vidéo.
+"""
+
+import os
+import struct
+import mmap
+import bisect
+from collections import OrderedDict
+
+import numpy as np
+
+from bitstream import BitstreamGenerator
+from decoder import Decoder
+from operateurs import get_DCT_operator
+
+##############################################################################
+
+
+MAGIC_FICHIER = b"EVEX"
+MAGIC_ENREGISTREMENT = b"EVXF"
+MAGIC_INDEX = b"EVXI"
+VERSION_CONTENEUR = 1
+
+# types de frames (toutes les frames sont pour l'instant codées en intra)
+TYPE_FRAME_INTRA = 0
+
+NB_FPS_PAR_DEFAUT = 30
+
+# magic, version, réservé, nombre d'images par seconde
+FORMAT_EN_TETE = ">4sBBH"
+TAILLE_EN_TETE = struct.calcsize(FORMAT_EN_TETE)
+
+# magic, taille du bitstream, type de la frame, horodatage (en ms)
+FORMAT_ENREGISTREMENT = ">4sIBI"
+TAILLE_ENREGISTREMENT = struct.calcsize(FORMAT_ENREGISTREMENT)
+
+# position de l'enregistrement, taille du bitstream, type de la frame, horodatage (en ms)
+FORMAT_ENTREE_INDEX = ">QIBI"
+TAILLE_ENTREE_INDEX = struct.calcsize(FORMAT_ENTREE_INDEX)
+
+# position de l'index, nombre de frames, magic
+FORMAT_PIED = ">QI4s"
+TAILLE_PIED = struct.calcsize(FORMAT_PIED)
+
+# taille du buffer d'écriture : les enregistrements sont écrits d'un bloc
+TAILLE_BUFFER_ECRITURE = 1 << 20
+
+# nombre de frames décodées gardées en cache par DecodeurConteneur
+TAILLE_CACHE_PAR_DEFAUT = 8
+
+
+##############################################################################
+
+
+def lit_en_tete(octets):
+    """
+    Lit l'en-tête d'un conteneur.
+
+    Returns:
+        (version, nb_fps)
+    """
+    if len(octets) < TAILLE_EN_TETE:
+        raise ValueError("Fichier trop court pour être un conteneur EVEEX")
+
+    (magic, version, _, nb_fps) = struct.unpack_from(FORMAT_EN_TETE, octets)
+
+    if magic != MAGIC_FICHIER:
+        raise ValueError("Le fichier n'est pas un conteneur EVEEX")
+
+    if version != VERSION_CONTENEUR:
+        raise ValueError(f"Version du conteneur non supportée : {version}")
+
+    return(version, nb_fps)
+
+
+def lit_pied(pied, taille_fichier):
+    """
+    Lit le pied d'un conteneur (ses TAILLE_PIED derniers octets).
+
+    Returns:
+        (position_index, nb_frames), ou None si le conteneur n'a pas d'index valide
+    """
+    if taille_fichier < TAILLE_EN_TETE + TAILLE_PIED:
+        return(None)
+
+    (position_index, nb_frames, magic) = struct.unpack_from(FORMAT_PIED, pied)
+
+    if magic != MAGIC_INDEX or position_index + nb_frames * TAILLE_ENTREE_INDEX + TAILLE_PIED != taille_fichier:
+        return(None)
+
+    return(position_index, nb_frames)
+
+
+def lit_entrees_index(octets, nb_frames, debut=0):
+    """
+    Renvoie la liste des nb_frames entrées (position, taille, type_frame,
+    horodatage) de l'index commençant à l'octet n°debut.
+    """
+    return([struct.unpack_from(FORMAT_ENTREE_INDEX, octets, debut + k * TAILLE_ENTREE_INDEX) for k in range(nb_frames)])
+
+
+def lit_index(octets):
+    """
+    Lit l'index d'un conteneur, ou le reconstruit en parcourant ses
+    enregistrements s'il n'en a pas.
+
+    Args:
+        octets: contenu complet du fichier (bytes, mmap, ...)
+
+    Returns:
+        (index, fin_enregistrements): liste des tuples (position, taille,
+        type_frame, horodatage) de chaque frame, et position de la fin du
+        dernier enregistrement (là où il faut écrire les frames ajoutées)
+    """
+    taille_fichier = len(octets)
+
+    pied = lit_pied(octets[taille_fichier - TAILLE_PIED : ], taille_fichier)
+    if pied is not None:
+        (position_index, nb_frames) = pied
+        return(lit_entrees_index(octets, nb_frames, position_index), position_index)
+
+    # pas d'index valide : on parcourt les enregistrements complets (le parcours
+    # s'arrête au 1er octet qui n'est pas le début d'un enregistrement, par
+    # exemple au début d'un index incomplet)
+    index = []
+    position = TAILLE_EN_TETE
+
+    while position + TAILLE_ENREGISTREMENT <= taille_fichier:
+        (magic, taille, type_frame, horodatage) = struct.unpack_from(FORMAT_ENREGISTREMENT, octets, position)
+
+        if magic != MAGIC_ENREGISTREMENT or position + TAILLE_ENREGISTREMENT + taille > taille_fichier:
+            break
+
+        index.append((position, taille, type_frame, horodatage))
+        position += TAILLE_ENREGISTREMENT + taille
+
+    return(index, position)
+
+
+##############################################################################
+
+
+class EcritureConteneur:
+    """
+    Écriture (ou ajout) de frames dans un conteneur. L'index n'est écrit qu'à
+    la fermeture (cf. fermer).
+    """
+
+    def __init__(self, chemin, nb_fps=NB_FPS_PAR_DEFAUT, ajout=False):
+        """
+        Args:
+            chemin: chemin du fichier
+            nb_fps: nombre d'images par seconde (utilisé pour l'horodatage par
+                    défaut des frames, et ignoré en mode ajout)
+            ajout: si True et que le fichier existe, les frames sont ajoutées
+                   à la suite de celles qu'il contient déjà
+        """
+        self.chemin = chemin
+
+        if ajout and os.path.exists(chemin):
+            self.fichier = open(chemin, "r+b", buffering=TAILLE_BUFFER_ECRITURE)
+
+            if os.fstat(self.fichier.fileno()).st_size < TAILLE_EN_TETE:
+                self.fichier.close()
+                raise ValueError("Fichier trop court pour être un conteneur EVEEX")
+
+            # comme pour LectureConteneur, le fichier est projeté en mémoire :
+            # seuls l'en-tête, le pied et l'index sont lus (les enregistrements
+            # ne sont parcourus que si l'index n'est pas valide)
+            with mmap.mmap(self.fichier.fileno(), 0, access=mmap.ACCESS_READ) as octets:
+                (_, self.nb_fps) = lit_en_tete(octets)
+                (self.index, fin_enregistrements) = lit_index(octets)
+
+            # l'ancien index est écrasé par les nouvelles frames
+            self.fichier.seek(fin_enregistrements)
+            self.fichier.truncate()
+
+        else:
+            self.fichier = open(chemin, "wb", buffering=TAILLE_BUFFER_ECRITURE)
+            self.nb_fps = nb_fps
+            self.index = []
+
+            self.fichier.write(struct.pack(FORMAT_EN_TETE, MAGIC_FICHIER, VERSION_CONTENEUR, 0, self.nb_fps))
+
+
+    def ajoute_frame(self, bitstream, type_frame=TYPE_FRAME_INTRA, horodatage=None):
+        """
+        Ajoute le bitstream complet d'une frame à la fin du conteneur.
+
+        Args:
+            bitstream (bytes): bitstream de la frame (cf. BitstreamGenerator.encode_frame_RLE)
+            type_frame: type de la frame (TYPE_FRAME_INTRA)
+            horodatage: instant de la frame (en ms), qui doit suivre celui de
+                        la frame précédente ; par défaut, il est déduit du
+                        numéro de la frame et de nb_fps
+
+        Returns:
+            num_frame: indice de la frame dans le conteneur
+        """
+        if horodatage is None:
+            horodatage = (1000 * len(self.index)) // self.nb_fps
+
+            if len(self.index) > 0:
+                horodatage = max(horodatage, self.index[-1][3] + 1)
+
+        if len(self.index) > 0 and horodatage < self.index[-1][3]:
+            raise ValueError(f"Horodatage de frame non croissant : {horodatage} ms < {self.index[-1][3]} ms")
+
+        position = self.fichier.tell()
+        self.fichier.write(struct.pack(FORMAT_ENREGISTREMENT, MAGIC_ENREGISTREMENT, len(bitstream), type_frame, horodatage))
+        self.fichier.write(bitstream)
+
+        self.index.append((position, len(bitstream), type_frame, horodatage))
+
+        return(len(self.index) - 1)
+
+
+    def fermer(self):
+        """
+        Écrit l'index et le pied du conteneur, puis ferme le fichier.
+        """
+        position_index = self.fichier.tell()
+
+        self.fichier.write(b"".join(struct.pack(FORMAT_ENTREE_INDEX, *entree) for entree in self.index))
+        self.fichier.write(struct.pack(FORMAT_PIED, position_index, len(self.index), MAGIC_INDEX))
+
+        self.fichier.close()
+
+
+    def __enter__(self):
+        return(self)
+
+
+    def __exit__(self, *args):
+        self.fermer()
+
+
+#----------------------------------------------------------------------------#
+
+
+class LectureConteneur:
+    """
+    Lecture des frames d'un conteneur, dans n'importe quel ordre. Le fichier
+    est projeté en mémoire : à l'ouverture, seuls l'en-tête, le pied et l'index
+    sont lus.
+    """
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self.fichier = open(chemin, "rb")
+
+        taille_fichier = os.fstat(self.fichier.fileno()).st_size
+        if taille_fichier < TAILLE_EN_TETE:
+            self.fichier.close()
+            raise ValueError("Fichier trop court pour être un conteneur EVEEX")
+
+        self.donnees = mmap.mmap(self.fichier.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (_, self.nb_fps) = lit_en_tete(self.donnees)
+
+        # l'index est lu directement à sa position (cf. lit_pied), ou bien
+        # reconstruit en parcourant le fichier s'il n'est pas valide
+        (self.index, _) = lit_index(self.donnees)
+
+        # les horodatages des frames sont croissants (cf. EcritureConteneur.ajoute_frame)
+        self.horodatages = [entree[3] for entree in self.index]
+
+
+    def __len__(self):
+        return(len(self.index))
+
+
+    def lit_frame(self, num_frame):
+        """
+        Renvoie le bitstream de la frame n°num_frame (indice dans le conteneur).
+        Seules les pages du fichier contenant cette frame sont lues.
+
+        Returns:
+            bitstream (bytes): bitstream complet de la frame
+        """
+        (position, taille, _, _) = self.index[num_frame]
+
+        debut = position + TAILLE_ENREGISTREMENT
+        return(self.donnees[debut : debut + taille])
+
+
+    def num_frame_a(self, horodatage):
+        """
+        Renvoie l'indice de la frame affichée à l'instant 'horodatage' (en ms),
+        i.e. la dernière frame dont l'horodatage est inférieur ou égal à celui-ci
+        (la 1ère frame si l'instant précède toutes les frames).
+        """
+        return(max(0, bisect.bisect_right(self.horodatages, horodatage) - 1))
+
+
+    def type_frame(self, num_frame):
+        """
+        Renvoie le type de la frame n°num_frame (TYPE_FRAME_INTRA).
+        """
+        return(self.index[num_frame][2])
+
+
+    def horodatage(self, num_frame):
+        """
+        Renvoie l'horodatage (en ms) de la frame n°num_frame.
+        """
+        return(self.index[num_frame][3])
+
+
+    def fermer(self):
+        self.donnees.close()
+        self.fichier.close()
+
+
+    def __enter__(self):
+        return(self)
+
+
+    def __exit__(self, *args):
+        self.fermer()
+
+
+#----------------------------------------------------------------------------#
+
+
+class DecodeurConteneur(LectureConteneur):
+    """
+    Lecture d'un conteneur avec décodage des frames à la demande : une frame
+    n'est décodée que lorsqu'elle est demandée, et les dernières frames
+    décodées sont gardées dans un cache LRU.
+    """
+
+    def __init__(self, chemin, taille_cache=TAILLE_CACHE_PAR_DEFAUT, mode_RPi=False, decodeur_parallele=None):
+        """
+        Args:
+            chemin: chemin du conteneur
+            taille_cache: nombre maximal de frames décodées gardées en mémoire
+            mode_RPi: True si l'on veut des frames décodées au format BGR
+            decodeur_parallele: ParallelDecoder (cf. parallel_decoder.py) avec
+                                lequel décoder les frames, ou None pour les
+                                décoder dans le processus courant
+        """
+        super().__init__(chemin)
+
+        self.taille_cache = taille_cache
+        self.mode_RPi = mode_RPi
+        self.decodeur_parallele = decodeur_parallele
+        self.dec = Decoder()
+
+        # frames décodées, de la moins récemment utilisée à la plus récente
+        self.cache = OrderedDict()
+
+
+    def frame(self, num_frame):
+        """
+        Renvoie la frame n°num_frame, décodée (ou bien lue dans le cache).
+
+        Returns:
+            image_decodee: tableau d'entiers entre 0 et 255 (np.uint8), de
+                           taille (img_height, img_width, 3), au format RGB
+                           (ou BGR si mode_RPi vaut True)
+        """
+        if num_frame < 0:
+            num_frame += len(self)
+
+        if num_frame in self.cache:
+            self.cache.move_to_end(num_frame)
+            return(self.cache[num_frame])
+
+        image_decodee = self.decode_frame(num_frame)
+
+        if self.taille_cache > 0:
+            self.cache[num_frame] = image_decodee
+            if len(self.cache) > self.taille_cache:
+                self.cache.popitem(last=False)
+
+        return(image_decodee)
+
+
+    def frame_a(self, horodatage):
+        """
+        Renvoie la frame décodée affichée à l'instant 'horodatage' (en ms, cf.
+        num_frame_a et frame).
+        """
+        return(self.frame(self.num_frame_a(horodatage)))
+
+
+    def decode_frame(self, num_frame):
+        """
+        Décode la frame n°num_frame (sans passer par le cache) : tous les
+        paramètres de décodage sont lus dans le header de son bitstream.
+        """
+        bitstream = self.lit_frame(num_frame)
+
+        if self.decodeur_parallele is not None:
+            # bitstream --> frame YUV, par bandes de macroblocs
+            dec_yuv_data = self.decodeur_parallele.decode_frame(bitstream)
+
+        else:
+            (_, img_size, macroblock_size, sous_echantillonnage, qualite, type_matrice,
+             _, _, _) = BitstreamGenerator.decode_header(bitstream)
+
+            # bitstream --> frame RLE --> frame YUV
+            dec_rle_data = BitstreamGenerator.decode_bitstream_RLE(bitstream)
+            dec_yuv_data = self.dec.recompose_frame_via_DCT(dec_rle_data, img_size, macroblock_size, get_DCT_operator(macroblock_size),
+                                                            sous_echantillonnage=sous_echantillonnage,
+                                                            qualite=qualite, type_matrice=type_matrice)
+
+        # frame YUV --> frame RGB (ou BGR), dont les valeurs sont ramenées entre 0 et 255
+        dec_rgb_data = self.dec.YUV_to_RGB(dec_yuv_data, mode_RPi=self.mode_RPi)
+
+        return(np.round(np.clip(dec_rgb_data, 0, 255)).astype(np.uint8))
+
+
+    def fermer(self):
+        self.cache.clear()
+        super().fermer()
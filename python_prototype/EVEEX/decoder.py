@@ -1,8 +1,14 @@
 # -*- coding: utf-8 -*-
 
+from math import isqrt
 import numpy as np
 from bitstream import BitstreamGenerator
 from iDTT import decode_iDTT
+import color_conversion
+from zigzag import decode_zigzag_par_lots
+import rle
+import chroma
+import quantification
 
 ###############################################################################
 
@@ -19,7 +25,7 @@ class Decoder:
         les méthodes statiques de la classe Huffman.
         
         Args:
-            bitstream (string): bitstream complet associé à une frame RLE
+            bitstream (bytes): bitstream complet associé à une frame RLE
         
         Returns:
             rle_data: paires de données issues de la RLE
@@ -28,6 +34,20 @@ class Decoder:
         return rle_data
     
     
+    def decode_header(self, bitstream):
+        """
+        Permet de lire les infos contenues dans le header d'un bitstream.
+        
+        Args:
+            bitstream (bytes): bitstream associé à une frame RLE
+        
+        Returns:
+            (frame_id, img_size, macroblock_size, sous_echantillonnage, qualite, type_matrice, id_table, symbolisation, id_codeur):
+            cf. BitstreamGenerator.decode_header
+        """
+        return BitstreamGenerator.decode_header(bitstream)
+    
+    
     def decode_run_length(self, rle_data):
         """
         Décode les paires de valeurs issues de la RLE et retourne
@@ -39,13 +59,12 @@ class Decoder:
         Returns:
             quantized_data: liste de valeurs quantifiées
         """
-        tab = np.array([], dtype=int)
+        (runs, levels, debuts) = rle.depuis_liste_RLE([rle_data])
         
-        for x in rle_data:
-            tab = np.concatenate((tab, np.zeros((x[0],), dtype=int)))
-            tab = np.concatenate((tab, np.array([x[1]], dtype=int)))
+        # la longueur totale est la somme des (run + 1)
+        longueur = int(np.sum(runs, dtype=int)) + runs.size
         
-        return tab
+        return rle.decode_run_level(runs, levels, debuts, longueur)[0]
     
     
     def decode_zigzag(self, quantized_data):
@@ -53,66 +72,20 @@ class Decoder:
         Decode une liste de valeurs quantifiées en un tableau de valeurs
         en respectant le principe de l'encodage en zig zag.
         
+        Le parcours est lu dans une table précalculée (cf. zigzag.py).
+        
         Args:
             quantized_data: liste de valeurs quantifiées
         
         Returns:
             dct_tab: tableau de valeurs issues de la transformation en cosinus
         """
-        # On divise en 3 la suite de valeurs quantifiées pour avoir les 3 couches
-        split_quantized_data = np.array_split(quantized_data, 3)
-        
-        n = int(split_quantized_data[0].size ** (1 / 2))
-        
-        # tableau de sortie
-        res2 = np.zeros((n, n, 3), dtype=int)
-        
-        k = 0 # numéro de la couche actuelle (0 <= k <= 2)
-        
-        # normalement len(split_quantized_data) = 3
-        for data in split_quantized_data:
-            up = False
-            # Position du curseur
-            i, j = 0, 0
-            # couche qui va être mise à jour
-            res = np.zeros((n, n), dtype=int)
-            # Pour chacun des points qui constituent l'image
-            for t in range(data.size):
-                # On ajoute le point courant
-                if data[t] != 0:
-                    res[i, j] = data[t]
-                
-                # Si on parcoure l'image vers le haut
-                if up:
-                    if j == (n - 1):
-                        i += 1
-                        up = False  # On change de direction
-                    elif i == 0:
-                        j += 1
-                        up = False  # On change de direction
-                    else:
-                        # Sinon on parcoure la diagonale
-                        i -= 1
-                        j += 1
-                # Si on parcoure l'image vers le bas
-                else:
-                    if i == (n - 1):
-                        j += 1
-                        up = True  # On change de direction
-                    elif j == 0:
-                        i += 1
-                        up = True  # On change de direction
-                    else:
-                        # Sinon on parcoure la diagonale
-                        j -= 1
-                        i += 1
-            
-            # on veut renvoyer un tableau comprenant les 3 tableaux des couches
-            res2[:, :, k] = res
-            
-            k += 1 # mise à jour du numéro de la couche à mettre à jour
+        quantized_data = np.asarray(quantized_data, dtype=int)
         
-        return res2
+        # les 3 couches sont mises bout à bout
+        n = isqrt(quantized_data.size // 3)
+        
+        return decode_zigzag_par_lots(quantized_data[np.newaxis], n)[0]
     
     
     def decode_DCT(self, operateur_DCT, dct_data):
@@ -142,82 +115,218 @@ class Decoder:
         return(yuv_data)
     
     
+    def decode_DCT_par_lots(self, operateur_DCT, dct_blocs):
+        """
+        Applique la DCT inverse à une pile de macroblocs en une seule fois
+        (pendant de Encoder.apply_DCT_par_lots).
+        
+        Args:
+            operateur_DCT : matrice orthogonale qui sert d'opérateur à la DCT
+            dct_blocs: tableau de taille (nb_macroblocs, N, N, 3) ou (nb_macroblocs, N, N)
+        
+        Returns:
+            yuv_blocs: tableau de même taille représentant les macroblocs décodés
+        """
+        # on place l'éventuel axe des couches avant les 2 axes du macrobloc
+        if dct_blocs.ndim == 4:
+            dct_blocs = np.moveaxis(dct_blocs, 3, 1)
+        
+        yuv_blocs = operateur_DCT.T @ dct_blocs @ operateur_DCT
+        
+        if yuv_blocs.ndim == 4:
+            yuv_blocs = np.moveaxis(yuv_blocs, 1, 3)
+        
+        return(yuv_blocs)
+    
+    
+    @staticmethod
+    def assemble_macroblocs(blocs, img_size):
+        """
+        Réassemble une pile de macroblocs (rangés ligne par ligne) en une image.
+        
+        Args:
+            blocs: tableau de taille (nb_macroblocs, N, N, 3) ou (nb_macroblocs, N, N)
+            img_size: tuple égal à (img_width, img_height)
+        
+        Returns:
+            image: tableau de taille (img_height, img_width, 3) (ou (img_height, img_width))
+        """
+        img_width, img_height = img_size
+        N = blocs.shape[1]
+        
+        nb_lignes, nb_colonnes = img_height // N, img_width // N
+        
+        image = blocs.reshape((nb_lignes, nb_colonnes, N, N) + blocs.shape[3:]).swapaxes(1, 2)
+        
+        return(image.reshape((img_height, img_width) + blocs.shape[3:]))
+    
+    
     def YUV_to_RGB(self, yuv_data, mode_RPi=False):
         """
         Convertit une image depuis une représentation YUV (Luminance, Chrominance)
         vers une représentation RGB (Rouge, Vert, Bleu)
         
+        La conversion est faite sur la frame entière en une seule opération
+        matricielle (cf. color_conversion.py).
+        
         Args:
             image: tableau de pixels représentant l'image au format YUV
+            mode_RPi: True si l'on veut une image de sortie au format BGR
         
         Returns:
             image_rgb: tableau de pixels représentant l'image au format RGB
         """
-        rgb_data = np.zeros(yuv_data.shape)
-        
-        # Pour chaque pixel de l'image
-        for i in range(yuv_data.shape[0]):
-            for j in range(yuv_data.shape[1]):
-                y, u, v = yuv_data[i, j]
-                # On recalcule les coefficients RGB
-                # Source : https://fr.wikipedia.org/wiki/YUV
-                r = y + 1.13983 * v
-                g = y - 0.39465 * u - 0.5806 * v
-                b = y + 2.03211 * u
-                
-                if mode_RPi:
-                    # format BGR (et non RGB)
-                    rgb_data[i, j] = [b, g, r]
-                else:
-                    rgb_data[i, j] = [r, g, b]
-        
-        # On retourne l'image ainsi constituée
-        return rgb_data
+        return color_conversion.YUV_to_RGB(yuv_data, mode_RPi=mode_RPi)
     
     
-    def recompose_frame_via_DCT(self, frame_RLE, img_size, macroblock_size, A):
+    def recompose_macroblocs_via_DCT(self, tableaux_RLE, num_premier_macrobloc, img_size, macroblock_size, A,
+                                     sous_echantillonnage=chroma.CHROMA_444, qualite=quantification.QUALITE_SEUIL,
+                                     type_matrice=quantification.MATRICE_JPEG):
         """
-        Recompose une frame YUV à partir des données encodées d'une frame RLE,
-        grâce à la DCT classique.
+        RLE inverse, déquantification, zig zag inverse et DCT inverse d'une suite
+        de macroblocs consécutifs d'une frame (éventuellement la frame entière),
+        en une seule fois pour tous ces macroblocs.
+        
+        Si qualite est non nulle, les coefficients sont déquantifiés (multipliés
+        par leurs pas de quantification, cf. quantification.py).
         
         Args:
-            frame_RLE: frame entière encodée (liste de listes de tuples RLE)
+            tableaux_RLE: macroblocs encodés, sous forme de tableaux (runs, levels, debuts)
+            num_premier_macrobloc: numéro (dans la frame) du 1er de ces macroblocs
+            img_size, macroblock_size, A, sous_echantillonnage, qualite, type_matrice:
+                cf. recompose_frame_tableaux_via_DCT
+        
+        Returns:
+            dec_yuv_blocs: tableau de taille (nb_macroblocs, N, N, 3) en 4:4:4, et
+                           (nb_macroblocs, N, N) sinon (macroblocs de Y, puis de U,
+                           puis de V, cf. chroma.py)
+        """
+        (runs, levels, debuts) = tableaux_RLE
+        
+        if not chroma.est_planaire(sous_echantillonnage):
+            # RLE inverse puis zig zag inverse de tous les macroblocs en une seule fois
+            dec_quantized_lines = rle.decode_run_level(runs, levels, debuts, 3 * macroblock_size**2)
+            
+            if qualite != quantification.QUALITE_SEUIL:
+                dec_quantized_lines = dec_quantized_lines * quantification.vecteur_quantification(type_matrice, macroblock_size, qualite)
+            
+            dec_DCT_blocs = decode_zigzag_par_lots(dec_quantized_lines, macroblock_size)
+            
+            # DCT inverse de tous les macroblocs en une seule fois
+            return(self.decode_DCT_par_lots(A, dec_DCT_blocs))
+        
+        dec_quantized_lines = rle.decode_run_level(runs, levels, debuts, macroblock_size**2)
+        
+        if qualite != quantification.QUALITE_SEUIL:
+            # les macroblocs de Y sont les nb_macroblocs_Y premiers de la frame
+            nb_macroblocs_Y, _ = chroma.nb_macroblocs_par_plan(img_size, macroblock_size, sous_echantillonnage)
+            est_Y = num_premier_macrobloc + np.arange(len(dec_quantized_lines)) < nb_macroblocs_Y
+            
+            (vecteur_Y, vecteur_UV) = quantification.vecteur_quantification(type_matrice, macroblock_size, qualite, sous_echantillonnage)
+            dec_quantized_lines = dec_quantized_lines.astype(float)
+            dec_quantized_lines[est_Y] *= vecteur_Y
+            dec_quantized_lines[~est_Y] *= vecteur_UV
+        
+        dec_DCT_blocs = decode_zigzag_par_lots(dec_quantized_lines, macroblock_size, nb_couches=1)
+        
+        return(self.decode_DCT_par_lots(A, dec_DCT_blocs))
+    
+    
+    def assemble_frame(self, dec_yuv_blocs, img_size, macroblock_size, sous_echantillonnage=chroma.CHROMA_444):
+        """
+        Réassemble les macroblocs décodés (cf. recompose_macroblocs_via_DCT) de
+        toute une frame en une image YUV.
+        
+        En 4:2:2 et en 4:2:0, les plans U et V sont sur-échantillonnés (cf.
+        chroma.py) : l'image renvoyée est donc toujours à pleine résolution.
+        
+        Returns:
+            image_yuv_decodee: tableau représentant l'image YUV décodée, de 
+                               taille (img_height, img_width, 3)
+        """
+        if not chroma.est_planaire(sous_echantillonnage):
+            return(self.assemble_macroblocs(dec_yuv_blocs, img_size))
+        
+        img_width, img_height = img_size
+        nb_macroblocs_Y, nb_macroblocs_chroma = chroma.nb_macroblocs_par_plan(img_size, macroblock_size, sous_echantillonnage)
+        
+        taille_chroma = chroma.taille_plan_chroma(img_size, sous_echantillonnage)
+        taille_chroma_complete = chroma.taille_plan_complete(taille_chroma, macroblock_size)
+        
+        # les macroblocs de Y, puis ceux de U, puis ceux de V
+        bornes = [0, nb_macroblocs_Y, nb_macroblocs_Y + nb_macroblocs_chroma, nb_macroblocs_Y + 2 * nb_macroblocs_chroma]
+        
+        image_yuv_decodee = np.zeros((img_height, img_width, 3))
+        image_yuv_decodee[:, :, 0] = self.assemble_macroblocs(dec_yuv_blocs[bornes[0] : bornes[1]], img_size)
+        
+        for k in [1, 2]:
+            plan_chroma = self.assemble_macroblocs(dec_yuv_blocs[bornes[k] : bornes[k+1]], taille_chroma_complete)
+            plan_chroma = plan_chroma[ : taille_chroma[1], : taille_chroma[0]]
+            image_yuv_decodee[:, :, k] = chroma.sur_echantillonne(plan_chroma, sous_echantillonnage)
+        
+        return(image_yuv_decodee)
+    
+    
+    def recompose_frame_tableaux_via_DCT(self, tableaux_RLE, img_size, macroblock_size, A, sous_echantillonnage=chroma.CHROMA_444,
+                                         qualite=quantification.QUALITE_SEUIL, type_matrice=quantification.MATRICE_JPEG):
+        """
+        Recompose une frame YUV à partir des données encodées d'une frame RLE
+        sous forme de tableaux (cf. rle.py), grâce à la DCT classique. Toutes
+        les étapes sont faites sur tous les macroblocs de la frame à la fois
+        (cf. recompose_macroblocs_via_DCT et assemble_frame).
+        
+        En 4:2:2 et en 4:2:0, les plans U et V sont sur-échantillonnés après
+        la DCT inverse (cf. chroma.py) : l'image renvoyée est donc toujours à
+        pleine résolution.
+        
+        Si qualite est non nulle, les coefficients sont déquantifiés (multipliés
+        par leurs pas de quantification, cf. quantification.py).
+        
+        Args:
+            tableaux_RLE: frame entière encodée, sous forme de tableaux (runs, levels, debuts)
             img_size: tuple égal à (img_width, img_height)
             macroblock_size: taille (d'un côté) d'un macrobloc
             A: opérateur orthogonal de la DCT, de taille (macroblock_size, macroblock_size)
+            sous_echantillonnage: CHROMA_444 (par défaut), CHROMA_422 ou CHROMA_420
+            qualite: facteur de qualité utilisé lors de l'encodage (QUALITE_SEUIL
+                     par défaut, ie pas de déquantification)
+            type_matrice: type de matrice de quantification utilisé lors de l'encodage
         
         Returns:
             image_yuv_decodee: tableau représentant l'image YUV décodée, de 
                                taille (img_height, img_width, 3)
         """
+        dec_yuv_blocs = self.recompose_macroblocs_via_DCT(tableaux_RLE, 0, img_size, macroblock_size, A,
+                                                          sous_echantillonnage=sous_echantillonnage,
+                                                          qualite=qualite, type_matrice=type_matrice)
         
-        # définition des paramètres de l'image
-        img_width = img_size[0]
-        img_height = img_size[1]
-        total_num_of_macroblocks = (img_width * img_height) // macroblock_size**2
-        num_macroblocks_per_line = img_width // macroblock_size
+        return(self.assemble_frame(dec_yuv_blocs, img_size, macroblock_size, sous_echantillonnage))
+    
+    
+    def recompose_frame_via_DCT(self, frame_RLE, img_size, macroblock_size, A, sous_echantillonnage=chroma.CHROMA_444,
+                                qualite=quantification.QUALITE_SEUIL, type_matrice=quantification.MATRICE_JPEG):
+        """
+        Recompose une frame YUV à partir des données encodées d'une frame RLE,
+        grâce à la DCT classique.
         
-        image_yuv_decodee = np.zeros((img_height, img_width, 3), dtype=float)
+        Args:
+            frame_RLE: frame entière encodée (liste de listes de tuples RLE)
+            img_size: tuple égal à (img_width, img_height)
+            macroblock_size: taille (d'un côté) d'un macrobloc
+            A: opérateur orthogonal de la DCT, de taille (macroblock_size, macroblock_size)
+            sous_echantillonnage: CHROMA_444 (par défaut), CHROMA_422 ou CHROMA_420
+            qualite: facteur de qualité utilisé lors de l'encodage (QUALITE_SEUIL par défaut)
+            type_matrice: type de matrice de quantification utilisé lors de l'encodage
         
-        for num_macrobloc in range(total_num_of_macroblocks):
-            (i_macrobloc, j_macrobloc) = divmod(num_macrobloc, num_macroblocks_per_line)
-            
-            i_debut_macrobloc = i_macrobloc * macroblock_size
-            i_fin_macrobloc = i_debut_macrobloc + macroblock_size
-            
-            j_debut_macrobloc = j_macrobloc * macroblock_size
-            j_fin_macrobloc = j_debut_macrobloc + macroblock_size
-            
-            macrobloc = np.copy(frame_RLE[num_macrobloc])
-            
-            # c'est ici que l'on décode les données du macrobloc
-            dec_quantized_data = self.decode_run_length(macrobloc)
-            dec_DCT_data = self.decode_zigzag(dec_quantized_data)
-            dec_yuv_data = self.decode_DCT(A, dec_DCT_data)
-            
-            image_yuv_decodee[i_debut_macrobloc : i_fin_macrobloc, j_debut_macrobloc : j_fin_macrobloc, :] = dec_yuv_data
+        Returns:
+            image_yuv_decodee: tableau représentant l'image YUV décodée, de 
+                               taille (img_height, img_width, 3)
+        """
+        tableaux_RLE = rle.depuis_liste_RLE(frame_RLE)
         
-        return(image_yuv_decodee)
+        return(self.recompose_frame_tableaux_via_DCT(tableaux_RLE, img_size, macroblock_size, A,
+                                                     sous_echantillonnage=sous_echantillonnage,
+                                                     qualite=qualite, type_matrice=type_matrice))
     
     
     def recompose_frame_via_iDTT(self, frame_RLE, img_size, macroblock_size, P, S):
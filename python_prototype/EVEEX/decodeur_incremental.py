@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+
+"""
+Décodage incrémental des frames côté récepteur.
+
+Au lieu d'accumuler tous les paquets d'une frame jusqu'à son tail, puis de
+tout décoder d'un coup (cf. BitstreamGenerator.decode_bitstream_RLE), le
+DecodeurIncremental est alimenté paquet par paquet, au fil de la réception.
+C'est une machine à états :
+    - ATTENTE_HEADER : le header de la frame est lu, ce qui donne tous les
+                       paramètres nécessaires au décodage
+    - RECEPTION_DICT : les paquets du dict sont collectés ; dès que le dernier
+                       arrive (cf. bitstream.DRAPEAU_DERNIER_PAQUET), le
+                       dictionnaire est décodé et le décodeur entropique créé
+    - RECEPTION_BODY : dès que le dernier segment d'un macrobloc arrive (un
+                       paquet du body regroupe plusieurs macroblocs), le
+                       macrobloc est décodé (décodage entropique) ; la RLE
+                       inverse, la déquantification et la DCT inverse sont
+                       faites par lots de macroblocs consécutifs
+Au tail, seul le dernier lot reste à transformer avant de réassembler l'image :
+le décodage d'une frame se fait donc pendant sa réception, et la latence entre
+la réception du tail et l'image décodée est celle d'un seul lot.
+
+Les macroblocs devant être décodés dans l'ordre (cf. codage_entropique.py),
+les paquets doivent arriver dans l'ordre où ils ont été générés.
+"""
+
+import numpy as np
+
+from bitstream import BitstreamGenerator, HEADER_MSG, DICT_MSG, INDEX_MSG, BODY_MSG
+from bit_io import chaine_de_bits, concatene_segments
+from decoder import Decoder
+from operateurs import get_DCT_operator
+import chroma
+import rle
+
+##############################################################################
+
+
+# états du décodeur
+ATTENTE_HEADER = 0
+RECEPTION_DICT = 1
+RECEPTION_BODY = 2
+
+
+##############################################################################
+
+
+class DecodeurIncremental:
+    """
+    Décodeur de frames alimenté paquet par paquet (cf. recoit). Une même
+    instance décode toutes les frames d'un flux, les unes après les autres.
+    """
+
+    def __init__(self, taille_lot=None):
+        """
+        Args:
+            taille_lot: nombre de macroblocs transformés (RLE inverse, DCT
+                        inverse, etc.) à la fois ; par défaut, le nombre de
+                        macroblocs d'une ligne de l'image
+        """
+        self.taille_lot = taille_lot
+        self.dec = Decoder()
+
+        # opérateurs de la DCT, par taille de macrobloc
+        self.operateurs_DCT = {}
+
+        # début d'un paquet reçu incomplet, complété à la réception suivante
+        self.reste = b""
+
+        self.etat = ATTENTE_HEADER
+
+
+    def recoit(self, donnees):
+        """
+        Traite les paquets reçus, dans l'ordre. Un paquet coupé en fin de
+        'donnees' est gardé de côté jusqu'à la réception de sa suite.
+
+        Args:
+            donnees: bytes contenant un ou plusieurs paquets (en général un seul,
+                     tel que reçu par le serveur, cf. network_transmission.py)
+
+        Returns:
+            images: liste des images YUV entièrement décodées grâce à ces
+                    paquets (en général vide, ou bien une seule image si le
+                    tail d'une frame a été reçu), de taille (img_height, img_width, 3)
+        """
+        if len(self.reste) > 0:
+            donnees = self.reste + bytes(donnees)
+            self.reste = b""
+
+        # les données utiles des paquets sont gardées sous forme de vues, sans copie
+        vue = memoryview(donnees)
+        images = []
+        debut = 0
+
+        while debut < len(vue):
+            # taille_paquet vaut None si les métadonnées du paquet sont elles-mêmes coupées
+            taille_paquet = BitstreamGenerator.taille_paquet(vue, debut)
+
+            if taille_paquet is None or len(vue) - debut < taille_paquet:
+                self.reste = bytes(vue[debut : ])
+                break
+
+            image = self.traite_paquet(vue, debut)
+            if image is not None:
+                images.append(image)
+
+            debut += taille_paquet
+
+        return(images)
+
+
+    def traite_paquet(self, vue, debut):
+        """
+        Fait avancer la machine à états avec le paquet commençant à l'octet
+        n°debut de 'vue'.
+
+        Returns:
+            image_yuv_decodee: image YUV de la frame si le paquet est son tail,
+                               None sinon
+        """
+        (type_msg, ecart_macrobloc, segments, fin) = BitstreamGenerator.lit_paquet(vue, debut)
+
+        if type_msg == HEADER_MSG:
+            if self.etat != ATTENTE_HEADER:
+                raise ValueError(f"Header reçu alors que la frame n°{self.frame_id} n'est pas terminée")
+
+            self.commence_frame(vue[debut : fin])
+            return(None)
+
+        if self.etat == ATTENTE_HEADER:
+            raise ValueError(f"Paquet de type {type_msg} reçu avant le header de sa frame")
+
+        if type_msg == DICT_MSG:
+            if self.etat != RECEPTION_DICT:
+                raise ValueError(f"Paquet du dict reçu après le début du body de la frame n°{self.frame_id}")
+
+            (debut_donnees, taille_donnees) = segments[0]
+            self.segments_dict.append((vue[debut_donnees : fin], taille_donnees))
+
+            if BitstreamGenerator.est_dernier_paquet(vue, debut):
+                self.cree_decodeur()
+            return(None)
+
+        # l'index du body (facultatif) ne sert qu'à l'accès direct aux macroblocs :
+        # les paquets étant reçus dans l'ordre, il est ignoré
+        if type_msg == INDEX_MSG:
+            return(None)
+
+        # une frame peut ne pas avoir de dict (ou bien un dict dont le dernier
+        # paquet n'est pas signalé) : le décodeur est alors créé ici
+        if self.etat == RECEPTION_DICT:
+            self.cree_decodeur()
+
+        if type_msg == BODY_MSG:
+            # les numéros de macroblocs sont écrits sous forme d'écarts (cf. BitstreamGenerator.construct_body)
+            num_premier_macrobloc = self.num_macrobloc_paquet + ecart_macrobloc
+            dernier_paquet = BitstreamGenerator.est_dernier_paquet(vue, debut)
+
+            for (k, (debut_segment, taille_segment)) in enumerate(segments):
+                num_macrobloc = num_premier_macrobloc + k
+
+                if (num_macrobloc < self.num_macrobloc_suivant or num_macrobloc >= self.total_num_of_macroblocks
+                    or (len(self.segments_macrobloc) > 0 and num_macrobloc != self.num_macrobloc_suivant)):
+                    raise ValueError(f"Paquet du macrobloc n°{num_macrobloc} inattendu dans la frame n°{self.frame_id}")
+
+                if len(self.segments_macrobloc) == 0:
+                    self.decode_macroblocs_vides(num_macrobloc)
+
+                self.segments_macrobloc.append((vue[debut_segment : debut_segment + (taille_segment + 7) // 8], taille_segment))
+
+                # seul le dernier segment du paquet peut se poursuivre dans le paquet suivant
+                if k < len(segments) - 1 or dernier_paquet:
+                    self.ajoute_macrobloc(self.decodeur.decode_octets(*concatene_segments(self.segments_macrobloc)))
+                    self.segments_macrobloc = []
+
+            self.num_macrobloc_paquet = num_premier_macrobloc + len(segments) - 1
+            return(None)
+
+        # tail
+        return(self.termine_frame())
+
+
+    #------------------------------------------------------------------------#
+
+
+    def commence_frame(self, header):
+        """
+        Lit le header d'une nouvelle frame et prépare son décodage.
+        """
+        (self.frame_id, self.img_size, self.macroblock_size, self.sous_echantillonnage, self.qualite, self.type_matrice,
+         self.id_table, self.symbolisation, self.id_codeur) = BitstreamGenerator.decode_header(header)
+
+        if self.macroblock_size not in self.operateurs_DCT:
+            self.operateurs_DCT[self.macroblock_size] = get_DCT_operator(self.macroblock_size)
+        self.A = self.operateurs_DCT[self.macroblock_size]
+
+        self.total_num_of_macroblocks = chroma.nb_macroblocs_total(self.img_size, self.macroblock_size, self.sous_echantillonnage)
+
+        # macroblocs décodés (après DCT inverse) de toute la frame
+        N = self.macroblock_size
+        if chroma.est_planaire(self.sous_echantillonnage):
+            self.dec_yuv_blocs = np.zeros((self.total_num_of_macroblocks, N, N))
+        else:
+            self.dec_yuv_blocs = np.zeros((self.total_num_of_macroblocks, N, N, 3))
+
+        self.taille_lot_frame = self.taille_lot
+        if self.taille_lot_frame is None:
+            self.taille_lot_frame = max(1, self.img_size[0] // N)
+
+        self.segments_dict = []
+        self.decodeur = None
+
+        self.segments_macrobloc = []
+        self.num_macrobloc_suivant = 0
+
+        # numéro du dernier macrobloc du dernier paquet du body reçu
+        self.num_macrobloc_paquet = 0
+
+        # macroblocs décodés (paires (run, level)) pas encore transformés
+        self.lot = []
+        self.num_premier_macrobloc_lot = 0
+
+        self.etat = RECEPTION_DICT
+
+
+    def cree_decodeur(self):
+        """
+        Crée le décodeur entropique de la frame, une fois son dict reçu.
+        """
+        donnees_utiles_dict = "".join(chaine_de_bits(donnees, 0, taille_donnees) for (donnees, taille_donnees) in self.segments_dict)
+        self.segments_dict = []
+
+        self.decodeur = BitstreamGenerator.decodeur_entropique(self.id_codeur, self.id_table, self.symbolisation, donnees_utiles_dict)
+        self.etat = RECEPTION_BODY
+
+
+    def decode_macroblocs_vides(self, num_macrobloc):
+        """
+        Décode les macroblocs précédant le macrobloc n°num_macrobloc qui n'ont
+        pas été reçus : ils sont encodés sur 0 bit, et n'ont donc aucun paquet.
+        """
+        while self.num_macrobloc_suivant < num_macrobloc:
+            self.ajoute_macrobloc(self.decodeur.decode_octets(b"", 0))
+
+
+    def ajoute_macrobloc(self, macrobloc_RLE):
+        """
+        Ajoute le macrobloc suivant de la frame (liste de paires (run, level))
+        au lot en cours, et transforme le lot s'il est complet.
+        """
+        self.lot.append(macrobloc_RLE)
+        self.num_macrobloc_suivant += 1
+
+        if len(self.lot) == self.taille_lot_frame:
+            self.transforme_lot()
+
+
+    def transforme_lot(self):
+        """
+        RLE inverse, déquantification et DCT inverse du lot de macroblocs en
+        cours (cf. Decoder.recompose_macroblocs_via_DCT).
+        """
+        if len(self.lot) == 0:
+            return
+
+        debut = self.num_premier_macrobloc_lot
+        fin = debut + len(self.lot)
+
+        self.dec_yuv_blocs[debut : fin] = self.dec.recompose_macroblocs_via_DCT(rle.depuis_liste_RLE(self.lot), debut,
+                                                                               self.img_size, self.macroblock_size, self.A,
+                                                                               sous_echantillonnage=self.sous_echantillonnage,
+                                                                               qualite=self.qualite, type_matrice=self.type_matrice)
+
+        self.lot = []
+        self.num_premier_macrobloc_lot = fin
+
+
+    def termine_frame(self):
+        """
+        Termine le décodage de la frame en cours, à la réception de son tail.
+
+        Returns:
+            image_yuv_decodee: image YUV de la frame, de taille (img_height, img_width, 3)
+        """
+        if len(self.segments_macrobloc) > 0:
+            raise ValueError(f"Tail reçu avant le dernier paquet du macrobloc n°{self.num_macrobloc_suivant} de la frame n°{self.frame_id}")
+
+        self.decode_macroblocs_vides(self.total_num_of_macroblocks)
+        self.transforme_lot()
+
+        image_yuv_decodee = self.dec.assemble_frame(self.dec_yuv_blocs, self.img_size, self.macroblock_size,
+                                                    sous_echantillonnage=self.sous_echantillonnage)
+
+        self.dec_yuv_blocs = None
+        self.etat = ATTENTE_HEADER
+
+        return(image_yuv_decodee)
@@ -2,6 +2,11 @@
 
 import numpy as np
 from iDTT import apply_iDTT
+import color_conversion
+from zigzag import zigzag_par_lots
+import rle
+import chroma
+import quantification
 
 ###############################################################################
 
@@ -17,32 +22,32 @@ class Encoder:
         Convertit une image depuis une représentation RGB (Rouge, Vert, Bleu)
         vers une représentation YUV (Luminance, Chrominance)
         
+        La conversion est faite sur la frame entière en une seule opération
+        matricielle (cf. color_conversion.py).
+        
         Args:
             image: tableau de pixels représentant l'image
+            mode_RPi: True si l'image est au format BGR (et non RGB)
         
         Returns:
             image_yuv: tableau de pixels représentant l'image au format YUV
         """
-        image_yuv = np.zeros(image.shape)
-
-        # Pour chaque pixel de l'image
-        for i in range(image.shape[0]):
-            for j in range(image.shape[1]):
-                if mode_RPi:
-                    # image au format BGR (et non RGB)
-                    b, g, r = image[i, j]
-                else:
-                    r, g, b = image[i, j]
-                
-                # On recalcule les coefficients YUV
-                # Source : https://fr.wikipedia.org/wiki/YUV
-                y = 0.299 * r + 0.587 * g + 0.114 * b
-                u = -0.14713 * r - 0.28886 * g + 0.436 * b
-                v = 0.615 * r - 0.51498 * g - 0.10001 * b
-                image_yuv[i, j] = [y, u, v]
-
-        # On retourne l'image ainsi constituée
-        return image_yuv
+        return color_conversion.RGB_to_YUV(image, mode_RPi=mode_RPi)
+    
+    
+    def RGB_to_YUV_fixed_point(self, image, mode_RPi=False):
+        """
+        Variante en virgule fixe de RGB_to_YUV : une frame uint8 (typiquement
+        issue de la PiCamera) est convertie sans passer par des float64.
+        
+        Args:
+            image: tableau d'entiers (uint8) représentant l'image
+            mode_RPi: True si l'image est au format BGR (et non RGB)
+        
+        Returns:
+            image_yuv: tableau (int16) représentant l'image au format YUV
+        """
+        return color_conversion.RGB_to_YUV_fixed_point(image, mode_RPi=mode_RPi)
     
     
     def RGB_to_YCbCr(self, image):
@@ -54,23 +59,9 @@ class Encoder:
             image: tableau de pixels représentant l'image
         
         Returns:
-            image_ycbcr: tableau de pixels représentant l'image au format YUV
+            image_ycbcr: tableau de pixels représentant l'image au format YCbCr
         """
-        image_ycbcr = np.zeros(image.shape)
-
-        # Pour chaque pixel de l'image
-        for i in range(image.shape[0]):
-            for j in range(image.shape[1]):
-                r, g, b = image[i, j]
-                # On recalcule les coefficients YCbCr
-                # Source : https://fr.wikipedia.org/wiki/YCbCr
-                y = 0.299 * r + 0.587 * g + 0.114 * b
-                cb = -0.1687 * r - 0.3313 * g + 0.5 * b + 128
-                cr = 0.5 * r - 0.4187 * g - 0.0813 * b + 128
-                image_ycbcr[i, j] = [y, cb, cr]
-
-        # On retourne l'image ainsi constituée
-        return image_ycbcr
+        return color_conversion.RGB_to_YCbCr(image)
     
     
     @staticmethod
@@ -136,60 +127,74 @@ class Encoder:
         return(dct_data)
     
     
+    @staticmethod
+    def vue_macroblocs(image, macroblock_size):
+        """
+        Renvoie une **vue** (sans copie) de l'image découpée en macroblocs.
+        
+        Args:
+            image: tableau de taille (img_height, img_width, 3) ou (img_height, img_width)
+            macroblock_size: taille (d'un côté) d'un macrobloc
+        
+        Returns:
+            blocs: vue de taille (nb_macroblocs_par_colonne, nb_macroblocs_par_ligne,
+                   macroblock_size, macroblock_size, 3) (sans le dernier axe si
+                   l'image est en 2D)
+        """
+        N = macroblock_size
+        nb_lignes, nb_colonnes = image.shape[0] // N, image.shape[1] // N
+        
+        # la vue (nb_macroblocs, N, N, 3) ne peut pas être obtenue sans copie, car
+        # les macroblocs d'une même ligne et ceux d'une même colonne ne sont pas
+        # séparés par le même pas mémoire : on garde donc 2 axes pour les indexer
+        return image.reshape((nb_lignes, N, nb_colonnes, N) + image.shape[2:]).swapaxes(1, 2)
+    
+    
+    def apply_DCT_par_lots(self, operateur_DCT, image, macroblock_size):
+        """
+        Applique la DCT à **tous** les macroblocs d'une image en une seule fois.
+        Le produit "A @ X @ A.T" est fait sur la pile entière des macroblocs
+        (matmul empilé), ce qui évite un appel Python par macrobloc et par couche.
+        
+        Args:
+            operateur_DCT : matrice orthogonale qui sert d'opérateur à la DCT
+            image: tableau de taille (img_height, img_width, 3) ou (img_height, img_width)
+            macroblock_size: taille (d'un côté) d'un macrobloc
+        
+        Returns:
+            dct_blocs: tableau de taille (nb_macroblocs, macroblock_size, macroblock_size, 3)
+                       (sans le dernier axe si l'image est en 2D), les macroblocs
+                       étant rangés ligne par ligne
+        """
+        blocs = self.vue_macroblocs(image, macroblock_size)
+        
+        # on place l'éventuel axe des couches avant les 2 axes du macrobloc
+        if blocs.ndim == 5:
+            blocs = np.moveaxis(blocs, 4, 2)
+        
+        dct_blocs = operateur_DCT @ blocs @ operateur_DCT.T
+        
+        if dct_blocs.ndim == 5:
+            dct_blocs = np.moveaxis(dct_blocs, 2, 4)
+        
+        return(dct_blocs.reshape((-1,) + dct_blocs.shape[2:]))
+    
+    
     def zigzag_linearisation(self, dct_data):
         """
         Parcourt un tableau de coefficients en zig zag de manière à passer d'un
         tableau en deux dimensions à un tableau à une dimension avec par conséquent
         beaucoup de zéros entre les valeurs significatives.
         
+        Le parcours est lu dans une table précalculée (cf. zigzag.py).
+        
         Args:
             dct_data: tableau de coefficients issus de la transformée en cosinus discrete
         
         Returns:
             data: tableau à une dimension des coefficients de l'image
         """
-        # Directon
-        up = False
-        # Position du curseur
-        i, j = 0, 0
-        # Tableau de sortie
-        res = []
-        # Pour chacun des points qui constituent l'image
-        for t in range(dct_data[:, :, 0].size):
-            # On ajoute le point courant
-            res.append(dct_data[i, j])
-            # Si on parcoure l'image vers le haut
-            if up:
-                if j == (dct_data.shape[1] - 1):
-                    i += 1
-                    up = False  # On change de direction
-                elif i == 0:
-                    j += 1
-                    up = False  # On change de direction
-                else:
-                    # Sinon on parcourt la diagonale
-                    i -= 1
-                    j += 1
-            # Si on parcoure l'image vers le bas
-            else:
-                if i == (dct_data.shape[0] - 1):
-                    j += 1
-                    up = True  # On change de direction
-                elif j == 0:
-                    i += 1
-                    up = True  # On change de direction
-                else:
-                    # Sinon on parcourt la diagonale
-                    j -= 1
-                    i += 1
-        
-        # On transforme le tableau à 3 'couches' en un tableau à une dimension
-        res2 = []
-        for k in range(3):
-            for pixel_dct in res:
-                res2.append(pixel_dct[k])
-        
-        return np.array(res2)
+        return zigzag_par_lots(np.asarray(dct_data)[np.newaxis])[0]
     
     
     def quantization(self, data, threshold):
@@ -204,16 +209,7 @@ class Encoder:
         Returns:
             data: tableau modifié 
         """
-        quantized_data = np.copy(data)
-        
-        # Pour chaque élément de la liste
-        for i in range(quantized_data.shape[0]):
-            # Si la valeur est en dessous du seuil
-            if abs(quantized_data[i]) <= threshold:
-                # On la met à 0
-                quantized_data[i] = 0
-        
-        return quantized_data
+        return rle.quantization(data, threshold)
     
     
     def run_level(self, data):
@@ -230,70 +226,24 @@ class Encoder:
         Returns:
             pairs: ensemble de paires décrivants les données de l'image
         """
-        n = 0
-        pairs = []
-        
-        # Pour chaque élément de la liste
-        for x in data:
-            """
-            Dans un premier temps, on considèrera que les 2èmes valeurs
-            des tuples RLE sont des entiers, et non des flottants
-            --> "entier" correspond à ici l'entier le plus proche de x
-            
-            /!\ ATTENTION /!\
-            Ici, NE PAS UTILISER la fonction round ou np.round (en considérant
-            par exemple 'entier = round(x)' ou 'entier = np.round(x)'), car ici
-            x est soit de type numpy.int32 ou numpy.float64 (et non int ou float)
-            
-            Si x est de type numpy.int32 : OK (pas de problème)
-            
-            Si x est de type numpy.float64 : gros problème
-            En effet, quand la fonction round (ou np.round) reçoit un objet de 
-            type numpy.float64 en entrée, elle renvoie un objet qui est également 
-            de type numpy.float64, et non int (ou numpy.int32) !!
-            
-            Exemple : Soit a = 24.4, avec type(a) = numpy.float64, et soit
-            b = round(a) (ou b = np.round(a)). Alors b = 24.0 (et non 24), et 
-            type(b) = numpy.float64 !
-            
-            Cependant, la fonction int **force** la conversion en int, même si
-            l'objet est de type numpy.float64
-            
-            Autre remarques (moins importantes) : 
-            1) Si x est de type float (et non numpy.float64), round renvoie bien
-            un int, comme on s'y attendrait
-            2) La fonction int n'est pas exactement la partie entière
-            Il s'agit en fait de la 'troncature entière', ie le flottant privé de
-            sa partie décimale. Ainsi, int et la partie entière coïncident sur
-            R+, mais PAS sur R*-. Sur R*-, on a : int(x) = partie_entiere(x) + 1.
-            Si int avait été exactement la partie entière, on aurait directement
-            pu écrire 'entier = int(x + 0.5)' sans aucune disjonction de cas.
-            """
-            if x >= 0:
-                entier = int(x + 0.5)
-            else:
-                entier = int(x - 0.5)
-            
-            # Si on a entier un non-nul
-            if entier != 0:
-                # On enregistre le couple
-                pairs.append((n, entier))
-                n = 0
-            else:
-                # Sinon, on compte les zéros
-                n += 1
-        
-        # Si la chaîne se termine par 00000 (cinq zéros) on enregistre (4,0)
-        if n != 0:
-            pairs.append((n - 1, 0))
-        
-        return pairs
+        # arrondi de chaque coefficient à l'entier le plus proche (cf. rle.arrondi_entier),
+        # puis comptage des zéros, de manière vectorisée
+        return rle.vers_liste_RLE(*rle.run_level_par_lots(data))[0]
     
     
-    def decompose_frame_en_macroblocs_via_DCT(self, image_yuv, img_size, macroblock_size, threshold, A):
+    def decompose_frame_en_tableaux_via_DCT(self, image_yuv, img_size, macroblock_size, threshold, A, sous_echantillonnage=chroma.CHROMA_444,
+                                            qualite=quantification.QUALITE_SEUIL, type_matrice=quantification.MATRICE_JPEG):
         """
         Décompose une image (au format YUV) en macroblocs RLE grâce à la DCT 
-        classique.
+        classique. Toutes les étapes (DCT, zig zag, quantification et RLE) sont
+        faites sur tous les macroblocs de la frame à la fois.
+        
+        En 4:2:2 et en 4:2:0, les couches U et V sont sous-échantillonnées avant
+        la DCT, et chaque plan est encodé séparément (cf. chroma.py).
+        
+        Si qualite est non nulle, les coefficients sont quantifiés par une
+        matrice de quantification (cf. quantification.py), et le seuil n'est
+        alors pas utilisé.
         
         Args:
             image_yuv: tableau représentant l'image YUV, de taille (img_height, img_width, 3)
@@ -301,40 +251,83 @@ class Encoder:
             macroblock_size: taille (d'un côté) d'un macrobloc
             threshold: seuil de quantization
             A: opérateur orthogonal de la DCT, de taille (macroblock_size, macroblock_size)
+            sous_echantillonnage: CHROMA_444 (par défaut), CHROMA_422 ou CHROMA_420
+            qualite: facteur de qualité entre 1 et 100, ou QUALITE_SEUIL (= 0, par
+                     défaut) pour la quantification par seuillage
+            type_matrice: MATRICE_JPEG (par défaut) ou MATRICE_UNIFORME
         
         Returns:
-            frame_RLE_encodee: frame entière encodée (liste de listes de tuples RLE)
+            (runs, levels, debuts): frame entière encodée, sous forme de tableaux
+                                    (cf. rle.py)
         """
         
         # définition des paramètres de l'image
         img_width = img_size[0]
         img_height = img_size[1]
-        total_num_of_macroblocks = (img_width * img_height) // macroblock_size**2
-        num_macroblocks_per_line = img_width // macroblock_size
         
-        frame_RLE_encodee = []
+        image_yuv = image_yuv[ : img_height, : img_width]
         
-        for num_macrobloc in range(total_num_of_macroblocks):
-            (i_macrobloc, j_macrobloc) = divmod(num_macrobloc, num_macroblocks_per_line)
+        if not chroma.est_planaire(sous_echantillonnage):
+            # c'est ici que l'on encode les données de tous les macroblocs (DCT par lots)
+            DCT_blocs = self.apply_DCT_par_lots(A, image_yuv, macroblock_size)
             
-            i_debut_macrobloc = i_macrobloc * macroblock_size
-            i_fin_macrobloc = i_debut_macrobloc + macroblock_size
+            # zig zag de tous les macroblocs en une seule fois
+            zigzag_data_lines = zigzag_par_lots(DCT_blocs)
             
-            j_debut_macrobloc = j_macrobloc * macroblock_size
-            j_fin_macrobloc = j_debut_macrobloc + macroblock_size
+            if qualite != quantification.QUALITE_SEUIL:
+                zigzag_data_lines = zigzag_data_lines / quantification.vecteur_quantification(type_matrice, macroblock_size, qualite)
+        
+        else:
+            # vérification de la compatibilité des dimensions de l'image
+            chroma.taille_plan_chroma(img_size, sous_echantillonnage)
             
-            macrobloc = np.copy(image_yuv[i_debut_macrobloc : i_fin_macrobloc, j_debut_macrobloc : j_fin_macrobloc, :])
+            plans = [image_yuv[:, :, 0]]
+            for k in [1, 2]:
+                plan_chroma = chroma.sous_echantillonne(image_yuv[:, :, k], sous_echantillonnage)
+                plans.append(chroma.complete_plan(plan_chroma, macroblock_size))
             
-            # c'est ici que l'on encode les données du macrobloc
-            DCT_data = self.apply_DCT(A, macrobloc)
+            lignes_par_plan = [zigzag_par_lots(self.apply_DCT_par_lots(A, plan, macroblock_size)) for plan in plans]
             
-            zigzag_data_line = self.zigzag_linearisation(DCT_data)
-            quantized_data = self.quantization(zigzag_data_line, threshold)
-            rle_data = self.run_level(quantized_data)
+            if qualite != quantification.QUALITE_SEUIL:
+                (vecteur_Y, vecteur_UV) = quantification.vecteur_quantification(type_matrice, macroblock_size, qualite, sous_echantillonnage)
+                lignes_par_plan = [lignes / vecteur for (lignes, vecteur) in zip(lignes_par_plan, [vecteur_Y, vecteur_UV, vecteur_UV])]
             
-            frame_RLE_encodee.append(rle_data)
+            # tous les macroblocs de Y, puis tous ceux de U, puis tous ceux de V
+            zigzag_data_lines = np.concatenate(lignes_par_plan)
         
-        return(frame_RLE_encodee)
+        if qualite == quantification.QUALITE_SEUIL:
+            return(rle.quantization_run_level(zigzag_data_lines, threshold))
+        
+        # les coefficients (déjà divisés par leurs pas de quantification) sont
+        # arrondis à l'entier le plus proche lors de la RLE
+        return(rle.run_level_par_lots(zigzag_data_lines))
+    
+    
+    def decompose_frame_en_macroblocs_via_DCT(self, image_yuv, img_size, macroblock_size, threshold, A, sous_echantillonnage=chroma.CHROMA_444,
+                                              qualite=quantification.QUALITE_SEUIL, type_matrice=quantification.MATRICE_JPEG):
+        """
+        Décompose une image (au format YUV) en macroblocs RLE grâce à la DCT 
+        classique.
+        
+        Args:
+            image_yuv: tableau représentant l'image YUV, de taille (img_height, img_width, 3)
+            img_size: tuple égal à (img_width, img_height)
+            macroblock_size: taille (d'un côté) d'un macrobloc
+            threshold: seuil de quantization
+            A: opérateur orthogonal de la DCT, de taille (macroblock_size, macroblock_size)
+            sous_echantillonnage: CHROMA_444 (par défaut), CHROMA_422 ou CHROMA_420
+            qualite: facteur de qualité entre 1 et 100, ou QUALITE_SEUIL (= 0, par
+                     défaut) pour la quantification par seuillage
+            type_matrice: MATRICE_JPEG (par défaut) ou MATRICE_UNIFORME
+        
+        Returns:
+            frame_RLE_encodee: frame entière encodée (liste de listes de tuples RLE)
+        """
+        tableaux_RLE = self.decompose_frame_en_tableaux_via_DCT(image_yuv, img_size, macroblock_size, threshold, A,
+                                                                sous_echantillonnage=sous_echantillonnage,
+                                                                qualite=qualite, type_matrice=type_matrice)
+        
+        return(rle.vers_liste_RLE(*tableaux_RLE))
     
     
     def decompose_frame_en_macroblocs_via_iDTT(self, image_yuv, img_size, macroblock_size, threshold, P, S):
@@ -2,9 +2,12 @@
 import sys
 import numpy as np
 from encoder import Encoder
-from decoder import Decoder
+from operateurs import get_DCT_operator
+from chroma import CHROMA_420
+from quantification import MATRICE_JPEG
 from pathlib import Path
 from bitstream import BitstreamGenerator
+from container import EcritureConteneur, DecodeurConteneur
 from image_generator import BlankImageGenerator, FromJSONImageGenerator
 from image_visualizer import ImageVisualizer
 from video_handler import VideoHandler
@@ -18,25 +21,31 @@ DEFAULT_QUANTIZATION_THRESHOLD = 10
 # Doit être <= 63
 macroblock_size = 16
 
-# création de l'opérateur orthogonal de la DCT
-A = Encoder.DCT_operator(macroblock_size)
+# mode de sous-échantillonnage de la chrominance (cf. chroma.py) : CHROMA_444,
+# CHROMA_422 ou CHROMA_420
+sous_echantillonnage = CHROMA_420
+
+# facteur de qualité de la quantification (entre 1 et 100), ou QUALITE_SEUIL
+# pour la quantification historique par seuillage, et type de matrice de 
+# quantification (cf. quantification.py)
+qualite = 75
+type_matrice = MATRICE_JPEG
 
-# il faut s'assurer d'avoir les bonnes dimensions de l'image, ET que macroblock_size
-# divise bien ses 2 dimensions
-img_width = 720
-img_height = 480
+# création de l'opérateur orthogonal de la DCT
+A = get_DCT_operator(macroblock_size)
 
-# format standard
-img_size = (img_width, img_height)
+# les dimensions des images sont lues dans les fichiers (il faut s'assurer que
+# macroblock_size divise bien ces 2 dimensions), puis dans le header de chaque
+# frame au décodage
 
 if len(sys.argv) < 2:
     print("""Here is how to use the program:  
           
           List des actions: \n 
           
-              -e img/mp4 filename: encode the image or video 'img/mp4' into a bitstream to the textfile 'filename'
+              -e img/mp4 filename: encode the image or video 'img/mp4' into an EVEEX container (one bitstream per frame + index) in the file 'filename'
               
-              -d filename img: decode the bitstream 'filename' to the image 'img'
+              -d filename img [num_frame]: decode the frame 'num_frame' (0 by default) of the EVEEX container 'filename' to the image 'img'
               
               -bi sizeX sizeY filename: create a blank image of size (sizeX x sizeY) in the file 'filename'
               
@@ -70,66 +79,55 @@ if action.lower() == "-e":
     # -----------Encoder-----------#
     start = time.time()
 
-    if path.name[-4:]=='.mp4':
-
-        nom_video = path.name
-        frame_id = 0
-        frames= VideoHandler.vid2frames(nom_video)
-        img_size = (frames[0].shape[0],frames[0].shape[1])
-        for frame in frames:
-            image_rgb = np.array(frame)
+    # le bufsize doit impérativement être >= 10 (en pratique : OK)
+    bufsize = 4096
 
-            frame_id += 1
-            # le bufsize doit impérativement être >= 67 (en pratique : OK)
-            bufsize = 4096
+    enc = Encoder()
 
-            enc = Encoder()
+    # les bitstreams des frames sont écrits dans un conteneur (cf. container.py),
+    # via un buffer d'écriture
+    conteneur = EcritureConteneur(sys.argv[3])
 
-            # frame RGB --> frame YUV
-            image_yuv = enc.RGB_to_YUV(image_rgb)
+    if path.name[-4:]=='.mp4':
 
-            # frame YUV --> frame RLE
-            rle_data = enc.decompose_frame_en_macroblocs_via_DCT(image_yuv, img_size, macroblock_size,
-                                                                 DEFAULT_QUANTIZATION_THRESHOLD, A)
+        frames = VideoHandler.vid2frames(str(path))
 
-            # frame RLE --> bitstream
-            bitstream_genere = BitstreamGenerator.encode_frame_RLE(frame_id, img_size, macroblock_size, rle_data, bufsize)
-            fichier = open(sys.argv[3], "a")
-            fichier.write(bitstream_genere)
-            fichier.close()
+        # format standard : (img_width, img_height)
+        img_size = (frames[0].shape[1], frames[0].shape[0])
 
     else:
-        nom_image = path
-
-        image = Image.open(nom_image)
-        image_intermediaire = image.getdata()
-
-        image_rgb = np.array(image_intermediaire).reshape((img_height, img_width, 3))
+        image = Image.open(path).convert("RGB")
+        img_size = image.size
 
-        frame_id = 0
+        # une image seule est un conteneur d'une seule frame
+        frames = [np.array(image)[:, :, ::-1]]
 
-        # le bufsize doit impérativement être >= 67 (en pratique : OK)
-        bufsize = 4096
-
-        enc = Encoder()
+    for (frame_id, frame) in enumerate(frames):
+        # les frames sont au format BGR (cf. VideoHandler.vid2frames)
+        image_rgb = np.array(frame[:, :, ::-1], dtype=float)
 
         # frame RGB --> frame YUV
         image_yuv = enc.RGB_to_YUV(image_rgb)
 
         # frame YUV --> frame RLE
-        rle_data = enc.decompose_frame_en_macroblocs_via_DCT(image_yuv, img_size, macroblock_size, DEFAULT_QUANTIZATION_THRESHOLD, A)
-
-        # frame RLE --> bitstream
-        bitstream_genere = BitstreamGenerator.encode_frame_RLE(frame_id, img_size, macroblock_size, rle_data, bufsize)
-
-        fichier = open(sys.argv[3], "w")
-        fichier.write(bitstream_genere)
-        fichier.close()
+        rle_data = enc.decompose_frame_en_macroblocs_via_DCT(image_yuv, img_size, macroblock_size,
+                                                             DEFAULT_QUANTIZATION_THRESHOLD, A,
+                                                             sous_echantillonnage=sous_echantillonnage,
+                                                             qualite=qualite, type_matrice=type_matrice)
+
+        # frame RLE --> bitstream (avec l'index du body, qui permet de décoder
+        # chaque frame par morceaux, en parallèle)
+        bitstream_genere = BitstreamGenerator.encode_frame_RLE(frame_id, img_size, macroblock_size, rle_data, bufsize,
+                                                               sous_echantillonnage, qualite, type_matrice,
+                                                               avec_index=True)
+        conteneur.ajoute_frame(bitstream_genere)
+
+    conteneur.fermer()
     end = time.time()
     duration = end - start
-    print('Number of frames = ' + str(frame_id+1))
+    print('Number of frames = ' + str(len(frames)))
     print('Total duration = ' + str(duration))
-    print('FPS = ' + str((frame_id+1)/duration))
+    print('FPS = ' + str(len(frames)/duration))
     print('The operation is succesful')
 
     sys.exit(1)
@@ -138,7 +136,7 @@ elif action.lower() == "-d":
 
     ### Vérifie le nombre d'arguments
 
-    if len(sys.argv) != 4:
+    if len(sys.argv) not in [4, 5]:
         print("Error: not the right number of arguments")
         sys.exit(1)
 
@@ -149,40 +147,16 @@ elif action.lower() == "-d":
         print("Error: file doesn't exist")
         sys.exit(1)
 
-    received_data = open(path, 'r')
-
-    img_visu = ImageVisualizer()
-    dec = Decoder()
-    
-    # bitstream --> frame RLE
-    dec_rle_data = dec.decode_bitstream_RLE(received_data.read())
-    
-    # frame RLE --> frame YUV
-    dec_yuv_data = dec.recompose_frame_via_DCT(dec_rle_data, img_size, macroblock_size, A)
-
-    # frame YUV --> frame RGB
-    dec_rgb_data = dec.YUV_to_RGB(dec_yuv_data)
-
-    # Vérification des valeurs de la frame RGB décodée (on devrait les avoir entre
-    # 0 et 255)
-    # Les "valeurs illégales" sont ici en forte minorité (heureusement)
-    (num_low_values, num_high_values) = (0, 0)
-    for k in range(3):
-        for i in range(img_height):
-            for j in range(img_width):
-                pixel_component = dec_rgb_data[i, j, k]
-
-                # On remet 'pixel_component' entre 0 (inclus) et 255 (inclus) si besoin
-
-                if pixel_component < 0:
-                    dec_rgb_data[i, j, k] = 0
-                    num_low_values += 1
+    num_frame = int(sys.argv[4]) if len(sys.argv) == 5 else 0
 
-                if pixel_component > 255:
-                    dec_rgb_data[i, j, k] = 255
-                    num_high_values += 1
+    # seule la frame demandée est lue (grâce à l'index du conteneur) et décodée ;
+    # ses dimensions et ses paramètres de décodage sont lus dans son header
+    with DecodeurConteneur(path, taille_cache=0) as conteneur:
+        if not 0 <= num_frame < len(conteneur):
+            print(f"Error: the container only has {len(conteneur)} frame(s)")
+            sys.exit(1)
 
-    dec_rgb_data = np.round(dec_rgb_data).astype(dtype=np.uint8)
+        dec_rgb_data = conteneur.frame(num_frame)
 
     img_visu = ImageVisualizer()
     # On enregistre l'image:
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+"""
+Codes de Golomb exponentiels (d'ordre 0), utilisés pour écrire des entiers de
+taille variable dans le bitstream (chaînes de caractères "0" et "1").
+
+Un entier naturel n est codé par (L - 1) zéros suivis de l'écriture binaire
+(sur L bits) de n + 1 : les petits entiers, qui sont les plus fréquents, ont
+donc des codes très courts ("1" pour 0, "010" pour 1, "011" pour 2, ...). Les
+entiers relatifs sont d'abord associés à des entiers naturels (0, 1, -1, 2,
+-2, ... --> 0, 1, 2, 3, 4, ...), comme dans H.264.
+
+Les codes peuvent aussi être lus directement dans les bits d'un entier (cf.
+lit_non_signe et lit_signe), sans passer par une chaîne de caractères.
+
+Source : https://en.wikipedia.org/wiki/Exponential-Golomb_coding
+"""
+
+from bit_io import lit_bits
+
+##############################################################################
+
+
+def encode_non_signe(n):
+    """
+    Code de Golomb exponentiel d'un entier naturel n.
+    """
+    if n < 0:
+        raise ValueError(f"Entier négatif : {n} (utiliser encode_signe)")
+
+    binaire = format(n + 1, "b")
+    return("0" * (len(binaire) - 1) + binaire)
+
+
+def encode_signe(n):
+    """
+    Code de Golomb exponentiel d'un entier relatif n.
+    """
+    if n > 0:
+        return(encode_non_signe(2 * n - 1))
+    return(encode_non_signe(-2 * n))
+
+
+def decode_non_signe(bitstream, k=0):
+    """
+    Décode l'entier naturel dont le code commence à l'indice k du bitstream.
+
+    Returns:
+        (n, k_suivant): l'entier décodé, et l'indice du premier bit qui suit son code
+    """
+    nb_zeros = 0
+    while bitstream[k + nb_zeros] == "0":
+        nb_zeros += 1
+
+    k_fin = k + 2 * nb_zeros + 1
+    return(int(bitstream[k + nb_zeros : k_fin], 2) - 1, k_fin)
+
+
+def decode_signe(bitstream, k=0):
+    """
+    Décode l'entier relatif dont le code commence à l'indice k du bitstream.
+
+    Returns:
+        (n, k_suivant): l'entier décodé, et l'indice du premier bit qui suit son code
+    """
+    n, k = decode_non_signe(bitstream, k)
+
+    if n % 2 == 1:
+        return((n + 1) // 2, k)
+    return(-(n // 2), k)
+
+
+def lit_non_signe(valeur, taille, k=0):
+    """
+    Idem decode_non_signe, mais le bitstream est donné sous forme d'entier : ce
+    sont les 'taille' bits de 'valeur', le bit n°0 étant celui de poids fort.
+
+    Returns:
+        (n, k_suivant): l'entier décodé, et l'indice du premier bit qui suit son code
+    """
+    # le nombre de zéros du préfixe se déduit de la taille de l'écriture
+    # binaire des bits restants
+    nb_bits_restants = taille - k
+    nb_zeros = nb_bits_restants - (valeur & ((1 << nb_bits_restants) - 1)).bit_length()
+
+    k_fin = k + 2 * nb_zeros + 1
+    if k_fin > taille:
+        raise ValueError(f"Code de Golomb exponentiel incomplet à l'indice {k}")
+
+    return(lit_bits(valeur, taille, k + nb_zeros, nb_zeros + 1) - 1, k_fin)
+
+
+def lit_signe(valeur, taille, k=0):
+    """
+    Idem decode_signe, mais le bitstream est donné sous forme d'entier (cf.
+    lit_non_signe).
+
+    Returns:
+        (n, k_suivant): l'entier décodé, et l'indice du premier bit qui suit son code
+    """
+    n, k = lit_non_signe(valeur, taille, k)
+
+    if n % 2 == 1:
+        return((n + 1) // 2, k)
+    return(-(n // 2), k)
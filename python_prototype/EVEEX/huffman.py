@@ -1,13 +1,46 @@
 # -*- coding: utf-8 -*-
 
+import heapq
+from collections import Counter
 import numpy as np
 from logger import Logger
+from bit_io import BitWriter, lit_bits
+from codage_entropique import CodeurEntropique, DecodeurEntropique
+import exp_golomb
+
+##############################################################################
+
+
+# longueur maximale des codes de Huffman (cf. Huffman.limite_longueurs) : elle
+# borne le nombre de niveaux des tables de décodage
+LONGUEUR_MAX_CODE = 24
+
+# nombre de bits indexant chaque table de décodage (cf. DecodeurHuffman)
+NB_BITS_TABLE = 9
+
+# symbole d'échappement des tables de Huffman statiques (cf. tables_huffman.py) :
+# une paire (run, level) absente de la table est codée par le code de ce symbole,
+# suivi du run (sur NB_BITS_RUN_ECHAPPEMENT bits) et du level (en complément à 2,
+# sur NB_BITS_LEVEL_ECHAPPEMENT bits). Comme les runs sont positifs, ce symbole
+# ne peut pas être confondu avec une vraie paire (run, level).
+ECHAPPEMENT = (-1, 0)
+NB_BITS_RUN_ECHAPPEMENT = 12
+NB_BITS_LEVEL_ECHAPPEMENT = 16
+
+# nombre maximal d'entrées de la table (dense) qui associe à chaque paire
+# (run, level) l'indice de son code (cf. Huffman.indices_symboles)
+TAILLE_MAX_TABLE_DENSE = 2**22
+
 
 ##############################################################################
 
 
 class Noeud:
     
+    # les arbres de Huffman d'une frame peuvent contenir plusieurs milliers de
+    # noeuds : on évite donc le dictionnaire d'attributs de chaque instance
+    __slots__ = ("frequence", "valeur", "droite", "gauche")
+    
     def __init__(self, valeur, frequence, gauche=None, droite=None):
         self.frequence = frequence
         self.valeur = valeur
@@ -69,7 +102,7 @@ class Noeud:
 ##############################################################################
 
 
-class Huffman:
+class Huffman(CodeurEntropique):
     
     def __init__(self, phrase=None):
         self.noeuds = []
@@ -77,73 +110,212 @@ class Huffman:
         self.dict = {}
         self.phrase = phrase
         
+        # tables (triées) des symboles RLE et de leurs codes, sous forme de
+        # tableaux (cf. tables_codes)
+        self.tables = None
+        self.table_dense = None
+        
         if phrase is not None:
             self.split_phrase_in_nodes(self.phrase)
-            
-            while len(self.noeuds) > 1:
-                m1, m2, reste = self.get_two_lowest_symbols()
-                m = self.merge_two_nodes(m1, m2)
-                self.noeuds = self.sort_nodes(reste + [m])
-            
+            self.noeuds = [self.construit_arbre(self.noeuds)]
             self.dict = self.generate_dict(self.noeuds[0])
-            
-            # sans ces 2 lignes, si la phrase est de taille 1, l'unique valeur
-            # de ce dico sera un str vide, ce que l'on ne veut pas !
-            if len(self.phrase) == 1:
-                self.dict[self.phrase[0]] = '0'
     
     
-    def split_phrase_in_nodes(self, phrase):
-        self.symbols = {}
-        self.noeuds = []
-        for c in phrase:
-            if c in self.symbols:
-                self.symbols[c] += 1
-            else:
-                self.symbols[c] = 1
+    @classmethod
+    def depuis_tableaux(cls, runs, levels):
+        """
+        Construit le code de Huffman des paires (run, level) d'une frame RLE
+        sous forme de tableaux (cf. rle.py). Les fréquences des symboles sont
+        comptées avec Numpy, sans construire de liste de tuples.
+        """
+        cles, frequences = np.unique(cles_symboles(runs, levels), return_counts=True)
+        runs_symboles, levels_symboles = symboles_des_cles(cles)
+        symboles = zip(runs_symboles.tolist(), levels_symboles.tolist())
+        
+        return cls.depuis_frequences(dict(zip(symboles, frequences.tolist())))
+    
+    
+    @classmethod
+    def depuis_frequences(cls, frequences):
+        """
+        Construit le code de Huffman associé aux fréquences données.
+        
+        Args:
+            frequences: dictionnaire {symbole: nombre d'occurrences}
+        """
+        huff = cls()
         
-        for key in self.symbols:
-            self.noeuds.append(Noeud(key, self.symbols[key]))
+        huff.symbols = dict(frequences)
+        huff.noeuds = [Noeud(key, huff.symbols[key]) for key in huff.symbols]
+        huff.noeuds = [huff.construit_arbre(huff.noeuds)]
+        huff.dict = huff.generate_dict(huff.noeuds[0])
+        
+        return huff
+    
+    
+    def split_phrase_in_nodes(self, phrase):
+        self.symbols = dict(Counter(phrase))
+        self.noeuds = [Noeud(key, self.symbols[key]) for key in self.symbols]
         
         return self.noeuds
     
     
+    def construit_arbre(self, noeuds):
+        """
+        Construit l'arbre de Huffman à partir des feuilles 'noeuds', à l'aide
+        d'une file de priorité (tas binaire) : on fusionne à chaque étape les 2
+        noeuds de plus faibles fréquences, soit O(n log n) opérations au total.
+        
+        Args:
+            noeuds: liste (non vide) des feuilles de l'arbre
+        
+        Returns:
+            racine: racine de l'arbre de Huffman
+        """
+        # le compteur départage les noeuds de même fréquence (les noeuds eux-mêmes
+        # n'étant pas comparables), et rend la construction déterministe
+        tas = [(noeud.frequence, compteur, noeud) for (compteur, noeud) in enumerate(noeuds)]
+        heapq.heapify(tas)
+        compteur = len(tas)
+        
+        while len(tas) > 1:
+            _, _, m1 = heapq.heappop(tas)
+            _, _, m2 = heapq.heappop(tas)
+            m = self.merge_two_nodes(m1, m2)
+            heapq.heappush(tas, (m.frequence, compteur, m))
+            compteur += 1
+        
+        return tas[0][2]
+    
+    
     def merge_two_nodes(self, noeud_a, noeud_b):
         return Noeud([noeud_a.valeur, noeud_b.valeur], noeud_a.frequence + noeud_b.frequence, noeud_a, noeud_b)
     
     
-    def get_two_lowest_symbols(self):
-        def get_score(noeud):
-            return noeud.frequence
+    @staticmethod
+    def longueurs_codes(racine):
+        """
+        Parcourt (itérativement) l'arbre de Huffman pour déterminer la longueur
+        du code de chaque symbole, i.e. la profondeur de la feuille associée.
         
-        tmp = self.noeuds[:]
+        Returns:
+            longueurs: dictionnaire {symbole: longueur du code}
+        """
+        # si l'arbre est réduit à une feuille (un seul symbole distinct), son
+        # code serait un str vide, ce que l'on ne veut pas !
+        if racine.gauche is None and racine.droite is None:
+            return {racine.valeur: 1}
         
-        min1 = min(tmp, key=get_score)
-        tmp.remove(min1)
+        longueurs = {}
+        pile = [(racine, 0)]
+        while pile:
+            noeud, longueur = pile.pop()
+            
+            if noeud.gauche is None and noeud.droite is None:
+                longueurs[noeud.valeur] = longueur
+                continue
+            
+            if noeud.droite is not None:
+                pile.append((noeud.droite, longueur + 1))
+            if noeud.gauche is not None:
+                pile.append((noeud.gauche, longueur + 1))
+        return longueurs
+    
+    
+    @staticmethod
+    def ordre_canonique(longueurs):
+        """
+        Renvoie la liste des symboles triés par longueur de code croissante,
+        puis par valeur croissante (ordre des codes canoniques).
+        """
+        return sorted(longueurs, key=lambda symbole: (longueurs[symbole], symbole))
+    
+    
+    @staticmethod
+    def codes_canoniques(symboles_tries, longueurs):
+        """
+        Attribue les codes de Huffman canoniques : dans l'ordre canonique, chaque
+        code est obtenu en incrémentant le code précédent, puis en le décalant
+        vers la gauche si la longueur augmente. Les codes ne dépendent donc que
+        des longueurs, et le dictionnaire peut être transmis sans eux.
         
-        min2 = min(tmp, key=get_score)
-        tmp.remove(min2)
+        Args:
+            symboles_tries: symboles dans l'ordre canonique (cf. ordre_canonique)
+            longueurs: liste des longueurs de code, dans le même ordre
         
-        return min1, min2, tmp
+        Returns:
+            dico: dictionnaire {symbole: code (chaîne de "0" et de "1")}
+        """
+        dico = {}
+        code = 0
+        longueur_precedente = 0
+        for (symbole, longueur) in zip(symboles_tries, longueurs):
+            code <<= longueur - longueur_precedente
+            dico[symbole] = format(code, f"0{longueur}b")
+            code += 1
+            longueur_precedente = longueur
+        return dico
     
     
-    def sort_nodes(self, liste_noeuds = None):
-        if liste_noeuds != None:
-            return sorted(liste_noeuds, key=lambda x:x.frequence, reverse=True)
-        else:
-            self.noeuds = sorted(self.noeuds, key=lambda x:x.frequence, reverse=True)
+    @staticmethod
+    def limite_longueurs(longueurs, frequences, longueur_max=LONGUEUR_MAX_CODE):
+        """
+        Limite la longueur des codes à longueur_max, avec l'algorithme du
+        standard JPEG (annexe K.3) : tant qu'il reste des codes trop longs, on
+        raccourcit 2 codes de longueur maximale (en en faisant un code plus
+        court et un "frère" d'un code plus court, que l'on allonge). Les nouvelles
+        longueurs sont ensuite attribuées aux symboles par fréquence décroissante.
+        
+        Args:
+            longueurs: dictionnaire {symbole: longueur du code}
+            frequences: dictionnaire {symbole: nombre d'occurrences}
+            longueur_max: longueur maximale autorisée
+        
+        Returns:
+            longueurs: dictionnaire {symbole: longueur du code}, avec des codes
+                       d'au plus longueur_max bits
+        """
+        longueur_arbre = max(longueurs.values())
+        if longueur_arbre <= longueur_max:
+            return longueurs
+        
+        if len(longueurs) > 2**longueur_max:
+            raise ValueError(f"Trop de symboles ({len(longueurs)}) pour des codes de {longueur_max} bits")
+        
+        nb_codes = [0] * (longueur_arbre + 1)
+        for longueur in longueurs.values():
+            nb_codes[longueur] += 1
+        
+        for i in range(longueur_arbre, longueur_max, -1):
+            while nb_codes[i] > 0:
+                j = i - 2
+                while nb_codes[j] == 0:
+                    j -= 1
+                
+                nb_codes[i] -= 2
+                nb_codes[i - 1] += 1
+                nb_codes[j + 1] += 2
+                nb_codes[j] -= 1
+        
+        symboles = sorted(longueurs, key=lambda symbole: (-frequences[symbole], longueurs[symbole]))
+        
+        nouvelles_longueurs = {}
+        indice = 0
+        for longueur in range(1, longueur_max + 1):
+            for symbole in symboles[indice : indice + nb_codes[longueur]]:
+                nouvelles_longueurs[symbole] = longueur
+            indice += nb_codes[longueur]
+        return nouvelles_longueurs
     
     
-    def generate_dict(self, racine, prefixe=""):
-        if racine.gauche is None and racine.droite is None:
-            return {racine.valeur: prefixe}
-        
-        res = {}
-        if racine.gauche is not None:
-            res.update(self.generate_dict(racine.gauche, prefixe + "0"))
-        if racine.droite is not None:
-            res.update(self.generate_dict(racine.droite, prefixe + "1"))
-        return res
+    def generate_dict(self, racine):
+        """
+        Génère le dictionnaire de Huffman (canonique) associé à l'arbre 'racine' :
+        seule la longueur des codes (limitée à LONGUEUR_MAX_CODE) est tirée de l'arbre.
+        """
+        longueurs = self.limite_longueurs(self.longueurs_codes(racine), self.symbols)
+        symboles_tries = self.ordre_canonique(longueurs)
+        return self.codes_canoniques(symboles_tries, [longueurs[symbole] for symbole in symboles_tries])
     
     
     @staticmethod
@@ -168,6 +340,163 @@ class Huffman:
         return res
     
     
+    def tables_codes(self):
+        """
+        Renvoie les symboles RLE du dictionnaire (sous forme de clés triées,
+        cf. cles_symboles), ainsi que la valeur et la longueur de leurs codes.
+        """
+        if self.tables is None:
+            symboles = list(self.dict)
+            runs = np.array([symbole[0] for symbole in symboles], dtype=np.int64)
+            levels = np.array([symbole[1] for symbole in symboles], dtype=np.int64)
+            
+            codes = np.array([int(self.dict[symbole], 2) for symbole in symboles], dtype=np.int64)
+            longueurs = np.array([len(self.dict[symbole]) for symbole in symboles], dtype=np.int64)
+            
+            cles = cles_symboles(runs, levels)
+            ordre = np.argsort(cles)
+            self.tables = (cles[ordre], codes[ordre], longueurs[ordre])
+            
+            # table dense des indices des symboles, indexée par (run, level - level_min),
+            # si elle n'est pas trop grande (le symbole d'échappement n'y figure pas)
+            self.table_dense = None
+            runs, levels = runs[ordre], levels[ordre]
+            paires = np.flatnonzero(runs >= 0)
+            if paires.size > 0:
+                level_min = int(levels[paires].min())
+                forme = (int(runs[paires].max()) + 1, int(levels[paires].max()) - level_min + 1)
+                if forme[0] * forme[1] <= TAILLE_MAX_TABLE_DENSE:
+                    table = np.full(forme, -1, dtype=np.intp)
+                    table[runs[paires], levels[paires] - level_min] = paires
+                    self.table_dense = (table, level_min)
+        
+        return self.tables
+    
+    
+    def indices_symboles(self, runs, levels):
+        """
+        Renvoie l'indice (dans les tables de tables_codes) de chaque paire
+        (run, level), ou -1 si la paire n'a pas de code.
+        """
+        cles, _, _ = self.tables_codes()
+        
+        if self.table_dense is not None:
+            table, level_min = self.table_dense
+            runs = np.asarray(runs, dtype=np.intp)
+            levels = np.asarray(levels, dtype=np.intp) - level_min
+            
+            dans_la_table = (runs < table.shape[0]) & (levels >= 0) & (levels < table.shape[1])
+            if dans_la_table.all():
+                return table[runs, levels]
+            
+            indices = np.full(runs.size, -1, dtype=np.intp)
+            indices[dans_la_table] = table[runs[dans_la_table], levels[dans_la_table]]
+            return indices
+        
+        cles_frame = cles_symboles(runs, levels)
+        indices = np.minimum(np.searchsorted(cles, cles_frame), len(cles) - 1)
+        indices[cles[indices] != cles_frame] = -1
+        
+        return indices
+    
+    
+    def nb_bits_body(self, runs, levels):
+        """
+        Renvoie le nombre total de bits qu'occuperaient les codes des paires
+        (run, level) données (paires échappées comprises), sans les encoder.
+        """
+        _, _, longueurs = self.tables_codes()
+        indices = self.indices_symboles(runs, levels)
+        
+        echappes = indices < 0
+        if not echappes.any():
+            return int(longueurs[indices].sum())
+        
+        longueur_echappement = len(self.dict[ECHAPPEMENT]) + NB_BITS_RUN_ECHAPPEMENT + NB_BITS_LEVEL_ECHAPPEMENT
+        return int(longueurs[indices[~echappes]].sum()) + longueur_echappement * int(echappes.sum())
+    
+    
+    def peut_encoder(self, runs, levels):
+        """
+        Indique si toutes les paires (run, level) données peuvent être codées :
+        les paires absentes du dictionnaire doivent être échappées (cf.
+        ECHAPPEMENT), et donc avoir un run écrit sur NB_BITS_RUN_ECHAPPEMENT
+        bits et un level écrit sur NB_BITS_LEVEL_ECHAPPEMENT bits.
+        """
+        echappes = self.indices_symboles(runs, levels) < 0
+        if not echappes.any():
+            return True
+        
+        if ECHAPPEMENT not in self.dict:
+            return False
+        
+        runs_echappes = np.asarray(runs, dtype=np.int64)[echappes]
+        levels_echappes = np.asarray(levels, dtype=np.int64)[echappes]
+        
+        return bool((runs_echappes.max() < 2**NB_BITS_RUN_ECHAPPEMENT)
+                    and (levels_echappes.min() >= -2**(NB_BITS_LEVEL_ECHAPPEMENT - 1))
+                    and (levels_echappes.max() < 2**(NB_BITS_LEVEL_ECHAPPEMENT - 1)))
+    
+    
+    def encode_tableaux(self, runs, levels, debuts):
+        """
+        Encode (en une seule passe) une frame RLE sous forme de tableaux : chaque
+        paire (run, level) est associée à son code (cf. indices_symboles), puis
+        les codes sont écrits dans des octets (cf. bit_io.py).
+        
+        Returns:
+            octets: bytearray contenant les codes de tous les macroblocs
+            decalages_bits: tableau de taille nb_macroblocs + 1, tel que le
+                            macrobloc n°k occupe les bits n°decalages_bits[k]
+                            (inclus) à n°decalages_bits[k+1] (exclu)
+        """
+        cles, codes, longueurs = self.tables_codes()
+        
+        indices = self.indices_symboles(runs, levels)
+        
+        echappes = indices < 0
+        if not echappes.any():
+            longueurs_frame = longueurs[indices]
+            
+            writer = BitWriter()
+            writer.ecrit_codes(codes[indices], longueurs_frame)
+        
+        else:
+            # les paires absentes de la table sont codées par le symbole
+            # d'échappement, suivi de leur valeur (cf. ECHAPPEMENT)
+            if ECHAPPEMENT not in self.dict:
+                raise KeyError("Certaines paires (run, level) n'ont pas de code de Huffman")
+            
+            runs_echappes = np.asarray(runs, dtype=np.int64)[echappes]
+            if runs_echappes.max() >= 2**NB_BITS_RUN_ECHAPPEMENT:
+                raise ValueError(f"Run trop grand pour être échappé : {runs_echappes.max()}")
+            
+            indices = np.where(echappes, np.searchsorted(cles, cles_symboles(*ECHAPPEMENT)), indices)
+            
+            # chaque paire échappée occupe 2 codes : celui du symbole d'échappement,
+            # puis la valeur de la paire
+            nb_bits_valeur = NB_BITS_RUN_ECHAPPEMENT + NB_BITS_LEVEL_ECHAPPEMENT
+            positions = np.arange(len(indices)) + np.cumsum(echappes) - echappes
+            
+            codes_frame = np.zeros(len(indices) + len(runs_echappes), dtype=np.int64)
+            longueurs_codes_frame = np.zeros(len(codes_frame), dtype=np.int64)
+            codes_frame[positions] = codes[indices]
+            longueurs_codes_frame[positions] = longueurs[indices]
+            # (cles_symboles écrit justement le run, puis le level sur 16 bits)
+            codes_frame[positions[echappes] + 1] = cles_symboles(runs_echappes, np.asarray(levels)[echappes])
+            longueurs_codes_frame[positions[echappes] + 1] = nb_bits_valeur
+            
+            writer = BitWriter()
+            writer.ecrit_codes(codes_frame, longueurs_codes_frame)
+            
+            longueurs_frame = longueurs[indices] + nb_bits_valeur * echappes
+        
+        decalages_bits = np.zeros(len(longueurs_frame) + 1, dtype=np.int64)
+        np.cumsum(longueurs_frame, out=decalages_bits[1 : ])
+        
+        return writer.octets(), decalages_bits[debuts]
+    
+    
     @staticmethod
     def encode_ascii(phrase):
         res = ""
@@ -177,94 +506,245 @@ class Huffman:
     
     
     def decode_phrase(self, enc, dico = None):
-        buffer = ""
-        res = ""
-        
-        if dico is not None:
-            dico = self.reverse_dict(dico)
-        else:
-            dico = self.reverse_dict(self.dict)
-        for l in enc:
-            buffer += l
-            if buffer in dico:
-                res += dico[buffer]
-                buffer = ""
-        return res
+        if dico is None:
+            dico = self.dict
+        return "".join(DecodeurHuffman(dico).decode(enc))
     
     
     @staticmethod
     def decode_frame_RLE(enc, dico):
         """
         Idem decode_phrase, mais renvoie une liste au lieu d'une chaîne de caractères.
+        Pour décoder plusieurs macroblocs avec le même dictionnaire, il vaut mieux
+        créer une seule instance de DecodeurHuffman.
         """
-        buffer = ""
-        res = []
-        dico = Huffman.reverse_dict(dico)
-        for l in enc:
-            buffer += l
-            if buffer in dico:
-                res.append(dico[buffer])
-                buffer = ""
-        return res
+        return DecodeurHuffman(dico).decode(enc)
     
     
     def dictToBin(self):
-        bina=''
-        for cle,valeur in self.dict.items():
-            bina+='1'
-            a,b=cle
-            
-            bina+=(np.binary_repr(a,16))
-            
-            if b >= 0:
-                bina += '0'
-            else:
-                bina += '1'
-            
-            bina+=(np.binary_repr(abs(b),16))
-            
-            c=valeur
-            size=len(c)
-            bina+=(np.binary_repr(size,8))
-            bina+=c
-        bina+='0'
-        return bina
+        """
+        Encode le dictionnaire (canonique) de Huffman. Les codes étant canoniques,
+        on ne transmet que le nombre de codes de chaque longueur, puis les
+        symboles (run, level) dans l'ordre canonique. Tous les entiers sont
+        écrits avec des codes de Golomb exponentiels (cf. exp_golomb.py) :
+        
+        longueur_max | nb_codes(1) | ... | nb_codes(longueur_max) | run | level | run | level | ...
+        """
+        longueurs = {symbole: len(code) for (symbole, code) in self.dict.items()}
+        symboles_tries = self.ordre_canonique(longueurs)
+        
+        longueur_max = max(longueurs.values(), default=0)
+        nb_codes = [0] * (longueur_max + 1)
+        for longueur in longueurs.values():
+            nb_codes[longueur] += 1
+        
+        morceaux = [exp_golomb.encode_non_signe(longueur_max)]
+        morceaux += [exp_golomb.encode_non_signe(nb) for nb in nb_codes[1 : ]]
+        for (run, level) in symboles_tries:
+            morceaux.append(exp_golomb.encode_non_signe(run))
+            morceaux.append(exp_golomb.encode_signe(level))
+        return "".join(morceaux)
     
     
     @staticmethod
     def binToDict(bina):
-        k=0
-        state=True
-        dico={}
-        while state==True:
-            if bina[k]=='0':
-                state=False
+        """
+        Opération inverse de dictToBin : reconstruit les codes canoniques à
+        partir des longueurs et des symboles transmis.
+        """
+        longueur_max, k = exp_golomb.decode_non_signe(bina, 0)
+        
+        longueurs = []
+        for longueur in range(1, longueur_max + 1):
+            nb, k = exp_golomb.decode_non_signe(bina, k)
+            longueurs += [longueur] * nb
+        
+        symboles_tries = []
+        for _ in range(len(longueurs)):
+            run, k = exp_golomb.decode_non_signe(bina, k)
+            level, k = exp_golomb.decode_signe(bina, k)
+            symboles_tries.append((run, level))
+        
+        return Huffman.codes_canoniques(symboles_tries, longueurs)
+
+
+##############################################################################
+
+
+def cles_symboles(runs, levels):
+    """
+    Associe à chaque paire (run, level) un entier unique (run sur les bits de
+    poids fort, level sur les 16 bits de poids faible), ce qui permet de
+    manipuler les symboles RLE avec Numpy (tri, recherche dichotomique, ...).
+    """
+    runs = np.asarray(runs, dtype=np.int64)
+    levels = np.asarray(levels, dtype=np.int64)
+    return (runs << 16) | (levels & 0xFFFF)
+
+
+def symboles_des_cles(cles):
+    """
+    Opération inverse de cles_symboles.
+    
+    Returns:
+        (runs, levels): tableaux d'entiers
+    """
+    runs = cles >> 16
+    levels = ((cles & 0xFFFF) ^ 0x8000) - 0x8000
+    return runs, levels
+
+
+##############################################################################
+
+
+class DecodeurHuffman(DecodeurEntropique):
+    """
+    Décodeur de Huffman à base de tables de correspondance : les NB_BITS_TABLE
+    prochains bits du bitstream donnent directement le symbole et la longueur
+    de son code. Les codes plus longs renvoient vers une sous-table, indexée
+    par les bits suivants. Chaque symbole est donc décodé en une consultation
+    par niveau de table (au plus LONGUEUR_MAX_CODE / NB_BITS_TABLE niveaux),
+    au lieu d'une recherche dans un dictionnaire après chaque bit.
+    
+    Chaque entrée d'une table est un tuple (symbole, longueur, sous_table) :
+        - si sous_table vaut None, 'longueur' est la longueur totale du code
+        - sinon, sous_table est un tuple (table, nb_bits), et 'longueur' est
+          le nombre de bits consommés par la table actuelle
+    Les entrées ne correspondant à aucun code valent None.
+    """
+    
+    def __init__(self, dico, nb_bits_table=NB_BITS_TABLE):
+        """
+        Args:
+            dico: dictionnaire {symbole: code (chaîne de "0" et de "1")}
+            nb_bits_table: nombre (maximal) de bits indexant chaque table
+        """
+        self.nb_bits_table = nb_bits_table
+        
+        codes = [(code, symbole) for (symbole, code) in dico.items()]
+        self.longueur_max = max(len(code) for (code, _) in codes)
+        self.table = self.construit_table(codes, 0)
+        
+        # certains symboles sont suivis de bits supplémentaires (cf. lit_suffixe) :
+        # ici, seul le symbole d'échappement l'est
+        self.avec_suffixes = ECHAPPEMENT in dico
+        self.nb_bits_suffixe_max = NB_BITS_RUN_ECHAPPEMENT + NB_BITS_LEVEL_ECHAPPEMENT
+    
+    
+    def construit_table(self, codes, decalage):
+        """
+        Construit la table associée aux codes donnés, dont les 'decalage'
+        premiers bits ont déjà été lus.
+        
+        Returns:
+            (table, nb_bits): table de 2**nb_bits entrées
+        """
+        longueur_max = max(len(code) for (code, _) in codes)
+        nb_bits = min(self.nb_bits_table, longueur_max - decalage)
+        fin = decalage + nb_bits
+        
+        table = [None] * 2**nb_bits
+        codes_longs = {}
+        
+        for (code, symbole) in codes:
+            longueur = len(code)
+            
+            if longueur <= fin:
+                # toutes les entrées commençant par le code désignent ce symbole
+                debut = int(code[decalage : ], 2) << (fin - longueur)
+                table[debut : debut + 2**(fin - longueur)] = [(symbole, longueur, None)] * 2**(fin - longueur)
+            
             else:
-                k+=1
-                a=bina[k:k+16]
-                k+=16
-                
-                bin_signe = bina[k:k+1]
-                if bin_signe == '0':
-                    signe = 1
-                else:
-                    signe = -1
-                k += 1
+                codes_longs.setdefault(int(code[decalage : fin], 2), []).append((code, symbole))
+        
+        for (indice, sous_codes) in codes_longs.items():
+            table[indice] = (None, nb_bits, self.construit_table(sous_codes, fin))
+        
+        return (table, nb_bits)
+    
+    
+    def lit_suffixe(self, symbole, valeur, taille, k):
+        """
+        Lit les bits qui suivent éventuellement le code de 'symbole' (celui-ci
+        se terminant au bit n°k de l'entier 'valeur' de 'taille' bits, cf.
+        decode_bits).
+        
+        Returns:
+            (symbole, k_suivant): le symbole complété, et l'indice du premier
+                                  bit qui suit ses bits supplémentaires
+        """
+        if symbole != ECHAPPEMENT:
+            return symbole, k
+        
+        # la paire (run, level) est écrite juste après le code d'échappement
+        # (cf. cles_symboles)
+        nb_bits_valeur = NB_BITS_RUN_ECHAPPEMENT + NB_BITS_LEVEL_ECHAPPEMENT
+        run, level = symboles_des_cles(lit_bits(valeur, taille, k, nb_bits_valeur))
+        
+        return (run, level), k + nb_bits_valeur
+    
+    
+    def decode(self, enc):
+        """
+        Décode le bitstream 'enc' (chaîne de "0" et de "1"), cf. decode_bits.
+        
+        Returns:
+            res: liste des symboles décodés
+        """
+        return self.decode_bits(int(enc, 2) if len(enc) > 0 else 0, len(enc))
+    
+    
+    def decode_bits(self, valeur, nb_bits):
+        """
+        Décode les nb_bits bits de l'entier 'valeur' (le 1er bit étant celui de
+        poids fort) : chaque table est indexée directement par les bits
+        suivants de l'entier. Les derniers bits, s'ils ne forment pas un code
+        complet, sont ignorés.
+        
+        Returns:
+            res: liste des symboles décodés
+        """
+        res = []
+        k = 0
+        
+        # on complète la fin du bitstream par des zéros, pour pouvoir toujours
+        # lire nb_bits_table bits (et les éventuels bits qui suivent le code)
+        marge = self.longueur_max + self.nb_bits_suffixe_max
+        valeur <<= marge
+        taille = nb_bits + marge
+        
+        table_principale = self.table
+        lit_suffixe = self.lit_suffixe if self.avec_suffixes else None
+        
+        while k < nb_bits:
+            table, nb_bits_table = table_principale
+            debut_code = k
+            
+            while True:
+                entree = table[(valeur >> (taille - k - nb_bits_table)) & ((1 << nb_bits_table) - 1)]
                 
-                abs_b=bina[k:k+16]
-                k+=16
+                if entree is None:
+                    raise ValueError(f"Code de Huffman invalide à l'indice {debut_code}")
                 
-                size=bina[k:k+8]
-                k+=8
-                size=int(size,2)
-                c=bina[k:k+size]
-                k+=size
+                symbole, longueur, sous_table = entree
+                if sous_table is None:
+                    break
                 
-                a=int(a,2)
-                abs_b=int(abs_b, 2)
-                dico[(a, signe * abs_b)] = c
+                k += nb_bits_table
+                table, nb_bits_table = sous_table
+            
+            k = debut_code + longueur
+            
+            if lit_suffixe is not None:
+                symbole, k = lit_suffixe(symbole, valeur, taille, k)
+            
+            if k > nb_bits:
+                # code incomplet
+                break
+            
+            res.append(symbole)
         
-        return dico
+        return res
 
 
 ##############################################################################
@@ -20,6 +20,9 @@ from logger import LogLevel, Logger
 from image_generator import MosaicImageGenerator
 from image_visualizer import ImageVisualizer
 from encoder import Encoder
+from operateurs import get_DCT_operator
+from chroma import CHROMA_420
+from quantification import MATRICE_JPEG
 from network_transmission import Server, Client
 from bitstream import BitstreamSender
 from decoder import Decoder
@@ -149,8 +152,18 @@ if numero_methode_choisie not in list(dico_methodes.keys()):
 # # # -------------------------IMAGE ENCODING-------------------------- # # #
 
 
+# mode de sous-échantillonnage de la chrominance (cf. chroma.py) : CHROMA_444,
+# CHROMA_422 ou CHROMA_420
+sous_echantillonnage = CHROMA_420
+
+# facteur de qualité de la quantification (entre 1 et 100), ou QUALITE_SEUIL
+# pour la quantification historique par seuillage, et type de matrice de 
+# quantification (cf. quantification.py)
+qualite = 75
+type_matrice = MATRICE_JPEG
+
 # création de l'opérateur orthogonal de la DCT
-A = Encoder.DCT_operator(macroblock_size)
+A = get_DCT_operator(macroblock_size)
 
 
 img_visu = ImageVisualizer()
@@ -174,7 +187,9 @@ t_fin_conversion_RGB_YUV = time()
 duree_conversion_RGB_YUV = t_fin_conversion_RGB_YUV - t_fin_extraction_frame_RGB
 
 # frame YUV --> frame RLE
-rle_data = enc.decompose_frame_en_macroblocs_via_DCT(image_yuv, img_size, macroblock_size, DEFAULT_QUANTIZATION_THRESHOLD, A)
+rle_data = enc.decompose_frame_en_macroblocs_via_DCT(image_yuv, img_size, macroblock_size, DEFAULT_QUANTIZATION_THRESHOLD, A,
+                                                     sous_echantillonnage=sous_echantillonnage,
+                                                     qualite=qualite, type_matrice=type_matrice)
 t_fin_conversion_YUV_RLE = time()
 duree_conversion_YUV_RLE = t_fin_conversion_YUV_RLE - t_fin_conversion_RGB_YUV
 
@@ -182,7 +197,7 @@ duree_conversion_YUV_RLE = t_fin_conversion_YUV_RLE - t_fin_conversion_RGB_YUV
 # # # -------------------------SENDING DATA OVER NETWORK-------------------------- # # #
 
 
-# le bufsize doit impérativement être >= 67 (en pratique : OK)
+# le bufsize doit impérativement être >= 10 (en pratique : OK)
 bufsize = 4096
 
 HOST = "localhost"
@@ -201,7 +216,7 @@ serv = Server(HOST, PORT, bufsize, affiche_messages)
 cli = Client(HOST, PORT, bufsize, affiche_messages)
 
 global received_data
-received_data = ""
+received_data = bytearray()
 
 def on_received_data(data):
     global received_data
@@ -216,7 +231,8 @@ t_fin_initialisation_reseau = time()
 duree_initialisation_reseau = t_fin_initialisation_reseau - t_fin_conversion_YUV_RLE
 
 # frame RLE --> bitstream --> réseau
-bit_sender = BitstreamSender(frame_id, img_size, macroblock_size, rle_data, cli, bufsize)
+bit_sender = BitstreamSender(frame_id, img_size, macroblock_size, rle_data, cli, bufsize,
+                             sous_echantillonnage, qualite, type_matrice)
 bit_sender.start_sending_messages()
 t_fin_conversion_RLE_bitstream_et_passage_reseau = time()
 duree_generation_dico_huffman = bit_sender.th_WriteInBitstreamBuffer.duree_generation_dico_huffman
@@ -270,7 +286,8 @@ duree_conversion_bitstream_recu_RLE = t_fin_conversion_bitstream_recu_RLE - t_fi
 log.debug(f"Transmission réseau réussie : {str(rle_data == dec_rle_data).upper()}\n")
 
 # frame RLE --> frame YUV
-dec_yuv_data = dec.recompose_frame_via_DCT(dec_rle_data, img_size, macroblock_size, A)
+dec_yuv_data = dec.recompose_frame_via_DCT(dec_rle_data, img_size, macroblock_size, A, sous_echantillonnage=sous_echantillonnage,
+                                           qualite=qualite, type_matrice=type_matrice)
 t_fin_conversion_RLE_YUV = time()
 duree_conversion_RLE_YUV = t_fin_conversion_RLE_YUV - t_fin_conversion_bitstream_recu_RLE
 
@@ -328,7 +345,7 @@ taille_originale_en_bits = 8 * 3 * img_width * img_height
 
 taille_donnees_compressees_huffman = bit_sender.th_WriteInBitstreamBuffer.taille_donnees_compressees_huffman
 taille_dico_encode_huffman = len(bit_sender.th_WriteInBitstreamBuffer.dict_huffman_encode)
-taille_bitstream_total = len(received_data) # = len(bit_sender.th_WriteInBitstreamBuffer.bit_generator.bitstream)
+taille_bitstream_total = 8 * len(received_data) # = 8 * len(bit_sender.th_WriteInBitstreamBuffer.bit_generator.bitstream)
 
 # on considère que le header et le tail font partie des métadonnees du bitstream
 taille_metadonnees = taille_bitstream_total - taille_donnees_compressees_huffman - taille_dico_encode_huffman
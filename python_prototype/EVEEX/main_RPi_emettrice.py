@@ -11,10 +11,12 @@ DEFAULT_QUANTIZATION_THRESHOLD = 10
 
 import sys
 from time import time
-import numpy as np
 
 from logger import Logger, LogLevel
 from encoder import Encoder
+from operateurs import get_DCT_operator
+from chroma import CHROMA_420
+from quantification import MATRICE_JPEG
 from network_transmission import Client
 from bitstream_RPi import BitstreamSender
 
@@ -54,8 +56,18 @@ if (img_width % macroblock_size != 0 or img_height % macroblock_size != 0) or (i
 # format standard
 img_size = (img_width, img_height)
 
+# mode de sous-échantillonnage de la chrominance (cf. chroma.py) : CHROMA_444,
+# CHROMA_422 ou CHROMA_420
+sous_echantillonnage = CHROMA_420
+
+# facteur de qualité de la quantification (entre 1 et 100), ou QUALITE_SEUIL
+# pour la quantification historique par seuillage, et type de matrice de 
+# quantification (cf. quantification.py)
+qualite = 75
+type_matrice = MATRICE_JPEG
+
 # création de l'opérateur orthogonal de la DCT
-A = Encoder.DCT_operator(macroblock_size)
+A = get_DCT_operator(macroblock_size)
 
 enc = Encoder()
 
@@ -87,16 +99,20 @@ def encode_et_envoie_frame(image_BGR, frame_id):
         log.debug(f"Encodage - Image BGR n°{frame_id}")
     
     # frame BGR --> frame YUV
-    image_yuv = enc.RGB_to_YUV(np.array(image_BGR, dtype=float), mode_RPi=True)
+    # (conversion en virgule fixe : la frame uint8 n'est jamais convertie en float64)
+    image_yuv = enc.RGB_to_YUV_fixed_point(image_BGR, mode_RPi=True)
     
     # frame YUV --> frame RLE
-    rle_data = enc.decompose_frame_en_macroblocs_via_DCT(image_yuv, img_size, macroblock_size, DEFAULT_QUANTIZATION_THRESHOLD, A)
+    rle_data = enc.decompose_frame_en_macroblocs_via_DCT(image_yuv, img_size, macroblock_size, DEFAULT_QUANTIZATION_THRESHOLD, A,
+                                                         sous_echantillonnage=sous_echantillonnage,
+                                                         qualite=qualite, type_matrice=type_matrice)
     
     if affiche_debug:
         log.debug(f"Envoi n°{frame_id} en cours ...")
     
     # frame RLE --> bitstream --> réseau
-    bit_sender = BitstreamSender(frame_id, img_size, macroblock_size, rle_data, cli, bufsize)
+    bit_sender = BitstreamSender(frame_id, img_size, macroblock_size, rle_data, cli, bufsize,
+                                 sous_echantillonnage, qualite, type_matrice)
     bit_sender.send_frame_RLE()
     
     if affiche_debug:
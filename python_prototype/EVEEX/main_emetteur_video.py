@@ -15,8 +15,17 @@ import numpy as np
 from video_handler import VideoHandler
 from logger import Logger, LogLevel
 from encoder import Encoder
+from parallel_encoder import ParallelEncoder
+from operateurs import get_DCT_operator
+from chroma import CHROMA_420
+from quantification import MATRICE_JPEG
+from tables_huffman import TABLE_DYNAMIQUE
+from categories import SYMBOLISATION_RUN_LEVEL
+from codage_entropique import CODEUR_HUFFMAN
 from network_transmission import Client
+from bitstream import BitstreamGenerator
 from bitstream_RPi import BitstreamSender
+from pipeline import Pipeline
 
 
 # # # ---------------------------USEFUL DATA---------------------------- # # #
@@ -29,6 +38,17 @@ video_name = "video_test.mp4"
 generer_fichier_log = False
 affiche_debug = True
 
+# si True, les frames sont encodées par un pool de processus, par bandes de
+# macroblocs (cf. parallel_encoder.py)
+encodage_parallele = True
+
+# si True, la capture, la transformation, le codage entropique et l'envoi
+# des frames se font en même temps, dans des étages séparés (cf. pipeline.py)
+utilise_pipeline = True
+
+# nombre maximal de frames en attente entre 2 étages du pipeline
+taille_max_files_pipeline = 4
+
 log = Logger.get_instance()
 log.set_log_level(LogLevel.DEBUG)
 
@@ -39,8 +59,34 @@ if generer_fichier_log:
 # Doit être <= 63
 macroblock_size = 16
 
+# mode de sous-échantillonnage de la chrominance (cf. chroma.py) : CHROMA_444,
+# CHROMA_422 ou CHROMA_420
+sous_echantillonnage = CHROMA_420
+
+# facteur de qualité de la quantification (entre 1 et 100), ou QUALITE_SEUIL
+# pour la quantification historique par seuillage, et type de matrice de 
+# quantification (cf. quantification.py)
+qualite = 75
+type_matrice = MATRICE_JPEG
+
+# identifiant de la table de Huffman statique à utiliser (entraînée au préalable
+# avec tables_huffman.py, et présente aussi côté récepteur), ou TABLE_DYNAMIQUE
+# pour envoyer un dictionnaire de Huffman propre à chaque frame
+id_table_huffman = TABLE_DYNAMIQUE
+
+# symboles codés par Huffman : paires (run, level), ou SYMBOLISATION_CATEGORIES
+# pour des paires (run, categorie) à la JPEG, suivies de l'amplitude des levels
+# (cf. categories.py)
+symbolisation = SYMBOLISATION_RUN_LEVEL
+
+# codeur entropique du flux : CODEUR_HUFFMAN (remplacé automatiquement par
+# CODEUR_EXP_GOLOMB pour les frames où le dictionnaire coûte trop cher), ou
+# CODEUR_ARITHMETIQUE pour un codage arithmétique adaptatif, plus compact mais
+# plus lent, et sans dictionnaire à transmettre (cf. codage_entropique.py)
+id_codeur = CODEUR_HUFFMAN
+
 # création de l'opérateur orthogonal de la DCT
-A = Encoder.DCT_operator(macroblock_size)
+A = get_DCT_operator(macroblock_size)
 
 enc = Encoder()
 
@@ -66,7 +112,7 @@ frames = VideoHandler.vid2frames(video_path)
 nb_frames = len(frames)
 
 # il faut s'assurer que macroblock_size divise bien les 2 dimensions suivantes
-img_width, img_height = frames[0].shape[ : 2]
+img_height, img_width = frames[0].shape[ : 2]
 
 if img_width % macroblock_size != 0 or img_height % macroblock_size != 0:
     log.error("Dimensions de la vidéo invalides !")
@@ -77,6 +123,13 @@ img_size = (img_width, img_height)
 
 log.debug("Conversion finie")
 
+if encodage_parallele:
+    # pool de processus persistant (créé une seule fois pour toute la vidéo)
+    encodeur_parallele = ParallelEncoder(img_size, macroblock_size, DEFAULT_QUANTIZATION_THRESHOLD, A, mode_RPi=True,
+                                         sous_echantillonnage=sous_echantillonnage,
+                                         qualite=qualite, type_matrice=type_matrice)
+    log.debug(f"Encodage parallèle : {encodeur_parallele.nb_processus} processus, {len(encodeur_parallele.bornes_bandes)} bandes par frame")
+
 
 # # # -------------------------SENDING DATA OVER NETWORK-------------------------- # # #
 
@@ -98,6 +151,28 @@ cli.connect_to_server()
 cli.send_data_to_server(f"SIZE_INFO.{img_width}.{img_height}.{macroblock_size}")
 
 
+def encode_frame(image_BGR):
+    """
+    frame BGR --> frame RLE
+    """
+    if encodage_parallele:
+        # frame BGR --> frame YUV --> frame RLE (par bandes, en parallèle)
+        # la frame RLE est gardée sous forme de tableaux, directement utilisés
+        # par le codage de Huffman
+        rle_data = encodeur_parallele.encode_frame(image_BGR)
+    
+    else:
+        # frame BGR --> frame YUV
+        image_yuv = enc.RGB_to_YUV(np.array(image_BGR, dtype=float), mode_RPi=True)
+        
+        # frame YUV --> frame RLE
+        rle_data = enc.decompose_frame_en_macroblocs_via_DCT(image_yuv, img_size, macroblock_size, DEFAULT_QUANTIZATION_THRESHOLD, A,
+                                                             sous_echantillonnage=sous_echantillonnage,
+                                                             qualite=qualite, type_matrice=type_matrice)
+    
+    return(rle_data)
+
+
 def encode_et_envoie_frame(image_BGR, frame_id):
     if frame_id == 1 and affiche_debug:
         print("")
@@ -106,17 +181,14 @@ def encode_et_envoie_frame(image_BGR, frame_id):
         log.debug(f"{frame_id}")
         log.debug(f"Encodage - Image BGR n°{frame_id}")
     
-    # frame BGR --> frame YUV
-    image_yuv = enc.RGB_to_YUV(np.array(image_BGR, dtype=float), mode_RPi=True)
-    
-    # frame YUV --> frame RLE
-    rle_data = enc.decompose_frame_en_macroblocs_via_DCT(image_yuv, img_size, macroblock_size, DEFAULT_QUANTIZATION_THRESHOLD, A)
+    rle_data = encode_frame(image_BGR)
     
     if affiche_debug:
         log.debug(f"Envoi n°{frame_id} en cours ...")
     
     # frame RLE --> bitstream --> réseau
-    bit_sender = BitstreamSender(frame_id, img_size, macroblock_size, rle_data, cli, bufsize)
+    bit_sender = BitstreamSender(frame_id, img_size, macroblock_size, rle_data, cli, bufsize,
+                                 sous_echantillonnage, qualite, type_matrice, id_table_huffman, symbolisation, id_codeur)
     bit_sender.send_frame_RLE()
     
     if affiche_debug:
@@ -125,10 +197,52 @@ def encode_et_envoie_frame(image_BGR, frame_id):
         print("")
 
 
+#----------------------------------------------------------------------------#
+
+# étages du pipeline : chaque élément qui transite est un tuple (frame_id, données)
+
+
+def etage_transformation(element):
+    # frame BGR --> frame RLE
+    (frame_id, image_BGR) = element
+    return(frame_id, encode_frame(image_BGR))
+
+
+def etage_codage_entropique(element):
+    # frame RLE --> paquets du bitstream
+    (frame_id, rle_data) = element
+    paquets = BitstreamGenerator.genere_paquets_frame_RLE(frame_id, img_size, macroblock_size, rle_data, bufsize,
+                                                          sous_echantillonnage, qualite, type_matrice, id_table_huffman, symbolisation, id_codeur)
+    return(frame_id, paquets)
+
+
+def etage_envoi(element):
+    # paquets du bitstream --> réseau
+    (frame_id, paquets) = element
+    BitstreamSender.envoie_paquets(cli, paquets)
+    
+    if affiche_debug:
+        log.debug(f"Envoi n°{frame_id} réussi")
+
+
+#----------------------------------------------------------------------------#
+
 # envoi effectif des frames
-for frame_id in range(1, nb_frames + 1):
-    frame = frames[frame_id - 1]
-    encode_et_envoie_frame(frame, frame_id)
+if utilise_pipeline:
+    pipeline = Pipeline(((frame_id, frames[frame_id - 1]) for frame_id in range(1, nb_frames + 1)),
+                        taille_max_files=taille_max_files_pipeline)
+    pipeline.ajoute_etage("transformation", etage_transformation)
+    pipeline.ajoute_etage("codage entropique", etage_codage_entropique)
+    pipeline.ajoute_etage("envoi", etage_envoi)
+    pipeline.execute()
+
+else:
+    for frame_id in range(1, nb_frames + 1):
+        frame = frames[frame_id - 1]
+        encode_et_envoie_frame(frame, frame_id)
+
+if encodage_parallele:
+    encodeur_parallele.fermer()
 
 sleep(0.5)
 
@@ -149,6 +263,10 @@ log.debug(f"Taille des frames : {img_size}")
 log.debug(f"Macroblock size : {macroblock_size}x{macroblock_size}")
 log.debug(f"Nombre moyen de FPS (émission / encodage) : {nb_fps_moyen:.2f}")
 
+if utilise_pipeline:
+    print("")
+    pipeline.affiche_statistiques()
+
 print("")
 log.debug("Fin émetteur vidéo")
 
@@ -20,8 +20,9 @@ from random import randint
 from logger import LogLevel, Logger
 from image_generator import MosaicImageGenerator
 from image_visualizer import ImageVisualizer
-from iDTT import DTT_operator, generer_decomp, round_matrix
+from iDTT import round_matrix
 from encoder import Encoder
+from operateurs import get_operateur, get_decomp
 from network_transmission import Server, Client
 from bitstream import BitstreamSender
 from decoder import Decoder
@@ -155,13 +156,15 @@ if numero_methode_choisie not in list(dico_methodes.keys()):
 
 """
 Pour tester une sorte de "DCT entière" en recyclant la méthode de la iDTT,
-remplacer "A = DTT_operator(macroblock_size)" par "A = Encoder.DCT_operator(macroblock_size)"
+remplacer "transformation = 'DTT'" par "transformation = 'DCT'"
 """
-A = DTT_operator(macroblock_size)
-#A = Encoder.DCT_operator(macroblock_size)
+transformation = "DTT"
+#transformation = "DCT"
 
-# génération de la décomposition de A en SERMs (--> cf. iDTT.py)
-(P, S) = generer_decomp(A)
+A = get_operateur(transformation, macroblock_size)
+
+# génération (ou lecture en cache) de la décomposition de A en SERMs (--> cf. iDTT.py)
+(P, S) = get_decomp(transformation, macroblock_size)
 
 
 img_visu = ImageVisualizer()
@@ -193,7 +196,7 @@ duree_conversion_YUV_RLE = t_fin_conversion_YUV_RLE - t_fin_conversion_RGB_YUV
 # # # -------------------------SENDING DATA OVER NETWORK-------------------------- # # #
 
 
-# le bufsize doit impérativement être >= 67 (en pratique : OK)
+# le bufsize doit impérativement être >= 10 (en pratique : OK)
 bufsize = 4096
 
 HOST = "localhost"
@@ -212,7 +215,7 @@ serv = Server(HOST, PORT, bufsize, affiche_messages)
 cli = Client(HOST, PORT, bufsize, affiche_messages)
 
 global received_data
-received_data = ""
+received_data = bytearray()
 
 def on_received_data(data):
     global received_data
@@ -338,7 +341,7 @@ taille_originale_en_bits = 8 * 3 * img_width * img_height
 
 taille_donnees_compressees_huffman = bit_sender.th_WriteInBitstreamBuffer.taille_donnees_compressees_huffman
 taille_dico_encode_huffman = len(bit_sender.th_WriteInBitstreamBuffer.dict_huffman_encode)
-taille_bitstream_total = len(received_data) # = len(bit_sender.th_WriteInBitstreamBuffer.bit_generator.bitstream)
+taille_bitstream_total = 8 * len(received_data) # = 8 * len(bit_sender.th_WriteInBitstreamBuffer.bit_generator.bitstream)
 
 # on considère que le header et le tail font partie des métadonnees du bitstream
 taille_metadonnees = taille_bitstream_total - taille_donnees_compressees_huffman - taille_dico_encode_huffman
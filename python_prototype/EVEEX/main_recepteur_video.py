@@ -11,8 +11,8 @@ import numpy as np
 from video_handler import VideoHandler
 from logger import Logger, LogLevel
 from network_transmission import Server
-from encoder import Encoder
 from decoder import Decoder
+from decodeur_incremental import DecodeurIncremental
 
 
 # # # ---------------------------USEFUL DATA---------------------------- # # #
@@ -38,11 +38,12 @@ global img_height
 
 global img_size
 
-# opérateur orthogonal de la DCT
-global A
-
 dec = Decoder()
 
+# les frames sont décodées au fil de la réception de leurs paquets
+# (cf. decodeur_incremental.py)
+decodeur_incremental = DecodeurIncremental()
+
 global frames_recues
 frames_recues = []
 
@@ -61,9 +62,6 @@ PORT = 3456
 
 serv = Server(HOST, PORT, bufsize, affiche_messages=False)
 
-global received_data
-received_data = ""
-
 global compteur_images_recues
 compteur_images_recues = 0
 
@@ -96,24 +94,14 @@ def corrige_erreurs(decoded_image):
     return decoded_image
 
 
-def decode_frame_entierement():
+def traite_frame_decodee(dec_yuv_data):
     global compteur_images_recues
     compteur_images_recues += 1
     
     if affiche_debug:
         print("")
         log.debug(f"{compteur_images_recues}")
-        log.debug(f"Début du décodage de la frame n°{compteur_images_recues} ...")
-    
-    # bitstream (données reçues) --> frame RLE
-    global received_data
-    dec_rle_data = dec.decode_bitstream_RLE(received_data)
-    
-    # frame RLE --> frame YUV
-    global img_size
-    global macroblock_size
-    global A
-    dec_yuv_data = dec.recompose_frame_via_DCT(dec_rle_data, img_size, macroblock_size, A)
+        log.debug(f"Post-traitement de la frame n°{compteur_images_recues} ...")
     
     # frame YUV --> frame BGR (/!\ ET NON RGB /!\)
     dec_bgr_data = dec.YUV_to_RGB(dec_yuv_data, mode_RPi=True)
@@ -129,13 +117,14 @@ def decode_frame_entierement():
 
 
 def on_received_data(data):
-    if data[0] == "S":
+    # les messages de contrôle ("SIZE_INFO...") sont des str, et les paquets
+    # du bitstream des bytes (cf. network_transmission.py)
+    if isinstance(data, str):
         global img_width
         global img_height
         global img_size
         global t_debut_algo
         global macroblock_size
-        global A
         
         t_debut_algo = time()
         
@@ -150,21 +139,15 @@ def on_received_data(data):
         log.debug(f"Taille reçue : {img_size}")
         
         macroblock_size = int(split_data[3])
-        A = Encoder.DCT_operator(macroblock_size)
         
         log.debug(f"Macroblock_size reçu : {macroblock_size}")
         print("")
     
     else:
-        global received_data
-        received_data += data
-        
-        binary_MSG_TYPE = data[16 : 18]
-        
-        # "11" est en fait la valeur de TAIL_MSG (= 3) en binaire
-        if binary_MSG_TYPE == "11":
-            decode_frame_entierement()
-            received_data = ""
+        # frame(s) YUV dont le tail vient d'être reçu (les macroblocs ont déjà
+        # été décodés à la réception de leurs paquets)
+        for dec_yuv_data in decodeur_incremental.recoit(data):
+            traite_frame_decodee(dec_yuv_data)
 
 
 # en fait tout se fait via la fonction de callback
@@ -3,6 +3,7 @@
 import socket, sys, threading
 from time import sleep
 from logger import Logger
+from bit_io import lit_varint
 
 
 #############################################################################
@@ -27,22 +28,29 @@ class ThreadListen(threading.Thread):
         """
         Permet de générer la description d'un paquet reçu par le serveur.
         Args:
-            msgClient: paquet (str) reçu par le serveur
+            msgClient: paquet binaire (bytes) reçu par le serveur (cf. bitstream.py)
         Returns:
             desc_paquet: str décrivant le paquet reçu
         """
-        type_msg = int(msgClient[16 : 18], 2)
+        # les bits n°0, 1 et 3 du 1er octet donnent le type du paquet, et les
+        # métadonnées des paquets du dict, de l'index et du body sont des varints
+        type_msg = msgClient[0] & 0x0B
         
         # dict
         if type_msg == 1:
-            index_paquet_dict = int(msgClient[18 : 34], 2)
-            desc_paquet = f"dict, index_paquet_dict = {index_paquet_dict}"
+            (taille_donnees, _) = lit_varint(msgClient, 1)
+            desc_paquet = f"dict, taille_donnees = {taille_donnees} bits"
+        
+        # index du body
+        elif type_msg == 8:
+            (taille_donnees, _) = lit_varint(msgClient, 1)
+            desc_paquet = f"index, taille_donnees = {taille_donnees} bits"
         
         # body
         elif type_msg == 2:
-            num_macrobloc = int(msgClient[18 : 34], 2)
-            index_paquet_macrobloc = int(msgClient[34 : 50], 2)
-            desc_paquet = f"body, numero_macrobloc = {num_macrobloc}, index_paquet_macrobloc = {index_paquet_macrobloc}"
+            (ecart_macrobloc, position) = lit_varint(msgClient, 1)
+            (nb_macroblocs, _) = lit_varint(msgClient, position)
+            desc_paquet = f"body, ecart_num_macrobloc = {ecart_macrobloc}, nb_macroblocs = {nb_macroblocs}"
         
         # header et tail (ie type_msg = 0 ou 3)
         else:
@@ -56,58 +64,113 @@ class ThreadListen(threading.Thread):
         return(desc_paquet)
     
     
+    def accuse_reception(self, connexion, paquet):
+        """
+        Envoie au client l'accusé de réception d'un paquet complet du bitstream
+        (cf. Client.wait_for_response).
+        """
+        desc_paquet = self.generer_description_paquet(paquet)
+        msgServeur = f"Données bien reçues : {desc_paquet}"
+        
+        if self.affiche_messages:
+            Server.safe_print(f"Serveur> {msgServeur}")
+        msgServeur = msgServeur.encode("utf8")
+        connexion.send(msgServeur)
+        
+        # INDISPENSABLE pour permettre le traitement de l'information
+        # envoyée + son affichage dans la console
+        # Ici, sans cette commande, les messages sont affichés dans le
+        # mauvais ordre dans la console (bien qu'ils ne soient plus
+        # entremêlés grâce à la fonction safe_print)
+        # 'temps_pause_apres_envoi' est une variable globale créée
+        # au moment de l'instanciation de la classe Server
+        # --> Même remarque pour tous les autres 'sleep(temps_pause_envoi)' 
+        # du code
+        if self.affiche_messages:
+            sleep(temps_pause_apres_envoi)
+    
+    
     def run(self):
         """
         Cette méthode définit le code qui va s'exécuter automatiquement dès
         que l'instance de ThreadListen en question aura été démarrée avec 
         la méthode 'start' de threading.Thread.
+        
+        Un paquet du bitstream peut être reçu en plusieurs morceaux (s'il est
+        plus grand que bufsize, ou selon le découpage fait par TCP) : toutes
+        les données reçues sont transmises au callback dès leur réception, et
+        les paquets sont délimités grâce à leurs métadonnées (cf.
+        BitstreamGenerator.taille_paquet), afin d'envoyer un accusé de
+        réception par paquet complet.
         """
+        # import local, car bitstream.py importe ce module
+        from bitstream import BitstreamGenerator
+        
         self.socket_server.listen(5)
         while True:
             # établissement de la connexion
             connexion, adresse = self.socket_server.accept()
             Server.safe_print(f"Serveur> Client connecté, adresse IP {adresse[0]}, port {adresse[1]}.\n\n")
             
-            while True:
+            # données reçues qui ne forment pas encore un paquet complet (ou un
+            # message de contrôle), et nombre d'octets de ces données déjà
+            # transmis au callback
+            tampon = bytearray()
+            nb_octets_transmis = 0
+            
+            fin_envoi = False
+            while not fin_envoi:
                 # dialogue avec le client            
                 msgClient = connexion.recv(self.bufsize)
-                msgClient = msgClient.decode("utf8")
                 
-                # si le client se déconnecte
-                if msgClient == "FIN_ENVOI":
+                # si le client se déconnecte sans prévenir
+                if len(msgClient) == 0:
                     break
                 
-                try:
-                    if msgClient[0] in ["0", "1"]:
-                        self.callback(msgClient)
+                tampon += msgClient
+                
+                while len(tampon) != 0:
+                    # les paquets du bitstream sont binaires, et leur 1er octet
+                    # est toujours >= 0x80 (cf. bitstream.MARQUEUR_PAQUET), 
+                    # contrairement aux messages de contrôle, qui sont en ASCII
+                    # (et, étant courts, sont supposés reçus en une seule fois)
+                    if tampon[0] < 0x80:
+                        taille_controle = next((i for (i, octet) in enumerate(tampon) if octet >= 0x80), len(tampon))
+                        msgControle = bytes(tampon[ : taille_controle])
+                        del tampon[ : taille_controle]
                         
-                        desc_paquet = self.generer_description_paquet(msgClient)
-                        msgServeur = f"Données bien reçues : {desc_paquet}"
+                        # si le client se déconnecte
+                        if msgControle == b"FIN_ENVOI":
+                            fin_envoi = True
+                            break
                         
-                        if self.affiche_messages:
-                            Server.safe_print(f"Serveur> {msgServeur}")
-                        msgServeur = msgServeur.encode("utf8")
-                        connexion.send(msgServeur)
+                        if msgControle[ : 1] == b"S":
+                            self.callback(msgControle.decode("utf8"))
                         
-                        # INDISPENSABLE pour permettre le traitement de l'information
-                        # envoyée + son affichage dans la console
-                        # Ici, sans cette commande, les messages sont affichés dans le
-                        # mauvais ordre dans la console (bien qu'ils ne soient plus
-                        # entremêlés grâce à la fonction safe_print)
-                        # 'temps_pause_apres_envoi' est une variable globale créée
-                        # au moment de l'instanciation de la classe Server
-                        # --> Même remarque pour tous les autres 'sleep(temps_pause_envoi)' 
-                        # du code
-                        if self.affiche_messages:
-                            sleep(temps_pause_apres_envoi)
+                        continue
                     
-                    elif msgClient[0] == "S":
-                        self.callback(msgClient)
-                
-                except:
-                    # si msgClient[0] n'existe pas (ou si c'est mal défini), 
-                    # on passe simplement à la suite
-                    pass
+                    try:
+                        taille_paquet = BitstreamGenerator.taille_paquet(tampon)
+                    except ValueError:
+                        Server.safe_print("Serveur> Données reçues invalides, fermeture de la connexion.")
+                        fin_envoi = True
+                        break
+                    
+                    # paquet reçu en partie : on transmet déjà au callback ce
+                    # qui en a été reçu, et on attend la suite
+                    if (taille_paquet is None) or (taille_paquet > len(tampon)):
+                        self.callback(bytes(tampon[nb_octets_transmis : ]))
+                        nb_octets_transmis = len(tampon)
+                        break
+                    
+                    paquet = bytes(tampon[ : taille_paquet])
+                    del tampon[ : taille_paquet]
+                    
+                    if nb_octets_transmis < taille_paquet:
+                        self.callback(paquet[nb_octets_transmis : ])
+                    nb_octets_transmis = 0
+                    
+                    self.accuse_reception(connexion, paquet)
             
             connexion.shutdown(2) # 2 = socket.SHUT_RDWR
             connexion.close() # on ferme la connexion côté serveur
@@ -238,12 +301,14 @@ class Client:
         """
         Envoie les données au serveur en ouvrant un tunnel TCP avec ce dernier.
         Args:
-            data: les données à transmettre (type: str)
+            data: les données à transmettre (type: bytes pour les paquets du
+                  bitstream, str pour les messages de contrôle)
         """
         
         if self.affiche_messages:
             Server.safe_print(f"Client> {data}")
-        data = data.encode("utf8")
+        if isinstance(data, str):
+            data = data.encode("utf8")
         self.connexion.send(data)
         if self.affiche_messages:
             sleep(temps_pause_apres_envoi)
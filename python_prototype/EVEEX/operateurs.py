@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+
+"""
+Registre des opérateurs de transformation (DCT, DTT) et des décompositions en
+SERMs (P, S) de la iDTT.
+
+Ces opérateurs ne dépendent que de la taille des macroblocs, alors qu'ils
+étaient jusqu'ici recalculés par chacun des points d'entrée (et par le
+récepteur à chaque message SIZE_INFO). Or, pour N > 20, la génération de
+l'opérateur de la DTT est assez coûteuse (cf. iDTT.py).
+
+On les garde donc :
+    - en mémoire, dans un dictionnaire indexé par (transformation, N, dtype)
+    - sur le disque, dans un dossier de cache versionné (un fichier .npz par
+      entrée), afin que les démarrages à froid n'aient plus à les recalculer
+
+Le dossier de cache est donné par la variable d'environnement EVEEX_CACHE_DIR
+(par défaut : ~/.cache/eveex). Toute erreur d'accès au disque est simplement
+signalée : on recalcule alors l'opérateur, sans l'enregistrer.
+"""
+
+import os
+import numpy as np
+
+from logger import Logger
+from encoder import Encoder
+from iDTT import DTT_operator, generer_decomp
+
+##############################################################################
+
+
+# à incrémenter dès que le calcul d'un des opérateurs change, afin de ne pas
+# relire d'anciens fichiers de cache (devenus incorrects)
+VERSION_CACHE = 1
+
+DOSSIER_CACHE_PAR_DEFAUT = os.path.join(os.path.expanduser("~"), ".cache", "eveex")
+
+# transformations connues, et fonctions générant leur opérateur (matrice NxN)
+GENERATEURS_OPERATEURS = {
+    "DCT" : Encoder.DCT_operator,
+    "DTT" : DTT_operator
+}
+
+# cache en mémoire, indexé par (nom, transformation, N, dtype)
+_registre = {}
+
+
+##############################################################################
+
+
+def dossier_cache():
+    """
+    Renvoie le chemin du dossier de cache (versionné) des opérateurs.
+    """
+    racine = os.environ.get("EVEEX_CACHE_DIR", DOSSIER_CACHE_PAR_DEFAUT)
+    return(os.path.join(racine, f"v{VERSION_CACHE}"))
+
+
+def _chemin_fichier(nom, transformation, N, dtype):
+    return(os.path.join(dossier_cache(), f"{nom}_{transformation}_N{N}_{np.dtype(dtype).name}.npz"))
+
+
+def _lecture_seule(tableaux):
+    # les tableaux sont partagés via le registre : on empêche toute modification
+    for tableau in tableaux:
+        tableau.setflags(write=False)
+    return(tableaux)
+
+
+def _charge_depuis_disque(chemin, noms_tableaux):
+    """
+    Renvoie les tableaux enregistrés dans le fichier .npz 'chemin', ou None
+    s'il n'existe pas (ou s'il est illisible).
+    """
+    if not os.path.isfile(chemin):
+        return(None)
+
+    try:
+        with np.load(chemin) as fichier:
+            return(tuple(fichier[nom] for nom in noms_tableaux))
+    except Exception as erreur:
+        Logger.get_instance().warn(f"Fichier de cache illisible ({chemin}) : {erreur}")
+        return(None)
+
+
+def _sauvegarde_sur_disque(chemin, tableaux_nommes):
+    """
+    Enregistre les tableaux dans le fichier .npz 'chemin'. L'écriture passe par
+    un fichier temporaire, renommé ensuite de manière atomique : plusieurs
+    processus peuvent donc remplir le cache en même temps.
+    """
+    chemin_temporaire = f"{chemin}.{os.getpid()}.tmp"
+
+    try:
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        with open(chemin_temporaire, "wb") as fichier:
+            np.savez(fichier, **tableaux_nommes)
+        os.replace(chemin_temporaire, chemin)
+    except OSError as erreur:
+        Logger.get_instance().warn(f"Impossible d'écrire dans le cache ({chemin}) : {erreur}")
+        if os.path.exists(chemin_temporaire):
+            os.remove(chemin_temporaire)
+
+
+def _get_ou_calcule(nom, transformation, N, dtype, noms_tableaux, calcul):
+    """
+    Renvoie l'entrée (nom, transformation, N, dtype) du registre, en la
+    cherchant successivement en mémoire, sur le disque, puis en la calculant
+    via calcul() en dernier recours.
+    """
+    cle = (nom, transformation, N, np.dtype(dtype).name)
+
+    if cle in _registre:
+        return(_registre[cle])
+
+    chemin = _chemin_fichier(nom, transformation, N, dtype)
+    tableaux = _charge_depuis_disque(chemin, noms_tableaux)
+
+    if tableaux is None:
+        tableaux = calcul()
+        _sauvegarde_sur_disque(chemin, dict(zip(noms_tableaux, tableaux)))
+
+    _registre[cle] = _lecture_seule(tableaux)
+
+    return(_registre[cle])
+
+
+##############################################################################
+
+
+def get_operateur(transformation, N, dtype=np.float64):
+    """
+    Renvoie l'opérateur (en lecture seule) de la transformation demandée.
+
+    Args:
+        transformation: "DCT" ou "DTT"
+        N: taille (d'un côté) d'un macrobloc
+        dtype: type des coefficients de l'opérateur
+
+    Returns:
+        A: l'opérateur de la transformation (matrice NxN)
+    """
+    if transformation not in GENERATEURS_OPERATEURS:
+        raise ValueError(f"Transformation inconnue : '{transformation}' (valeurs possibles : {list(GENERATEURS_OPERATEURS)})")
+
+    def calcul():
+        return((GENERATEURS_OPERATEURS[transformation](N).astype(dtype),))
+
+    return(_get_ou_calcule("operateur", transformation, N, dtype, ("A",), calcul)[0])
+
+
+def get_DCT_operator(N, dtype=np.float64):
+    """
+    Équivalent (mis en cache) de Encoder.DCT_operator(N).
+    """
+    return(get_operateur("DCT", N, dtype))
+
+
+def get_DTT_operator(N, dtype=np.float64):
+    """
+    Équivalent (mis en cache) de iDTT.DTT_operator(N).
+    """
+    return(get_operateur("DTT", N, dtype))
+
+
+def get_decomp(transformation, N):
+    """
+    Équivalent (mis en cache) de iDTT.generer_decomp(A), où A est l'opérateur
+    de la transformation demandée.
+
+    Args:
+        transformation: "DCT" ou "DTT"
+        N: taille (d'un côté) d'un macrobloc
+
+    Returns:
+        (P, S): la décomposition de l'opérateur en SERMs (--> cf. iDTT.py)
+    """
+    def calcul():
+        return(generer_decomp(get_operateur(transformation, N)))
+
+    return(_get_ou_calcule("decomp", transformation, N, np.float64, ("P", "S"), calcul))
+
+
+def vider_cache_memoire():
+    """
+    Vide le cache en mémoire (les fichiers du cache sur le disque sont conservés).
+    """
+    _registre.clear()
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+"""
+Décodeur parallèle (multi-processus), par bandes de macroblocs.
+
+C'est le pendant de parallel_encoder.py : chaque frame est découpée en bandes
+de macroblocs consécutifs, qui sont décodées en parallèle (décodage entropique,
+RLE inverse, déquantification et DCT inverse) par un pool **persistant** de
+processus. Grâce à la table des paquets du body (donnée par l'index de la
+frame s'il y en a un, cf. bitstream.py), chaque processus ne reçoit que le
+début de la frame (header, dict et index) et les paquets du body contenant
+sa bande.
+
+Avec un codeur entropique adaptatif (cf. codage_entropique.py), les macroblocs
+ne peuvent être décodés que dans l'ordre : le décodage entropique est alors
+fait par le processus principal, et seules les étapes suivantes (RLE inverse,
+déquantification et DCT inverse) sont réparties sur les processus.
+
+Remarque : comme pour ParallelEncoder, on utilise la méthode de démarrage
+"fork" dès qu'elle est disponible (Linux, Raspberry Pi). Avec "spawn"
+(Windows), le script appelant doit être protégé par un
+'if __name__ == "__main__"'.
+"""
+
+import multiprocessing
+import numpy as np
+
+from bitstream import BitstreamGenerator
+from decoder import Decoder
+from operateurs import get_DCT_operator
+import chroma
+import rle
+
+##############################################################################
+
+
+# état de chaque processus du pool (initialisé une seule fois, par _init_processus)
+_etat_processus = {}
+
+
+def _init_processus():
+    """
+    Initialise un processus du pool.
+    """
+    _etat_processus["decodeur"] = Decoder()
+
+    # opérateurs de la DCT, par taille de macrobloc
+    _etat_processus["operateurs_DCT"] = {}
+
+    # début (header, dict et index) de la dernière frame décodée, et son
+    # décodeur entropique, réutilisé pour les autres bandes de la même frame
+    _etat_processus["debut_frame"] = None
+
+
+def _lit_debut_frame(debut_frame):
+    """
+    Lit le début d'une frame (cf. BitstreamGenerator.lit_debut_frame), en ne
+    décodant son dict qu'une seule fois par processus.
+
+    Returns:
+        (infos_header, decodeur): cf. BitstreamGenerator.lit_debut_frame
+    """
+    if _etat_processus["debut_frame"] != debut_frame:
+        (infos_header, decodeur, _, _) = BitstreamGenerator.lit_debut_frame(debut_frame)
+
+        _etat_processus["debut_frame"] = debut_frame
+        _etat_processus["infos_header"] = infos_header
+        _etat_processus["decodeur_entropique"] = decodeur
+
+    return(_etat_processus["infos_header"], _etat_processus["decodeur_entropique"])
+
+
+def _transforme_bande(infos_header, tableaux_RLE, num_debut):
+    """
+    RLE inverse, déquantification et DCT inverse d'une bande de macroblocs
+    (cf. Decoder.recompose_macroblocs_via_DCT).
+    """
+    (_, img_size, macroblock_size, sous_echantillonnage, qualite, type_matrice, _, _, _) = infos_header
+
+    operateurs_DCT = _etat_processus["operateurs_DCT"]
+    if macroblock_size not in operateurs_DCT:
+        operateurs_DCT[macroblock_size] = get_DCT_operator(macroblock_size)
+
+    return(_etat_processus["decodeur"].recompose_macroblocs_via_DCT(tableaux_RLE, num_debut, img_size, macroblock_size,
+                                                                    operateurs_DCT[macroblock_size],
+                                                                    sous_echantillonnage=sous_echantillonnage,
+                                                                    qualite=qualite, type_matrice=type_matrice))
+
+
+def _decode_bande(tache):
+    """
+    Décode la bande formée des macroblocs n°num_debut (inclus) à n°num_fin
+    (exclu) d'une frame.
+
+    Args:
+        tache: tuple (debut_frame, morceau, num_premier_macrobloc, num_debut, num_fin),
+               avec morceau les paquets du body contenant la bande (cf.
+               BitstreamGenerator.decode_macroblocs_morceau), ou bien tuple
+               (debut_frame, tableaux_RLE, None, num_debut, num_fin) si les
+               macroblocs ont déjà été décodés par le processus principal
+
+    Returns:
+        dec_yuv_blocs: macroblocs décodés de la bande (cf. Decoder.recompose_macroblocs_via_DCT)
+    """
+    (debut_frame, donnees, num_premier_macrobloc, num_debut, num_fin) = tache
+    (infos_header, decodeur) = _lit_debut_frame(debut_frame)
+
+    if num_premier_macrobloc is None:
+        tableaux_RLE = donnees
+    else:
+        macroblocs_RLE = BitstreamGenerator.decode_macroblocs_morceau(decodeur, donnees, num_premier_macrobloc, num_debut, num_fin)
+        tableaux_RLE = rle.depuis_liste_RLE(macroblocs_RLE)
+
+    return(_transforme_bande(infos_header, tableaux_RLE, num_debut))
+
+
+##############################################################################
+
+
+class ParallelDecoder:
+    """
+    Classe permettant de décoder des bitstreams de frames en images YUV, en
+    répartissant les bandes de macroblocs de chaque frame sur plusieurs
+    processus.
+    """
+
+    def __init__(self, nb_processus=None, nb_bandes=None):
+        """
+        Args:
+            nb_processus: nombre de processus du pool (par défaut : nombre de coeurs)
+            nb_bandes: nombre (maximal) de bandes par frame (par défaut : 2 * nb_processus)
+        """
+        if nb_processus is None:
+            nb_processus = multiprocessing.cpu_count()
+        self.nb_processus = nb_processus
+
+        if nb_bandes is None:
+            nb_bandes = 2 * self.nb_processus
+        self.nb_bandes = nb_bandes
+
+        self.dec = Decoder()
+
+        if "fork" in multiprocessing.get_all_start_methods():
+            contexte = multiprocessing.get_context("fork")
+        else:
+            contexte = multiprocessing.get_context("spawn")
+
+        self.pool = contexte.Pool(self.nb_processus, initializer=_init_processus)
+
+
+    def decoupe_en_bandes(self, total_num_of_macroblocks):
+        """
+        Découpe les macroblocs d'une frame en (au plus) nb_bandes bandes de
+        macroblocs consécutifs.
+
+        Returns:
+            bornes_bandes: liste de tuples (num_debut, num_fin)
+        """
+        taille_bande = -(-total_num_of_macroblocks // self.nb_bandes)
+
+        return([(num_debut, min(num_debut + taille_bande, total_num_of_macroblocks))
+                for num_debut in range(0, total_num_of_macroblocks, taille_bande)])
+
+
+    def decode_frame(self, bitstream):
+        """
+        Décode le bitstream complet d'une frame.
+
+        Args:
+            bitstream (bytes): bitstream d'une frame (cf. BitstreamGenerator.encode_frame_RLE,
+                               de préférence avec avec_index=True)
+
+        Returns:
+            image_yuv_decodee: image YUV de la frame, de taille (img_height, img_width, 3)
+        """
+        (infos_header, decodeur, entrees_index, debut_body) = BitstreamGenerator.lit_debut_frame(bitstream)
+        (_, img_size, macroblock_size, sous_echantillonnage, _, _, _, _, _) = infos_header
+
+        total_num_of_macroblocks = chroma.nb_macroblocs_total(img_size, macroblock_size, sous_echantillonnage)
+        bornes_bandes = self.decoupe_en_bandes(total_num_of_macroblocks)
+
+        # seul le début de la frame (header, dict et index) est envoyé à
+        # chaque processus, avec les données de sa bande
+        debut_frame = bytes(bitstream[ : debut_body])
+
+        if decodeur.adaptatif:
+            tableaux_RLE = rle.depuis_liste_RLE(BitstreamGenerator.decode_bitstream_RLE(bitstream))
+            taches = [(debut_frame, rle.extrait_macroblocs(*tableaux_RLE, num_debut, num_fin), None, num_debut, num_fin)
+                      for (num_debut, num_fin) in bornes_bandes]
+
+        else:
+            (positions, nums_macroblocs) = BitstreamGenerator.table_paquets_body(bitstream, debut_body, entrees_index)
+            taches = []
+
+            for (num_debut, num_fin) in bornes_bandes:
+                (p, q) = BitstreamGenerator.paquets_des_macroblocs(bitstream, positions, nums_macroblocs, num_debut, num_fin)
+                taches.append((debut_frame, bytes(bitstream[positions[p] : positions[q]]), nums_macroblocs[p], num_debut, num_fin))
+
+        # les résultats sont renvoyés dans l'ordre des bandes
+        dec_yuv_blocs = np.concatenate(self.pool.map(_decode_bande, taches))
+
+        return(self.dec.assemble_frame(dec_yuv_blocs, img_size, macroblock_size, sous_echantillonnage=sous_echantillonnage))
+
+
+    def fermer(self):
+        """
+        Termine les processus du pool.
+        """
+        self.pool.close()
+        self.pool.join()
+
+
+    def __enter__(self):
+        return(self)
+
+
+    def __exit__(self, *args):
+        self.fermer()
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+"""
+Encodeur parallèle (multi-processus), par bandes de macroblocs.
+
+Chaque frame est découpée en bandes horizontales de lignes de macroblocs, qui
+sont encodées en parallèle (conversion des couleurs, DCT, zig zag,
+quantification et RLE) par un pool **persistant** de processus. La frame est
+écrite une seule fois dans un buffer en mémoire partagée : seules les bornes
+des bandes sont envoyées aux processus, et seuls les tableaux RLE (compacts)
+de chaque bande sont renvoyés.
+
+Les bandes étant encodées indépendamment, et rassemblées dans l'ordre, la frame
+RLE obtenue est **exactement** celle qu'aurait renvoyée
+Encoder.decompose_frame_en_tableaux_via_DCT. En 4:2:2 et en 4:2:0, la hauteur
+des bandes est un multiple de macroblock_size * facteur_vertical, afin que
+chaque macrobloc de chrominance appartienne à une seule bande.
+
+Remarque : les scripts (main_emetteur_video.py, ...) n'étant pas protégés par
+un 'if __name__ == "__main__"', on utilise la méthode de démarrage "fork" dès
+qu'elle est disponible (Linux, Raspberry Pi). Avec "spawn" (Windows), le script
+appelant doit être protégé par un tel test.
+"""
+
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+
+from encoder import Encoder
+import chroma
+import quantification
+import rle
+
+##############################################################################
+
+
+# état de chaque processus du pool (initialisé une seule fois, par _init_processus)
+_etat_processus = {}
+
+
+def _init_processus(nom_buffer, forme_buffer, parametres):
+    """
+    Initialise un processus du pool : on s'attache au buffer partagé de la
+    frame, et on garde les paramètres d'encodage.
+    """
+    buffer = shared_memory.SharedMemory(name=nom_buffer)
+
+    _etat_processus["buffer"] = buffer
+    _etat_processus["frame"] = np.ndarray(forme_buffer, dtype=np.uint8, buffer=buffer.buf)
+    _etat_processus["parametres"] = parametres
+    _etat_processus["encodeur"] = Encoder()
+
+
+def _encode_bande(bornes_bande):
+    """
+    Encode la bande de la frame partagée comprise entre les lignes de pixels
+    i_debut (incluse) et i_fin (exclue).
+
+    Returns:
+        (runs, levels, debuts): frame RLE de la bande (cf. rle.py), avec tous
+                                 les macroblocs de Y, puis ceux de U et de V
+                                 en 4:2:2 et en 4:2:0
+    """
+    (i_debut, i_fin) = bornes_bande
+    parametres = _etat_processus["parametres"]
+    enc = _etat_processus["encodeur"]
+
+    img_width = parametres["img_size"][0]
+    taille_bande = (img_width, i_fin - i_debut)
+
+    image_yuv = enc.RGB_to_YUV(_etat_processus["frame"][i_debut : i_fin], mode_RPi=parametres["mode_RPi"])
+
+    return(enc.decompose_frame_en_tableaux_via_DCT(image_yuv, taille_bande, parametres["macroblock_size"],
+                                                   parametres["threshold"], parametres["A"],
+                                                   sous_echantillonnage=parametres["sous_echantillonnage"],
+                                                   qualite=parametres["qualite"], type_matrice=parametres["type_matrice"]))
+
+
+##############################################################################
+
+
+class ParallelEncoder:
+    """
+    Classe permettant d'encoder des frames RGB (ou BGR) en frames RLE, en
+    répartissant les bandes de macroblocs de chaque frame sur plusieurs
+    processus. Une instance est associée à une taille de frame fixe.
+    """
+
+    def __init__(self, img_size, macroblock_size, threshold, A, nb_processus=None, nb_bandes=None, mode_RPi=False,
+                 sous_echantillonnage=chroma.CHROMA_444, qualite=quantification.QUALITE_SEUIL,
+                 type_matrice=quantification.MATRICE_JPEG):
+        """
+        Args:
+            img_size: tuple égal à (img_width, img_height)
+            macroblock_size: taille (d'un côté) d'un macrobloc
+            threshold: seuil de quantization
+            A: opérateur orthogonal de la DCT, de taille (macroblock_size, macroblock_size)
+            nb_processus: nombre de processus du pool (par défaut : nombre de coeurs)
+            nb_bandes: nombre (maximal) de bandes par frame (par défaut : 2 * nb_processus)
+            mode_RPi: True si les frames d'entrée sont au format BGR
+            sous_echantillonnage, qualite, type_matrice: cf. Encoder.decompose_frame_en_tableaux_via_DCT
+        """
+        self.img_size = img_size
+        self.img_width, self.img_height = self.img_size
+        self.macroblock_size = macroblock_size
+        self.sous_echantillonnage = sous_echantillonnage
+
+        if nb_processus is None:
+            nb_processus = multiprocessing.cpu_count()
+        self.nb_processus = nb_processus
+
+        if nb_bandes is None:
+            nb_bandes = 2 * self.nb_processus
+
+        # on vérifie dès maintenant la compatibilité des dimensions de l'image
+        # avec le mode de sous-échantillonnage
+        chroma.taille_plan_chroma(self.img_size, self.sous_echantillonnage)
+
+        self.bornes_bandes = self.decoupe_en_bandes(nb_bandes)
+
+        # nombre de macroblocs (par plan) de chacune des bandes
+        self.nb_macroblocs_bandes = [chroma.nb_macroblocs_par_plan((self.img_width, i_fin - i_debut), macroblock_size, sous_echantillonnage)
+                                     for (i_debut, i_fin) in self.bornes_bandes]
+
+        # buffer partagé dans lequel est copiée chaque frame à encoder
+        forme_buffer = (self.img_height, self.img_width, 3)
+        self.buffer = shared_memory.SharedMemory(create=True, size=int(np.prod(forme_buffer)))
+        self.frame = np.ndarray(forme_buffer, dtype=np.uint8, buffer=self.buffer.buf)
+
+        parametres = {"img_size" : self.img_size,
+                      "macroblock_size" : macroblock_size,
+                      "threshold" : threshold,
+                      "A" : np.asarray(A),
+                      "mode_RPi" : mode_RPi,
+                      "sous_echantillonnage" : sous_echantillonnage,
+                      "qualite" : qualite,
+                      "type_matrice" : type_matrice}
+
+        if "fork" in multiprocessing.get_all_start_methods():
+            contexte = multiprocessing.get_context("fork")
+        else:
+            contexte = multiprocessing.get_context("spawn")
+
+        self.pool = contexte.Pool(self.nb_processus, initializer=_init_processus,
+                                  initargs=(self.buffer.name, forme_buffer, parametres))
+
+
+    def decoupe_en_bandes(self, nb_bandes):
+        """
+        Découpe la frame en (au plus) nb_bandes bandes horizontales, dont la
+        hauteur est un multiple de macroblock_size * facteur_vertical.
+
+        Returns:
+            bornes_bandes: liste de tuples (i_debut, i_fin) (lignes de pixels)
+        """
+        facteur_vertical = chroma.facteurs(self.sous_echantillonnage)[0]
+        hauteur_unite = self.macroblock_size * facteur_vertical
+
+        nb_unites = -(-self.img_height // hauteur_unite)
+        nb_unites_par_bande = -(-nb_unites // nb_bandes)
+        hauteur_bande = nb_unites_par_bande * hauteur_unite
+
+        return([(i_debut, min(i_debut + hauteur_bande, self.img_height)) for i_debut in range(0, self.img_height, hauteur_bande)])
+
+
+    def encode_frame(self, image):
+        """
+        Encode une frame RGB (ou BGR si mode_RPi vaut True) en frame RLE.
+
+        Args:
+            image: tableau d'entiers (entre 0 et 255) de taille (img_height, img_width, 3)
+
+        Returns:
+            (runs, levels, debuts): frame entière encodée, sous forme de tableaux
+                                    (cf. rle.py), dans le même ordre que
+                                    Encoder.decompose_frame_en_tableaux_via_DCT
+        """
+        np.copyto(self.frame, image[ : self.img_height, : self.img_width], casting="unsafe")
+
+        # les résultats sont renvoyés dans l'ordre des bandes
+        tableaux_bandes = self.pool.map(_encode_bande, self.bornes_bandes)
+
+        if not chroma.est_planaire(self.sous_echantillonnage):
+            return(rle.concatene_tableaux(tableaux_bandes))
+
+        # chaque bande contient ses macroblocs de Y, puis de U, puis de V : on
+        # les ré-ordonne plan par plan
+        morceaux = [[], [], []]
+        for (tableaux, (nb_macroblocs_Y, nb_macroblocs_chroma)) in zip(tableaux_bandes, self.nb_macroblocs_bandes):
+            bornes = [0, nb_macroblocs_Y, nb_macroblocs_Y + nb_macroblocs_chroma, nb_macroblocs_Y + 2 * nb_macroblocs_chroma]
+            for k in range(3):
+                morceaux[k].append(rle.extrait_macroblocs(*tableaux, bornes[k], bornes[k+1]))
+
+        return(rle.concatene_tableaux(morceaux[0] + morceaux[1] + morceaux[2]))
+
+
+    def encode_frame_RLE(self, image):
+        """
+        Idem encode_frame, mais renvoie une liste de listes de tuples RLE.
+        """
+        return(rle.vers_liste_RLE(*self.encode_frame(image)))
+
+
+    def fermer(self):
+        """
+        Termine les processus du pool et libère le buffer partagé.
+        """
+        self.pool.close()
+        self.pool.join()
+
+        self.frame = None
+        self.buffer.close()
+        self.buffer.unlink()
+
+
+    def __enter__(self):
+        return(self)
+
+
+    def __exit__(self, *args):
+        self.fermer()
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pipeline d'encodage par étages (capture --> transformation --> codage
+entropique --> envoi).
+
+Chaque étage tourne dans son propre thread, et les étages sont reliés par des
+files d'attente **bornées** : si un étage est plus lent que les autres, la file
+qui le précède se remplit, puis les étages en amont sont bloqués (contre-pression)
+au lieu d'accumuler des frames en mémoire. Les étages travaillent donc en même
+temps sur des frames différentes, et c'est l'étage le plus lent (et non plus
+la somme de tous les étages) qui fixe le débit.
+
+Pour chaque étage, on mesure le temps de travail, le temps passé à attendre
+une donnée (famine) ou une place dans la file suivante (contre-pression), ainsi
+que la profondeur moyenne de la file d'entrée : cela permet de repérer l'étage
+limitant.
+
+Remarque : les étages étant des threads, les calculs Numpy (qui relâchent le GIL)
+et les envois réseau se recouvrent bien ; pour répartir le calcul lui-même sur
+plusieurs coeurs, on peut utiliser ParallelEncoder (cf. parallel_encoder.py)
+dans l'un des étages.
+"""
+
+import threading
+import queue
+from time import time
+
+from logger import Logger
+
+##############################################################################
+
+
+# marqueur de fin de flux, transmis d'étage en étage
+_FIN = object()
+
+
+class StatistiquesEtage:
+    """
+    Statistiques (cumulées) d'un étage du pipeline.
+    """
+
+    def __init__(self, nom):
+        self.nom = nom
+        self.nb_elements = 0
+        self.duree_travail = 0
+        self.duree_attente_entree = 0
+        self.duree_attente_sortie = 0
+        self.somme_profondeurs_file = 0
+
+
+    def profondeur_moyenne_file(self):
+        """
+        Profondeur moyenne de la file d'entrée de l'étage (mesurée à chaque
+        nouvel élément). Une file souvent pleine désigne un étage limitant.
+        """
+        if self.nb_elements == 0:
+            return(0)
+        return(self.somme_profondeurs_file / self.nb_elements)
+
+
+    def __repr__(self):
+        return(f"{self.nom} : {self.nb_elements} éléments, travail = {self.duree_travail:.3f} s, "
+               f"attente entrée = {self.duree_attente_entree:.3f} s, attente sortie = {self.duree_attente_sortie:.3f} s, "
+               f"profondeur moyenne de la file d'entrée = {self.profondeur_moyenne_file():.2f}")
+
+
+#----------------------------------------------------------------------------#
+
+
+class ThreadEtage(threading.Thread):
+    """
+    Thread exécutant un étage du pipeline : il lit ses données dans file_entree
+    (ou dans l'itérable source s'il s'agit du premier étage), leur applique
+    'fonction', puis écrit le résultat dans file_sortie (s'il y en a une).
+    """
+
+    def __init__(self, pipeline, nom, fonction, file_entree, file_sortie, source=None):
+        threading.Thread.__init__(self, name=f"Pipeline-{nom}", daemon=True)
+
+        self.pipeline = pipeline
+        self.fonction = fonction
+        self.file_entree = file_entree
+        self.file_sortie = file_sortie
+        self.source = source
+
+        self.stats = StatistiquesEtage(nom)
+
+
+    def lit_elements(self):
+        """
+        Générateur renvoyant les éléments à traiter, jusqu'à la fin du flux.
+        """
+        if self.source is not None:
+            iterateur = iter(self.source)
+
+            while True:
+                # pour l'étage de capture, la lecture de la source est le travail
+                # de l'étage lui-même
+                t_debut = time()
+                element = next(iterateur, _FIN)
+                self.stats.duree_travail += time() - t_debut
+
+                if element is _FIN:
+                    return
+                yield element
+
+        while True:
+            self.stats.somme_profondeurs_file += self.file_entree.qsize()
+
+            t_debut = time()
+            element = self.file_entree.get()
+            self.stats.duree_attente_entree += time() - t_debut
+
+            if element is _FIN:
+                return
+            yield element
+
+
+    def ecrit_element(self, element):
+        if self.file_sortie is not None:
+            t_debut = time()
+            self.file_sortie.put(element) # opération bloquante si la file est pleine
+            self.stats.duree_attente_sortie += time() - t_debut
+
+
+    def run(self):
+        """
+        Cette méthode définit le code qui va s'exécuter automatiquement dès
+        que l'instance de ThreadEtage en question aura été démarrée avec la
+        méthode 'start' de threading.Thread.
+        """
+        try:
+            for element in self.lit_elements():
+                # si un autre étage a échoué, on arrête la capture, et les
+                # autres étages se contentent de vider leur file d'entrée
+                if self.pipeline.erreur is not None:
+                    if self.source is not None:
+                        break
+                    continue
+
+                t_debut = time()
+                resultat = self.fonction(element)
+                self.stats.duree_travail += time() - t_debut
+                self.stats.nb_elements += 1
+
+                self.ecrit_element(resultat)
+
+        except Exception as erreur:
+            self.pipeline.signale_erreur(self.stats.nom, erreur)
+
+            # on vide la file d'entrée, pour ne pas bloquer les étages en amont
+            if self.file_entree is not None:
+                for _ in self.lit_elements():
+                    pass
+
+        # dans tous les cas, on propage la fin du flux aux étages en aval
+        self.ecrit_element(_FIN)
+
+
+##############################################################################
+
+
+class Pipeline:
+    """
+    Enchaînement d'étages (threads) reliés par des files d'attente bornées.
+
+    Exemple :
+        pipeline = Pipeline(frames, taille_max_files=4)
+        pipeline.ajoute_etage("YUV", conversion)
+        pipeline.ajoute_etage("DCT/RLE", decomposition)
+        pipeline.ajoute_etage("envoi", envoi)
+        pipeline.execute()
+
+    Chaque étage reçoit le résultat de l'étage précédent (le premier reçoit les
+    éléments de 'source'), et les éléments sont traités dans l'ordre.
+    """
+
+    def __init__(self, source, taille_max_files=4):
+        """
+        Args:
+            source: itérable fournissant les éléments à traiter (typiquement
+                    des frames), lu dans un thread dédié (étage de capture)
+            taille_max_files: nombre maximal d'éléments en attente entre 2 étages
+        """
+        self.source = source
+        self.taille_max_files = taille_max_files
+
+        self.etages = []
+        self.fonctions_etages = []
+
+        self.erreur = None
+        self.verrou_erreur = threading.Lock()
+
+
+    def ajoute_etage(self, nom, fonction):
+        """
+        Ajoute un étage à la fin du pipeline.
+        Args:
+            nom: nom de l'étage (pour les statistiques)
+            fonction: fonction appliquée à chaque élément, dont le résultat est
+                      transmis à l'étage suivant
+        """
+        self.fonctions_etages.append((nom, fonction))
+
+
+    def signale_erreur(self, nom_etage, erreur):
+        with self.verrou_erreur:
+            if self.erreur is None:
+                self.erreur = erreur
+                Logger.get_instance().error(f"Pipeline> Erreur dans l'étage \"{nom_etage}\" : {erreur!r}")
+
+
+    def demarre(self):
+        """
+        Crée les files d'attente et démarre tous les étages (sans attendre la
+        fin du traitement).
+        """
+        def capture(element):
+            return(element)
+
+        fonctions_etages = [("capture", capture)] + self.fonctions_etages
+
+        files = [queue.Queue(maxsize=self.taille_max_files) for _ in range(len(fonctions_etages) - 1)]
+
+        self.etages = []
+        for (num_etage, (nom, fonction)) in enumerate(fonctions_etages):
+            file_entree = files[num_etage - 1] if num_etage > 0 else None
+            file_sortie = files[num_etage] if num_etage < len(files) else None
+            source = self.source if num_etage == 0 else None
+
+            self.etages.append(ThreadEtage(self, nom, fonction, file_entree, file_sortie, source))
+
+        for etage in self.etages:
+            etage.start()
+
+
+    def attend_fin(self):
+        """
+        Attend que tous les éléments aient traversé le pipeline. Si l'un des
+        étages a levé une exception, elle est relevée ici.
+        """
+        for etage in self.etages:
+            etage.join()
+
+        if self.erreur is not None:
+            raise self.erreur
+
+
+    def execute(self):
+        """
+        Méthode de synthèse : démarre le pipeline, puis attend la fin du traitement.
+        """
+        self.demarre()
+        self.attend_fin()
+
+
+    def statistiques(self):
+        """
+        Renvoie la liste des statistiques (StatistiquesEtage) de chaque étage.
+        """
+        return([etage.stats for etage in self.etages])
+
+
+    def affiche_statistiques(self):
+        """
+        Affiche les statistiques de chaque étage, ainsi que l'étage limitant
+        (celui dont le temps de travail est le plus élevé).
+        """
+        log = Logger.get_instance()
+
+        for stats in self.statistiques():
+            log.debug(f"Pipeline> {stats}")
+
+        etage_limitant = max(self.statistiques()[1 : ], key=lambda stats: stats.duree_travail, default=None)
+        if etage_limitant is not None:
+            log.debug(f"Pipeline> Étage limitant : {etage_limitant.nom}")
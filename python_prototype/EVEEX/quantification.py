@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+"""
+Matrices de quantification (un pas de quantification par fréquence), mises à
+l'échelle par un facteur de qualité, comme dans JPEG.
+
+Au lieu de simplement mettre à zéro les coefficients inférieurs à un seuil
+(cf. DEFAULT_QUANTIZATION_THRESHOLD), chaque coefficient de la DCT est divisé
+par le pas associé à sa fréquence, puis arrondi. Les hautes fréquences (peu
+visibles) sont donc beaucoup plus grossièrement quantifiées que les basses
+fréquences. Le décodeur multiplie ensuite chaque coefficient par le même pas
+(déquantification).
+
+Les matrices de référence sont définies pour des macroblocs 8x8. Pour une autre
+taille N, elles sont ré-échantillonnées (au plus proche voisin) puis multipliées
+par N / 8 : avec une DCT orthonormale, l'amplitude des coefficients d'un
+macrobloc NxN est en effet (à contenu égal) proportionnelle à N.
+
+La qualité est un entier entre 1 et 100 (codé sur 7 bits dans le header). La
+qualité 0 est réservée au mode historique (simple seuillage).
+
+Source pour les matrices et la mise à l'échelle (standard JPEG, annexe K) :
+https://www.w3.org/Graphics/JPEG/itu-t81.pdf
+"""
+
+from functools import lru_cache
+import numpy as np
+
+from zigzag import ordre_zigzag
+import chroma
+
+##############################################################################
+
+
+# qualité réservée au mode historique (seuillage, sans matrice de quantification)
+QUALITE_SEUIL = 0
+
+QUALITE_MAX = 100
+
+# types de matrices (codés sur 2 bits dans le header)
+MATRICE_JPEG = 0
+MATRICE_UNIFORME = 1
+
+MATRICE_JPEG_LUMINANCE = np.array([[16, 11, 10, 16,  24,  40,  51,  61],
+                                   [12, 12, 14, 19,  26,  58,  60,  55],
+                                   [14, 13, 16, 24,  40,  57,  69,  56],
+                                   [14, 17, 22, 29,  51,  87,  80,  62],
+                                   [18, 22, 37, 56,  68, 109, 103,  77],
+                                   [24, 35, 55, 64,  81, 104, 113,  92],
+                                   [49, 64, 78, 87, 103, 121, 120, 101],
+                                   [72, 92, 95, 98, 112, 100, 103,  99]])
+
+MATRICE_JPEG_CHROMINANCE = np.array([[17, 18, 24, 47, 99, 99, 99, 99],
+                                     [18, 21, 26, 66, 99, 99, 99, 99],
+                                     [24, 26, 56, 99, 99, 99, 99, 99],
+                                     [47, 66, 99, 99, 99, 99, 99, 99],
+                                     [99, 99, 99, 99, 99, 99, 99, 99],
+                                     [99, 99, 99, 99, 99, 99, 99, 99],
+                                     [99, 99, 99, 99, 99, 99, 99, 99],
+                                     [99, 99, 99, 99, 99, 99, 99, 99]])
+
+# pas uniforme (pour toutes les fréquences), à la qualité 50
+PAS_UNIFORME = 16
+
+MATRICES_DE_REFERENCE = {
+    MATRICE_JPEG : (MATRICE_JPEG_LUMINANCE, MATRICE_JPEG_CHROMINANCE),
+    MATRICE_UNIFORME : (np.full((8, 8), PAS_UNIFORME), np.full((8, 8), PAS_UNIFORME))
+}
+
+
+##############################################################################
+
+
+def facteur_echelle(qualite):
+    """
+    Renvoie le facteur d'échelle (en pourcentage) associé à une qualité
+    comprise entre 1 et 100, selon la convention de l'IJG (libjpeg).
+    """
+    if not (1 <= qualite <= QUALITE_MAX):
+        raise ValueError(f"Qualité invalide : {qualite} (doit être comprise entre 1 et {QUALITE_MAX})")
+
+    if qualite < 50:
+        return(5000 / qualite)
+    return(200 - 2 * qualite)
+
+
+@lru_cache(maxsize=None)
+def matrice_quantification(type_matrice, N, qualite, chrominance=False):
+    """
+    Génère la matrice de quantification (en lecture seule) d'un macrobloc NxN.
+
+    Args:
+        type_matrice: MATRICE_JPEG ou MATRICE_UNIFORME
+        N: taille (d'un côté) d'un macrobloc
+        qualite: entier compris entre 1 et 100
+        chrominance: True pour la matrice des couches U et V
+
+    Returns:
+        Q: matrice NxN (float64) des pas de quantification (tous >= 1)
+    """
+    if type_matrice not in MATRICES_DE_REFERENCE:
+        raise ValueError(f"Type de matrice de quantification inconnu : {type_matrice}")
+
+    matrice_reference = MATRICES_DE_REFERENCE[type_matrice][int(chrominance)]
+
+    # ré-échantillonnage (au plus proche voisin) de la matrice 8x8 en NxN
+    indices = (np.arange(N) * 8) // N
+    Q = matrice_reference[np.ix_(indices, indices)] * (N / 8)
+
+    # mise à l'échelle selon la qualité (comme dans libjpeg, en arrondissant)
+    Q = np.floor((Q * facteur_echelle(qualite) + 50) / 100)
+    Q = np.maximum(Q, 1)
+
+    Q.setflags(write=False)
+
+    return(Q)
+
+
+@lru_cache(maxsize=None)
+def vecteur_quantification(type_matrice, N, qualite, sous_echantillonnage=chroma.CHROMA_444):
+    """
+    Renvoie les pas de quantification dans l'ordre des coefficients des
+    macroblocs linéarisés (cf. zigzag.zigzag_par_lots).
+
+    Returns:
+        - en 4:4:4 : un vecteur de taille 3 * N**2 (Y, puis U, puis V, chaque
+          couche étant parcourue en zig zag)
+        - sinon : un couple (vecteur_Y, vecteur_UV) de vecteurs de taille N**2
+    """
+    ordre = ordre_zigzag(N)
+
+    vecteur_Y = matrice_quantification(type_matrice, N, qualite).ravel()[ordre]
+    vecteur_UV = matrice_quantification(type_matrice, N, qualite, chrominance=True).ravel()[ordre]
+
+    if not chroma.est_planaire(sous_echantillonnage):
+        vecteur = np.concatenate((vecteur_Y, vecteur_UV, vecteur_UV))
+        vecteur.setflags(write=False)
+        return(vecteur)
+
+    vecteur_Y.setflags(write=False)
+    vecteur_UV.setflags(write=False)
+
+    return(vecteur_Y, vecteur_UV)
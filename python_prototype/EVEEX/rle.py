@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+
+"""
+Quantification et RLE ("run-level") vectorisées, sur tous les macroblocs
+d'une frame à la fois.
+
+Représentation compacte d'une frame RLE : un triplet (runs, levels, debuts), où
+    - runs (int16) : nombre de zéros précédant chaque valeur non nulle
+    - levels (int16) : valeurs non nulles (arrondies à l'entier le plus proche)
+    - debuts (intp, taille nb_macroblocs + 1) : les paires du macrobloc n°k sont
+      runs[debuts[k] : debuts[k+1]] et levels[debuts[k] : debuts[k+1]]
+
+Comme dans Encoder.run_level, si un macrobloc se termine par n zéros, on
+enregistre la paire (n - 1, 0).
+
+Le format historique (liste de listes de tuples (run, level)) reste disponible
+via vers_liste_RLE / depuis_liste_RLE.
+"""
+
+import numpy as np
+
+##############################################################################
+
+
+def arrondi_entier(data):
+    """
+    Arrondit chacun des coefficients à l'entier le plus proche (les demis étant
+    arrondis en s'éloignant de 0), exactement comme le faisait Encoder.run_level
+    avec 'int(x + 0.5)' et 'int(x - 0.5)'.
+    """
+    return(np.trunc(data + np.copysign(0.5, data)))
+
+
+def quantization(lignes, threshold):
+    """
+    Met à zéro tous les coefficients inférieurs ou égaux au seuil (en valeur
+    absolue).
+    """
+    return(np.where(np.abs(lignes) <= threshold, 0, lignes))
+
+
+def quantization_run_level(lignes, threshold):
+    """
+    Quantifie (seuillage) puis encode en RLE un lot de macroblocs linéarisés.
+
+    Args:
+        lignes: tableau de taille (nb_macroblocs, longueur) des coefficients
+                (déjà linéarisés en zig zag) de chaque macrobloc
+        threshold: valeur de seuil en dessous de laquelle (en valeur absolue)
+                   les coefficients sont mis à zéro
+
+    Returns:
+        (runs, levels, debuts): frame RLE sous forme de tableaux (cf. docstring du module)
+    """
+    return(run_level_par_lots(quantization(lignes, threshold)))
+
+
+def run_level_par_lots(lignes):
+    """
+    Encode en RLE un lot de macroblocs linéarisés (et déjà quantifiés), après
+    avoir arrondi chacun des coefficients à l'entier le plus proche.
+
+    Args:
+        lignes: tableau de taille (nb_macroblocs, longueur)
+
+    Returns:
+        (runs, levels, debuts): frame RLE sous forme de tableaux (cf. docstring du module)
+    """
+    lignes = np.atleast_2d(lignes)
+    nb_macroblocs, longueur = lignes.shape
+
+    entiers = arrondi_entier(lignes)
+
+    # positions des valeurs non nulles, triées par macrobloc puis par position
+    num_blocs, positions = np.nonzero(entiers)
+    nb_non_nuls = np.bincount(num_blocs, minlength=nb_macroblocs)
+
+    # dernière position non nulle de chaque macrobloc (-1 s'il n'y en a pas)
+    fins_non_nuls = np.cumsum(nb_non_nuls)
+    derniere_position = np.full(nb_macroblocs, -1)
+    blocs_non_vides = nb_non_nuls > 0
+    derniere_position[blocs_non_vides] = positions[fins_non_nuls[blocs_non_vides] - 1]
+
+    # un macrobloc qui se termine par des zéros reçoit la paire de fin (n - 1, 0)
+    a_une_fin = derniere_position < longueur - 1
+
+    debuts = np.zeros(nb_macroblocs + 1, dtype=np.intp)
+    np.cumsum(nb_non_nuls + a_une_fin, out=debuts[1 : ])
+
+    # runs : écart avec la position non nulle précédente du même macrobloc
+    positions_precedentes = np.empty_like(positions)
+    positions_precedentes[1 : ] = positions[ : -1]
+    premiers = fins_non_nuls[blocs_non_vides] - nb_non_nuls[blocs_non_vides]
+    positions_precedentes[premiers] = -1
+
+    # rang de chaque valeur non nulle dans le tableau de sortie
+    rangs = debuts[num_blocs] + np.arange(positions.size) - (fins_non_nuls - nb_non_nuls)[num_blocs]
+
+    runs = np.zeros(debuts[-1], dtype=np.int16)
+    levels = np.zeros(debuts[-1], dtype=np.int16)
+
+    runs[rangs] = positions - positions_precedentes - 1
+    levels[rangs] = entiers[num_blocs, positions]
+
+    # paires de fin (n - 1, 0), avec n le nombre de zéros terminaux
+    runs[debuts[1 : ][a_une_fin] - 1] = longueur - 2 - derniere_position[a_une_fin]
+
+    return(runs, levels, debuts)
+
+
+def decode_run_level(runs, levels, debuts, longueur):
+    """
+    Opération inverse de quantization_run_level (hors quantification).
+
+    Args:
+        (runs, levels, debuts): frame RLE sous forme de tableaux
+        longueur: nombre de coefficients de chaque macrobloc linéarisé
+
+    Returns:
+        lignes: tableau d'entiers de taille (nb_macroblocs, longueur)
+    """
+    nb_macroblocs = debuts.size - 1
+    lignes = np.zeros((nb_macroblocs, longueur), dtype=int)
+
+    if runs.size == 0:
+        return(lignes)
+
+    # pour chaque paire, position du coefficient dans son macrobloc
+    nb_paires = np.diff(debuts)
+    num_blocs = np.repeat(np.arange(nb_macroblocs), nb_paires)
+
+    cumul = np.cumsum(runs.astype(np.intp) + 1)
+    cumul_avant_bloc = np.concatenate(([0], cumul))[debuts[ : -1]]
+    positions = cumul - cumul_avant_bloc[num_blocs] - 1
+
+    lignes[num_blocs, positions] = levels
+
+    return(lignes)
+
+
+#----------------------------------------------------------------------------#
+
+
+def vers_liste_RLE(runs, levels, debuts):
+    """
+    Vue de compatibilité : convertit une frame RLE sous forme de tableaux en
+    liste de listes de tuples (run, level) d'entiers Python.
+    """
+    paires = list(zip(runs.tolist(), levels.tolist()))
+    bornes = debuts.tolist()
+
+    return([paires[bornes[k] : bornes[k+1]] for k in range(len(bornes) - 1)])
+
+
+def depuis_liste_RLE(frame_RLE):
+    """
+    Convertit une frame RLE au format historique (liste de listes de tuples)
+    en frame RLE sous forme de tableaux (runs, levels, debuts).
+    """
+    debuts = np.zeros(len(frame_RLE) + 1, dtype=np.intp)
+    np.cumsum([len(macrobloc) for macrobloc in frame_RLE], out=debuts[1 : ])
+
+    paires = np.array([paire for macrobloc in frame_RLE for paire in macrobloc], dtype=np.int16).reshape(-1, 2)
+
+    return(np.ascontiguousarray(paires[:, 0]), np.ascontiguousarray(paires[:, 1]), debuts)
+
+
+def en_tableaux(frame_RLE):
+    """
+    Renvoie la frame RLE sous forme de tableaux (runs, levels, debuts), qu'elle
+    soit déjà sous cette forme (tuple) ou au format historique (liste).
+    """
+    if isinstance(frame_RLE, tuple):
+        return(frame_RLE)
+
+    return(depuis_liste_RLE(frame_RLE))
+
+
+#----------------------------------------------------------------------------#
+
+
+def extrait_macroblocs(runs, levels, debuts, debut, fin):
+    """
+    Renvoie la frame RLE (sous forme de tableaux) restreinte aux macroblocs
+    n°debut (inclus) à n°fin (exclu).
+    """
+    bornes = debuts[debut : fin + 1]
+
+    return(runs[bornes[0] : bornes[-1]], levels[bornes[0] : bornes[-1]], bornes - bornes[0])
+
+
+def concatene_tableaux(liste_tableaux_RLE):
+    """
+    Met bout à bout plusieurs frames RLE (sous forme de tableaux), dans l'ordre
+    de la liste.
+
+    Args:
+        liste_tableaux_RLE: liste de triplets (runs, levels, debuts)
+
+    Returns:
+        (runs, levels, debuts): frame RLE contenant tous les macroblocs, dans l'ordre
+    """
+    runs = np.concatenate([tableaux[0] for tableaux in liste_tableaux_RLE])
+    levels = np.concatenate([tableaux[1] for tableaux in liste_tableaux_RLE])
+
+    # on décale les indices de début de chaque frame du nombre de paires qui la précèdent
+    decalages = np.cumsum([0] + [tableaux[2][-1] for tableaux in liste_tableaux_RLE[ : -1]])
+    debuts = np.concatenate([[0]] + [tableaux[2][1 : ] + decalage for (tableaux, decalage) in zip(liste_tableaux_RLE, decalages)])
+
+    return(runs, levels, debuts.astype(np.intp))
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tables de Huffman statiques, entraînées sur un corpus de frames.
+
+Par défaut, chaque frame a son propre dictionnaire de Huffman, construit puis
+transmis (paquets DICT_MSG) à chaque frame. Or, d'une frame à l'autre d'une même
+vidéo, ces dictionnaires sont presque identiques. Une table statique est donc
+construite une fois pour toutes à partir des fréquences des paires (run, level)
+d'un corpus de frames, puis partagée par l'émetteur et le récepteur : les frames
+qui l'utilisent n'indiquent que son identifiant dans leur header, et n'ont plus
+aucun paquet DICT_MSG.
+
+Les paires (run, level) absentes de la table sont codées grâce au symbole
+d'échappement (cf. huffman.ECHAPPEMENT). Si la table est trop mal adaptée à une
+frame (efficacité inférieure à SEUIL_EFFICACITE, cf. efficacite), la frame
+revient à un dictionnaire qui lui est propre (TABLE_DYNAMIQUE).
+
+Les tables sont des fichiers .npz (un par identifiant), dans le dossier donné
+par la variable d'environnement EVEEX_TABLES_DIR (par défaut : assets/tables_huffman).
+
+Entraînement d'une table (cf. le bloc "__main__" ci-dessous) :
+    python tables_huffman.py id_table image_ou_video_1 [image_ou_video_2 ...]
+"""
+
+import os
+from functools import lru_cache
+import numpy as np
+
+from logger import Logger
+from huffman import Huffman, DecodeurHuffman, ECHAPPEMENT
+from huffman import cles_symboles, symboles_des_cles
+import rle
+
+##############################################################################
+
+
+# identifiant (codé sur NB_BITS_ID_TABLE bits dans le header) signifiant que la
+# frame a son propre dictionnaire de Huffman (mode historique)
+TABLE_DYNAMIQUE = 0
+
+NB_BITS_ID_TABLE = 4
+ID_TABLE_MAX = 2**NB_BITS_ID_TABLE - 1
+
+# nombre maximal de paires (run, level) d'une table entraînée : les paires plus
+# rares sont échappées
+NB_SYMBOLES_MAX = 2048
+
+# en-dessous de cette efficacité (cf. efficacite), une frame utilise son propre
+# dictionnaire plutôt que la table statique
+SEUIL_EFFICACITE = 0.85
+
+DOSSIER_TABLES_PAR_DEFAUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "tables_huffman")
+
+
+##############################################################################
+
+
+def dossier_tables():
+    """
+    Renvoie le chemin du dossier contenant les tables statiques.
+    """
+    return(os.environ.get("EVEEX_TABLES_DIR", DOSSIER_TABLES_PAR_DEFAUT))
+
+
+def chemin_table(id_table):
+    return(os.path.join(dossier_tables(), f"table_{id_table}.npz"))
+
+
+def _verifie_id_table(id_table):
+    if not (1 <= id_table <= ID_TABLE_MAX):
+        raise ValueError(f"Identifiant de table statique invalide : {id_table} (doit être compris entre 1 et {ID_TABLE_MAX})")
+
+
+#----------------------------------------------------------------------------#
+
+
+def entraine_table(frames_RLE, nb_symboles_max=NB_SYMBOLES_MAX):
+    """
+    Construit une table de Huffman statique à partir d'un corpus de frames RLE.
+
+    Args:
+        frames_RLE: liste de frames RLE (sous forme de tableaux, ou au format
+                    historique, cf. rle.py)
+        nb_symboles_max: nombre maximal de paires (run, level) de la table
+
+    Returns:
+        huff: instance de Huffman, dont le dictionnaire contient les nb_symboles_max
+              paires les plus fréquentes du corpus, ainsi que le symbole d'échappement
+    """
+    tableaux = [rle.en_tableaux(frame) for frame in frames_RLE]
+    cles = np.concatenate([cles_symboles(runs, levels) for (runs, levels, _) in tableaux])
+
+    cles_uniques, frequences = np.unique(cles, return_counts=True)
+
+    # on garde les paires les plus fréquentes (à fréquence égale : ordre des clés)
+    ordre = np.argsort(-frequences, kind="stable")
+    gardees = ordre[ : nb_symboles_max]
+    echappees = ordre[nb_symboles_max : ]
+
+    runs_gardes, levels_gardes = symboles_des_cles(cles_uniques[gardees])
+    frequences_table = dict(zip(zip(runs_gardes.tolist(), levels_gardes.tolist()), frequences[gardees].tolist()))
+
+    # le symbole d'échappement doit toujours avoir un code, même s'il n'a
+    # jamais servi dans le corpus
+    frequences_table[ECHAPPEMENT] = max(1, int(frequences[echappees].sum()))
+
+    return(Huffman.depuis_frequences(frequences_table))
+
+
+def sauvegarde_table(huff, id_table):
+    """
+    Enregistre la table (canonique) 'huff' sous l'identifiant id_table. Seules
+    les paires (run, level) et la longueur de leurs codes sont enregistrées.
+    """
+    _verifie_id_table(id_table)
+
+    symboles = Huffman.ordre_canonique({symbole: len(code) for (symbole, code) in huff.dict.items()})
+
+    chemin = chemin_table(id_table)
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+
+    np.savez(chemin,
+             runs=np.array([symbole[0] for symbole in symboles], dtype=np.int32),
+             levels=np.array([symbole[1] for symbole in symboles], dtype=np.int32),
+             longueurs=np.array([len(huff.dict[symbole]) for symbole in symboles], dtype=np.int32))
+
+    charge_table.cache_clear()
+    charge_decodeur.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def charge_table(id_table):
+    """
+    Charge la table statique id_table (une seule fois par processus).
+
+    Returns:
+        huff: instance de Huffman dont le dictionnaire est la table statique
+    """
+    _verifie_id_table(id_table)
+
+    chemin = chemin_table(id_table)
+    if not os.path.isfile(chemin):
+        raise FileNotFoundError(f"Table de Huffman statique introuvable : {chemin}")
+
+    with np.load(chemin) as fichier:
+        symboles = list(zip(fichier["runs"].tolist(), fichier["levels"].tolist()))
+        longueurs = fichier["longueurs"].tolist()
+
+    huff = Huffman()
+    huff.dict = Huffman.codes_canoniques(symboles, longueurs)
+
+    return(huff)
+
+
+@lru_cache(maxsize=None)
+def charge_decodeur(id_table):
+    """
+    Renvoie le décodeur (cf. huffman.DecodeurHuffman) de la table statique
+    id_table, dont les tables de décodage ne sont construites qu'une seule fois.
+    """
+    return(DecodeurHuffman(charge_table(id_table).dict))
+
+
+#----------------------------------------------------------------------------#
+
+
+def efficacite(huff, runs, levels):
+    """
+    Mesure l'efficacité du code de 'huff' pour une frame : rapport entre
+    l'entropie (en bits) des paires (run, level) de la frame, qui est la taille
+    minimale de son body avec un code optimal, et la taille de son body avec
+    le code de 'huff' (paires échappées comprises).
+
+    Returns:
+        efficacite: float compris entre 0 et 1 (1 : code optimal pour la frame)
+    """
+    _, frequences = np.unique(cles_symboles(runs, levels), return_counts=True)
+
+    probabilites = frequences / frequences.sum()
+    entropie = -np.sum(frequences * np.log2(probabilites))
+
+    taille_body = huff.nb_bits_body(runs, levels)
+
+    if taille_body == 0:
+        return(1.0)
+
+    return(float(entropie / taille_body))
+
+
+def choisit_table(id_table, runs, levels, seuil=SEUIL_EFFICACITE):
+    """
+    Renvoie l'identifiant de la table à utiliser pour une frame : id_table si
+    elle peut coder toutes les paires (run, level) de la frame et si son
+    efficacité est suffisante, TABLE_DYNAMIQUE sinon.
+    """
+    if id_table == TABLE_DYNAMIQUE:
+        return(TABLE_DYNAMIQUE)
+
+    huff = charge_table(id_table)
+
+    # les paires échappées doivent tenir dans les champs du symbole
+    # d'échappement (un run peut atteindre 3 * macroblock_size**2 - 1 en 4:4:4)
+    if not huff.peut_encoder(runs, levels):
+        Logger.get_instance().debug(f"Table de Huffman n°{id_table} inutilisable (paire trop grande pour être échappée) : "
+                                    "utilisation d'un dictionnaire propre à la frame")
+        return(TABLE_DYNAMIQUE)
+
+    efficacite_table = efficacite(huff, runs, levels)
+
+    if efficacite_table < seuil:
+        Logger.get_instance().debug(f"Table de Huffman n°{id_table} peu efficace ({100 * efficacite_table:.1f}%) : "
+                                    "utilisation d'un dictionnaire propre à la frame")
+        return(TABLE_DYNAMIQUE)
+
+    return(id_table)
+
+
+##############################################################################
+
+
+if __name__ == "__main__":
+    import sys
+    from PIL import Image
+
+    from encoder import Encoder
+    from video_handler import VideoHandler
+    from operateurs import get_DCT_operator
+    from chroma import CHROMA_420
+    from quantification import MATRICE_JPEG
+
+    # paramètres d'encodage du corpus (une table n'est adaptée qu'aux frames
+    # encodées avec les mêmes paramètres)
+    DEFAULT_QUANTIZATION_THRESHOLD = 10
+    macroblock_size = 16
+    sous_echantillonnage = CHROMA_420
+    qualite = 75
+    type_matrice = MATRICE_JPEG
+
+    if len(sys.argv) < 3:
+        print("Usage : python tables_huffman.py id_table image_ou_video_1 [image_ou_video_2 ...]")
+        sys.exit(1)
+
+    id_table = int(sys.argv[1])
+    log = Logger.get_instance()
+
+    enc = Encoder()
+    A = get_DCT_operator(macroblock_size)
+
+    # les dimensions des frames doivent être des multiples de 2 * macroblock_size
+    # (sous-échantillonnage 4:2:0 compris)
+    cote = 2 * macroblock_size
+
+    frames_RLE = []
+    for nom_fichier in sys.argv[2 : ]:
+        if nom_fichier.endswith(".mp4"):
+            # frames au format BGR
+            images = [(frame, True) for frame in VideoHandler.vid2frames(nom_fichier)]
+        else:
+            images = [(np.array(Image.open(nom_fichier).convert("RGB")), False)]
+
+        for (image, mode_RPi) in images:
+            img_height, img_width = (image.shape[0] // cote) * cote, (image.shape[1] // cote) * cote
+            image_yuv = enc.RGB_to_YUV(np.array(image[ : img_height, : img_width], dtype=float), mode_RPi=mode_RPi)
+
+            frames_RLE.append(enc.decompose_frame_en_tableaux_via_DCT(image_yuv, (img_width, img_height), macroblock_size,
+                                                                      DEFAULT_QUANTIZATION_THRESHOLD, A,
+                                                                      sous_echantillonnage=sous_echantillonnage,
+                                                                      qualite=qualite, type_matrice=type_matrice))
+
+        log.debug(f"{nom_fichier} : {len(frames_RLE)} frame(s) au total")
+
+    huff = entraine_table(frames_RLE)
+    sauvegarde_table(huff, id_table)
+
+    log.debug(f"Table n°{id_table} ({len(huff.dict)} symboles) enregistrée dans {chemin_table(id_table)}")
+
+    for (num_frame, (runs, levels, _)) in enumerate(frames_RLE[ : 10]):
+        log.debug(f"Efficacité sur la frame n°{num_frame} : {100 * efficacite(charge_table(id_table), runs, levels):.1f}%")
@@ -21,7 +21,7 @@ PORT = 22 # port SSH
 cli = Client(HOST, PORT, bufsize, True)
 cli.connect_to_server()
 
-fake_legal_msg = "1" * 18 # on simule l'envoie du tail (avec frame_id = 65535)
+fake_legal_msg = bytes([0xB3]) # on simule l'envoie du tail (1 seul octet, sans frame_id, cf. bitstream.py)
 
 cli.send_data_to_server(fake_legal_msg)
 cli.wait_for_response()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tables de parcours en zig zag, partagées par l'encodeur et le décodeur.
+
+Le chemin du zig zag ne dépend que de la taille des macroblocs : on le calcule
+donc une seule fois par taille (puis on le garde en cache), sous la forme d'une
+permutation des indices "à plat" (i * N + j) d'un macrobloc. Le zig zag (et son
+inverse) d'un lot entier de macroblocs se résume alors à une seule indexation
+Numpy.
+"""
+
+from functools import lru_cache
+import numpy as np
+
+##############################################################################
+
+
+@lru_cache(maxsize=None)
+def ordre_zigzag(N):
+    """
+    Calcule l'ordre de parcours en zig zag d'un macrobloc de taille NxN.
+
+    Args:
+        N: taille (d'un côté) d'un macrobloc
+
+    Returns:
+        ordre: tableau (en lecture seule) de taille N**2, tel que ordre[t] est
+               l'indice à plat (i * N + j) du t-ième coefficient parcouru
+    """
+    ordre = np.zeros(N * N, dtype=np.intp)
+
+    # Direction
+    up = False
+    # Position du curseur
+    i, j = 0, 0
+
+    for t in range(N * N):
+        ordre[t] = i * N + j
+
+        # Si on parcourt le macrobloc vers le haut
+        if up:
+            if j == N - 1:
+                i += 1
+                up = False  # On change de direction
+            elif i == 0:
+                j += 1
+                up = False  # On change de direction
+            else:
+                # Sinon on parcourt la diagonale
+                i -= 1
+                j += 1
+        # Si on parcourt le macrobloc vers le bas
+        else:
+            if i == N - 1:
+                j += 1
+                up = True  # On change de direction
+            elif j == 0:
+                i += 1
+                up = True  # On change de direction
+            else:
+                # Sinon on parcourt la diagonale
+                j -= 1
+                i += 1
+
+    # la table est partagée via le cache : on empêche toute modification
+    ordre.setflags(write=False)
+
+    return(ordre)
+
+
+@lru_cache(maxsize=None)
+def ordre_zigzag_inverse(N):
+    """
+    Permutation inverse de ordre_zigzag(N) : pour chaque indice à plat d'un
+    macrobloc, donne sa position dans le parcours en zig zag.
+    """
+    ordre_inverse = np.argsort(ordre_zigzag(N))
+    ordre_inverse.setflags(write=False)
+
+    return(ordre_inverse)
+
+
+#----------------------------------------------------------------------------#
+
+
+def zigzag_par_lots(blocs):
+    """
+    Linéarise en zig zag un lot de macroblocs. Comme dans
+    Encoder.zigzag_linearisation, les couches sont mises bout à bout (toute
+    la couche Y, puis toute la couche U, puis toute la couche V).
+
+    Args:
+        blocs: tableau de taille (nb_macroblocs, N, N, 3) ou (nb_macroblocs, N, N)
+
+    Returns:
+        lignes: tableau de taille (nb_macroblocs, 3 * N**2) (resp. (nb_macroblocs, N**2))
+    """
+    nb_macroblocs, N = blocs.shape[ : 2]
+
+    # (nb_macroblocs, N**2, [3]) --> gather selon l'ordre du zig zag
+    lignes = blocs.reshape((nb_macroblocs, N * N) + blocs.shape[3 : ])[:, ordre_zigzag(N)]
+
+    if lignes.ndim == 3:
+        lignes = lignes.swapaxes(1, 2)
+
+    return(lignes.reshape(nb_macroblocs, -1))
+
+
+def decode_zigzag_par_lots(lignes, N, nb_couches=3):
+    """
+    Opération inverse de zigzag_par_lots.
+
+    Args:
+        lignes: tableau de taille (nb_macroblocs, nb_couches * N**2)
+        N: taille (d'un côté) d'un macrobloc
+        nb_couches: nombre de couches mises bout à bout dans chaque ligne (3 ou 1)
+
+    Returns:
+        blocs: tableau de taille (nb_macroblocs, N, N, 3) si nb_couches = 3, et
+               (nb_macroblocs, N, N) si nb_couches = 1
+    """
+    nb_macroblocs = lignes.shape[0]
+
+    # (nb_macroblocs, nb_couches, N**2) --> gather selon l'ordre inverse du zig zag
+    blocs = lignes.reshape(nb_macroblocs, nb_couches, N * N)[:, :, ordre_zigzag_inverse(N)]
+
+    if nb_couches == 1:
+        return(blocs.reshape(nb_macroblocs, N, N))
+
+    return(np.moveaxis(blocs, 1, 2).reshape(nb_macroblocs, N, N, nb_couches))
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+import tables_huffman
+
+
+@pytest.fixture
+def dossier_tables(tmp_path, monkeypatch):
+    """
+    Dossier de tables temporaire (cf. tables_huffman.dossier_tables), les caches
+    de chargement des tables étant vidés avant et après chaque test.
+    """
+    monkeypatch.setenv("EVEEX_TABLES_DIR", str(tmp_path))
+    tables_huffman.charge_table.cache_clear()
+    tables_huffman.charge_decodeur.cache_clear()
+    yield tmp_path
+    tables_huffman.charge_table.cache_clear()
+    tables_huffman.charge_decodeur.cache_clear()
+
+
+def test_run_trop_grand_pour_etre_echappe(dossier_tables):
+    # la table est très efficace pour la frame testée (90%) : seule la paire
+    # échappée (4798, 7), dont le run ne tient pas sur NB_BITS_RUN_ECHAPPEMENT
+    # bits (macrobloc uniforme avec N = 40, en 4:4:4), impose un dictionnaire
+    # propre à la frame
+    macrobloc = [(0, 5)] * 8 + [(1, -2)] * 4 + [(0, 1)] * 2 + [(2, 3)] * 2
+    tables_huffman.sauvegarde_table(tables_huffman.entraine_table([[macrobloc] * 20]), 1)
+
+    runs = np.array([run for (run, _) in macrobloc] * 20 + [4798])
+    levels = np.array([level for (_, level) in macrobloc] * 20 + [7])
+
+    assert tables_huffman.choisit_table(1, runs, levels) == tables_huffman.TABLE_DYNAMIQUE
+
+
+def test_table_statique_choisie(dossier_tables):
+    macrobloc = [(0, 5)] * 8 + [(1, -2)] * 4 + [(0, 1)] * 2 + [(2, 3)] * 2
+    tables_huffman.sauvegarde_table(tables_huffman.entraine_table([[macrobloc] * 20]), 1)
+
+    runs = np.array([run for (run, _) in macrobloc] * 20)
+    levels = np.array([level for (_, level) in macrobloc] * 20)
+
+    assert tables_huffman.choisit_table(1, runs, levels) == 1